@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Archive Processor v1.4.2 - Shape files inside zip/tar archives in one pass
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import io, os, re, json, time, tarfile, zipfile
+from collections import deque
+from xml.etree import ElementTree as ET
+from text_processor import TextProcessor
+from normalizer import Normalizer
+from glossary import Glossary
+
+ARCHIVE_EXTS = ('.zip', '.tar', '.tar.gz', '.tgz')
+RTL_CHARS = re.compile('[؀-ۿﭐ-﷿ﹰ-﻿]')
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTS)
+
+def member_type(name):
+    return os.path.splitext(name)[1].lower() or '(none)'
+
+def _process_member(job):
+    """Worker: (name, data, config) -> (name, data or None if unchanged, seconds, error)"""
+    name, data, config = job
+    start = time.perf_counter()
+    try:
+        result, error = MemberProcessor.get(config).process(name, data), ''
+    except Exception as e:
+        result, error = None, str(e)  # a broken member is copied as is
+    return name, result, time.perf_counter() - start, error
+
+class MemberProcessor:
+    """Shapes one member with the reader for its type; only strings with Persian/Arabic text change"""
+    TEXT_EXTS = ('.txt', '.text', '.md')
+    CACHE_SIZE = 100_000
+    CONFIGS = 2  # instances kept per process; a worker outlives many configs under --watch
+    _instances = {}  # config key -> instance, most recently used last
+
+    def __init__(self, exceptions, profile, terms):
+        self.exceptions = list(exceptions)
+        self.profile = profile
+        self.glossary = Glossary(terms) if terms else None
+        self.cache = {}
+        self.touched = False  # set when shape() changes a string
+
+    @classmethod
+    def get(cls, config):
+        key = json.dumps(config, ensure_ascii=False, sort_keys=True)
+        instance = cls._instances.pop(key, None)
+        if instance is None:
+            instance = cls(config['exceptions'], config['profile'], config['terms'])
+            while len(cls._instances) >= cls.CONFIGS:
+                del cls._instances[next(iter(cls._instances))]
+        cls._instances[key] = instance
+        return instance
+
+    def shape(self, text):
+        if not isinstance(text, str) or not text:
+            return text
+        if text not in self.cache:
+            if len(self.cache) >= self.CACHE_SIZE:
+                self.cache.clear()  # in place: a DocxProcessor may share it
+            value = Normalizer.normalize(text, self.profile)
+            if self.glossary:
+                value = self.glossary.apply(value)
+            self.cache[text] = TextProcessor.encode_text(value, self.exceptions) if RTL_CHARS.search(value) else value
+        result = self.cache[text]
+        if result != text:
+            self.touched = True
+        return result
+
+    def shape_tree(self, data):
+        """Shape string leaves of parsed JSON/YAML"""
+        if isinstance(data, dict):
+            return {k: self.shape_tree(v) for k, v in data.items()}
+        if isinstance(data, list):
+            return [self.shape_tree(v) for v in data]
+        return self.shape(data)
+
+    def process(self, name, data):
+        """New bytes for the member, or None when nothing in it needed shaping"""
+        ext = member_type(name)
+        self.touched = False
+        if ext == '.docx':
+            from docx_processor import DocxProcessor
+            out = io.BytesIO()
+            processor = DocxProcessor(self.exceptions, self.profile, self.glossary)
+            processor.cache = self.cache
+            stats = processor.process(io.BytesIO(data), out)
+            return out.getvalue() if stats['shaped'] else None
+        handler = {'.po': self.process_po, '.json': self.process_json, '.yaml': self.process_yaml,
+                   '.yml': self.process_yaml, '.xml': self.process_xml, '.csv': self.process_csv,
+                   '.tsv': self.process_csv, '.srt': self.process_subtitles, '.vtt': self.process_subtitles}.get(ext)
+        if handler is None and ext not in self.TEXT_EXTS:
+            return None  # unknown type: copied as is
+        text = data.decode('utf-8-sig')
+        result = handler(text, name) if handler else self.shape(text)
+        return result.encode('utf-8') if self.touched else None  # untouched files keep their formatting
+
+    def process_po(self, text, name):
+        import polib
+        po = polib.pofile(text)
+        for entry in po:
+            entry.msgstr = self.shape(entry.msgstr)
+            for n, value in entry.msgstr_plural.items():
+                entry.msgstr_plural[n] = self.shape(value)
+        return str(po)
+
+    def process_json(self, text, name):
+        return json.dumps(self.shape_tree(json.loads(text)), ensure_ascii=False, indent=2)
+
+    def process_yaml(self, text, name):
+        import yaml
+        from stream_parsers import YamlLoader
+        return yaml.dump(self.shape_tree(yaml.load(text, Loader=YamlLoader)), allow_unicode=True, default_flow_style=False)
+
+    def process_xml(self, text, name):
+        root = ET.fromstring(text)
+        for element in root.iter():
+            if element.text and element.text.strip():
+                element.text = self.shape(element.text)
+            for attr, value in element.attrib.items():
+                element.set(attr, self.shape(value))
+        return ET.tostring(root, encoding='unicode', xml_declaration=True)
+
+    def process_csv(self, text, name):
+        from csv_processor import CsvProcessor
+        processor = CsvProcessor()
+        processor.shape_text = self.shape
+        out = io.StringIO()
+        delimiter = CsvProcessor.delimiter(name, text[:8192])
+        processor.process(io.StringIO(text, newline=''), out, delimiter, '\r\n' if '\r\n' in text[:8192] else '\n')
+        return out.getvalue()
+
+    def process_subtitles(self, text, name):
+        from subtitle_processor import SubtitleProcessor
+        processor = SubtitleProcessor()
+        processor.cache, processor.shape = self.cache, self.shape
+        return processor.apply(text)
+
+class ArchiveProcessor:
+    """Reads members in order, shapes them (in the process pool when there are cores to
+    spare) and writes each into the output archive as soon as it and its predecessors are done"""
+    WINDOW_PER_CPU = 2  # members in flight per core; bounds memory for huge archives
+
+    def __init__(self, exceptions=None, profile='', glossary=None):
+        self.config = {'exceptions': list(exceptions or []), 'profile': profile or '',
+                       'terms': glossary.terms if glossary else {}}
+        self.stats = {}  # member type -> {'members', 'changed', 'failed', 'bytes', 'seconds'}
+        self.errors = []
+
+    def record(self, name, size, result, seconds, error):
+        stats = self.stats.setdefault(member_type(name), {'members': 0, 'changed': 0, 'failed': 0, 'bytes': 0, 'seconds': 0.0})
+        stats['members'] += 1
+        stats['changed'] += result is not None
+        if error:
+            stats['failed'] += 1
+            self.errors.append(f"{name}: {error}")
+        stats['bytes'] += size
+        stats['seconds'] += seconds
+
+    @staticmethod
+    def tar_mode(path, write=False):
+        compressed = path.lower().endswith(('.gz', '.tgz'))
+        return ('w|gz' if compressed else 'w|') if write else ('r|gz' if compressed else 'r|')
+
+    def process(self, src, dst):
+        cpus = os.cpu_count() or 1
+        pool = TextProcessor.get_pool() if cpus > 1 else None
+        window = cpus * self.WINDOW_PER_CPU
+        if src.lower().endswith('.zip'):
+            with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, 'w') as zout:
+                def members():
+                    for info in zin.infolist():
+                        yield info, (None if info.is_dir() else zin.read(info))
+                def write(info, data):
+                    out = zipfile.ZipInfo(info.filename, info.date_time)
+                    out.compress_type, out.external_attr = info.compress_type, info.external_attr
+                    zout.writestr(out, data if data is not None else b'')
+                self.run(members(), write, pool, window)
+        else:
+            with tarfile.open(src, self.tar_mode(src)) as tin, tarfile.open(dst, self.tar_mode(dst, True)) as tout:
+                def members():
+                    for info in tin:  # streaming mode: each member is read before moving on
+                        yield info, (tin.extractfile(info).read() if info.isfile() else None)
+                def write(info, data):
+                    if data is None:
+                        tout.addfile(info)
+                    else:
+                        info.size = len(data)
+                        tout.addfile(info, io.BytesIO(data))
+                self.run(members(), write, pool, window)
+        return self.stats
+
+    def run(self, members, write, pool, window):
+        """Single pass: results are written in archive order while later members are still running"""
+        pending = deque()
+        name_of = lambda info: getattr(info, 'filename', None) or info.name
+
+        def finish():
+            info, data, future = pending.popleft()
+            _, result, seconds, error = future.result() if pool else future
+            self.record(name_of(info), len(data), result, seconds, error)
+            write(info, result if result is not None else data)
+
+        for info, data in members:
+            if data is None:  # directories, links: nothing to process
+                while pending:
+                    finish()
+                write(info, None)
+                continue
+            job = (name_of(info), data, self.config)
+            pending.append((info, data, pool.submit(_process_member, job) if pool else _process_member(job)))
+            while len(pending) > (window if pool else 0):
+                finish()
+        while pending:
+            finish()
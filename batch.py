@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Batch v1.4.2 - Incremental batch processing with a manifest
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import os, time, json, hashlib
+from text_processor import TextProcessor
+from normalizer import Normalizer
+from docx_processor import DocxProcessor
+from subtitle_processor import SubtitleProcessor, SUBTITLE_EXTS
+from csv_processor import CsvProcessor, CSV_EXTS
+from archive_processor import ArchiveProcessor, is_archive
+from translation_memory import MemoryCache
+
+TEXT_EXTS = ('.txt', '.text', '.md', '.csv', '.po', '.json', '.yaml', '.yml', '.xml')
+BATCH_EXTS = TEXT_EXTS + SUBTITLE_EXTS + ('.tsv', '.docx', '.doc', '.pdf')
+
+class BatchProcessor:
+    """Runs read_file + encode_text over files and directories, skipping files whose
+    size/mtime (or, failing that, content hash), config and engine are unchanged. With a
+    translation memory, strings of DOCX, CSV and subtitle files that were shaped before under
+    the same config are taken from it instead of being reshaped."""
+
+    def __init__(self, db, exceptions=None, profile='', glossary=None, force=False, memory=None):
+        self.db = db
+        self.exceptions = exceptions or []
+        self.profile = profile
+        self.glossary = glossary
+        self.force = force
+        self.config = self.config_fingerprint()
+        self.engine = TextProcessor.engine_version()
+        self.memory = memory
+        self.processors = {}  # kept across files, so shaping caches stay warm
+        self.memory_config = memory.config_key(self.exceptions, self.profile, self.glossary) if memory else None
+
+    def config_fingerprint(self):
+        config = {'exceptions': sorted(self.exceptions), 'normalize': self.profile or '',
+                  'glossary': self.glossary.fingerprint if self.glossary else ''}
+        return hashlib.sha1(json.dumps(config, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def file_hash(path):
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    @staticmethod
+    def collect(paths, out_dir):
+        """(path, root) for every supported file; root is what output paths are relative to"""
+        out_dir = os.path.abspath(out_dir)
+        files = []
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isfile(path):
+                files.append((path, os.path.dirname(path)))
+                continue
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(d for d in dirnames if os.path.join(dirpath, d) != out_dir)
+                for name in sorted(filenames):
+                    if os.path.splitext(name)[1].lower() in BATCH_EXTS or is_archive(name):
+                        files.append((os.path.join(dirpath, name), path))
+        return files
+
+    @staticmethod
+    def output_path(path, root, out_dir):
+        rel = os.path.relpath(path, root)
+        if os.path.splitext(rel)[1].lower() not in TEXT_EXTS + SUBTITLE_EXTS + ('.tsv', '.docx') and not is_archive(rel):
+            rel += '.txt'
+        return os.path.join(out_dir, rel)
+
+    def process(self, path, out):
+        """Write the processed file to out; returns extra report lines (per member type for archives)"""
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        if is_archive(path):  # members are streamed into a new archive, nothing extracted to disk
+            archive = ArchiveProcessor(self.exceptions, self.profile, self.glossary)
+            notes = []
+            for kind, s in sorted(archive.process(path, out).items()):
+                mb = s['bytes'] / 1_000_000
+                notes.append(f"  {kind}: {s['members']} members, {s['changed']} changed, {s['failed']} failed, "
+                             f"{mb:.2f} MB in {s['seconds']:.2f}s ({mb / s['seconds'] if s['seconds'] else 0:.2f} MB/s)")
+            return notes + [f"  Failed: {error}" for error in archive.errors]
+        if path.lower().endswith('.docx'):  # shaped in place, formatting kept
+            processor = self.processor('docx', lambda: DocxProcessor(self.exceptions, self.profile, self.glossary))
+            return self.remembered(processor, lambda: processor.process(path, out))
+        if path.lower().endswith(CSV_EXTS):  # cells only, never delimiters or quotes
+            processor = self.processor('csv', lambda: CsvProcessor(None, self.exceptions, self.profile, self.glossary))
+            return self.remembered(processor, lambda: processor.process_file(path, out))
+        if path.lower().endswith(SUBTITLE_EXTS):
+            processor = self.processor('subtitles', lambda: SubtitleProcessor(self.exceptions, self.profile, self.glossary))
+            return self.remembered(processor, lambda: processor.process_file(path, out))
+        text = TextProcessor.read_file(path)
+        text = Normalizer.normalize(text, self.profile)
+        if self.glossary:
+            text = self.glossary.apply(text)
+        with open(out, 'w', encoding='utf-8') as f:
+            f.write(TextProcessor.encode_text(text, self.exceptions))
+        return []
+
+    def processor(self, kind, factory):
+        if kind not in self.processors:
+            self.processors[kind] = factory()
+        return self.processors[kind]
+
+    def remembered(self, processor, run):
+        """run() with the processor's cache backed by the translation memory"""
+        if self.memory is None:
+            run()
+            return []
+        if not isinstance(processor.cache, MemoryCache):
+            processor.cache = MemoryCache(self.memory, self.memory_config)
+        cache, hits = processor.cache, processor.cache.hits
+        try:
+            run()
+        finally:
+            cache.flush()
+        return [f"  Memory: {cache.hits - hits} exact hits reused"] if cache.hits > hits else []
+
+    def run(self, paths, out_dir, log=None):
+        """Process changed files into out_dir; returns counts and the time saved by skipping"""
+        manifest = {} if self.force else self.db.get_manifest()
+        stats = {'processed': 0, 'skipped': 0, 'failed': 0, 'seconds': 0.0, 'saved': 0.0}
+        updates = []
+        start = time.perf_counter()
+        for path, root in self.collect(paths, out_dir):
+            self.run_file(path, root, out_dir, manifest, stats, updates, log)
+        self.db.save_manifest(updates)
+        stats['seconds'] = time.perf_counter() - start
+        return stats
+
+    def run_file(self, path, root, out_dir, manifest, stats, updates, log=None):
+        """Process one file unless its manifest entry is current; manifest is updated in place
+        and the new rows are appended to updates. Returns 'processed', 'skipped' or 'failed'."""
+        out = self.output_path(path, root, out_dir)
+        try:
+            st = os.stat(path)
+            entry = manifest.get(path)
+            current = entry and entry[4] == self.config and entry[5] == self.engine and entry[6] == out and os.path.exists(out)
+            if current and entry[1] == st.st_size and entry[2] == st.st_mtime:
+                stats['skipped'] += 1
+                stats['saved'] += entry[7] or 0.0
+                return 'skipped'
+            digest = self.file_hash(path)
+            if current and entry[3] == digest:  # touched but unchanged
+                stats['skipped'] += 1
+                stats['saved'] += entry[7] or 0.0
+                row = (path, st.st_size, st.st_mtime, digest, self.config, self.engine, out, entry[7])
+                updates.append(row)
+                manifest[path] = row
+                return 'skipped'
+            t = time.perf_counter()
+            notes = self.process(path, out)
+            row = (path, st.st_size, st.st_mtime, digest, self.config, self.engine, out, time.perf_counter() - t)
+            updates.append(row)
+            manifest[path] = row
+            stats['processed'] += 1
+            if log:
+                log(f"Processed: {path}")
+                for note in notes:
+                    log(note)
+            return 'processed'
+        except Exception as e:
+            stats['failed'] += 1
+            if log:
+                log(f"Failed: {path}: {e}")
+            return 'failed'
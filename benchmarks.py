@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Harfnegar Benchmarks v1.4.2 - Throughput checks on synthetic input
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0
+
+Usage: python benchmarks.py [name ...] [--size-mb N] > bench_output.txt"""
+import os, sys, time, random, argparse, tempfile, threading
+from text_processor import TextProcessor
+from normalizer import Normalizer
+from subtitle_processor import SubtitleProcessor
+from database_manager import DatabaseManager
+from translation_memory import TranslationMemory
+from text_stats import TextStats
+
+WORDS = ['کتاب', 'كتاب', 'کتـــاب', 'می‌روم', 'می‌‌روم', 'می ‌روم', 'يك', 'یک', 'ی‌ک',
+         '۱۲۳', '١٢٣', 'سلام', 'دنیا', 'دنيا', 'Harfnegar', '2026']
+
+def sample_text(size_mb, seed=1):
+    rnd = random.Random(seed)
+    lines, size = [], 0
+    while size < size_mb * 1_000_000:
+        line = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 6)))
+        lines.append(line)
+        size += len(line.encode('utf-8')) + 1
+    return '\n'.join(lines)
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def report(name, **values):
+    print(name + '  ' + '  '.join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in values.items()))
+    sys.stdout.flush()
+
+def bench_normalize(size_mb):
+    text = sample_text(size_mb)
+    mb = len(text.encode('utf-8')) / 1_000_000
+    for profile in Normalizer.profiles():
+        _, secs = timed(Normalizer.normalize, text, profile)
+        report('normalize', profile=profile, mb=mb, secs=secs, mb_per_s=mb / secs)
+    lines = text.split('\n')
+    for profile in Normalizer.profiles():
+        stats, secs = timed(Normalizer.collapse_stats, lines, profile)
+        report('normalize_collapse', profile=profile, secs=secs, **stats)
+
+def sample_srt(cues, seed=1):
+    rnd = random.Random(seed)
+    blocks = []
+    for i in range(cues):
+        t = i * 3
+        timing = f"{t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d},000 --> {t // 3600:02d}:{t // 60 % 60:02d}:{t % 60 + 2:02d},500"
+        text = '\r\n'.join(' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 3))) for _ in range(rnd.randint(1, 2)))
+        blocks.append(f"{i + 1}\r\n{timing}\r\n{text}\r\n")
+    return '\r\n'.join(blocks)
+
+def bench_subtitles(size_mb):
+    text = sample_srt(int(size_mb * 12_000))
+    processor = SubtitleProcessor()
+    for run in ('cold', 'warm'):
+        processor.stats = {'cues': 0, 'lines': 0, 'cache_hits': 0}
+        _, secs = timed(processor.apply, text)
+        stats = processor.stats
+        report('subtitles', run=run, secs=secs, cues_per_s=stats['cues'] / secs, **stats)
+    _, secs = timed(TextProcessor.encode_text, text)  # the old whole-file path, for comparison
+    report('subtitles', run='whole_file', secs=secs, cues_per_s=processor.stats['cues'] / secs)
+
+def bench_stats(size_mb):
+    """Full count and a one-character edit"""
+    text = sample_text(size_mb)
+    stats, secs = timed(TextStats, text)
+    scripts, script_secs = timed(stats.scripts)
+    pos = len(text) // 2
+    edited = text[:pos] + '۷' + text[pos:]
+    _, update_secs = timed(stats.update, text, edited, pos, 0, 1)
+    report('stats', mb=len(text.encode('utf-8')) / 1_000_000, count_secs=secs, scripts_ms=script_secs * 1000,
+           update_ms=update_secs * 1000, **scripts)
+
+def bench_db_stress(size_mb, threads=16, ops=300):
+    """Many threads mixing reads, single writes and bulk writes on one DatabaseManager
+    (checks.py db_threads verifies the results)"""
+    path = os.path.join(tempfile.mkdtemp(), 'stress.db')
+    db = DatabaseManager(path)
+    barrier = threading.Barrier(threads)
+
+    def worker(n):
+        rnd = random.Random(n)
+        barrier.wait()
+        for i in range(ops):
+            op = rnd.random()
+            if op < 0.4:
+                db.get_history(10)
+                db.get_exception_patterns()
+            elif op < 0.6:
+                db.add_history(f"in {n}.{i}", f"out {n}.{i}")
+            elif op < 0.7:
+                db.set(f"stress_{n}", i)
+            elif op < 0.8:
+                db.add_exceptions([(f"x{n}_{i}_{k}", '') for k in range(10)])
+            else:
+                db.add_favorites([f"fav {n}.{i}.{k}" for k in range(20)])
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    secs = time.perf_counter() - start
+    db.close()
+    report('db_stress', threads=threads, ops=threads * ops, secs=secs, ops_per_s=threads * ops / secs)
+
+def bench_tm(size_mb, queries=500, k=5):
+    """Fill a translation memory with size_mb * 25k distinct sentences, then time fuzzy lookups
+    of sentences with one word replaced; recall is how often the original is among the top k"""
+    rnd = random.Random(1)
+    letters = 'ابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی'
+    vocabulary = [''.join(rnd.choice(letters) for _ in range(rnd.randint(2, 7))) for _ in range(5000)]
+    sources = [' '.join(rnd.choice(vocabulary) for _ in range(rnd.randint(3, 10))) for _ in range(int(size_mb * 25_000))]
+    db = DatabaseManager(os.path.join(tempfile.mkdtemp(), 'tm.db'))
+    memory = TranslationMemory(db)
+    start = time.perf_counter()
+    for i in range(0, len(sources), 10_000):
+        memory.add([(source, source[::-1]) for source in sources[i:i + 10_000]], 'bench')
+    secs = time.perf_counter() - start
+    report('tm_add', entries=db.get_tm_count(), secs=secs, entries_per_s=len(sources) / secs)
+    times, found = [], 0
+    for _ in range(queries):
+        source = rnd.choice(sources)
+        words = source.split()
+        words[rnd.randrange(len(words))] = rnd.choice(vocabulary)
+        matches, secs = timed(memory.suggest, ' '.join(words), k)
+        times.append(secs)
+        found += any(match[1] == source for match in matches)
+    times.sort()
+    report('tm_suggest', queries=queries, p50_ms=times[len(times) // 2] * 1000, p95_ms=times[len(times) * 95 // 100] * 1000,
+           recall=found / queries)
+    _, secs = timed(lambda: [memory.exact(source, 'bench') for source in sources[:queries]])
+    report('tm_exact', queries=queries, us_per_lookup=secs / queries * 1e6)
+    db.close()
+
+def bench_history(size_mb, snapshots=150):
+    """Debounced snapshots of a pasted document being edited, every third one a repeat of an
+    earlier text (undo); inline_mb is what the retained rows would take stored uncompressed"""
+    doc = sample_text(size_mb / 16)
+    db = DatabaseManager(os.path.join(tempfile.mkdtemp(), 'history.db'))
+    texts, times = [], []
+    for i in range(snapshots):
+        text = texts[i - 2] if i % 3 == 2 else doc + f" {i}"
+        texts.append(text)
+        _, secs = timed(db.add_history, text, TextProcessor.encode_text(text[:1000]))
+        times.append(secs)
+    retained = db.get_history(db.HISTORY_LIMIT)
+    inline = sum(len(i.encode('utf-8')) + len(o.encode('utf-8')) for i, o, ts in retained) / 1_000_000
+    _, read_secs = timed(db.get_history, 10)
+    report('history', snapshots=snapshots, doc_mb=len(doc.encode('utf-8')) / 1_000_000, add_ms=sum(times) / snapshots * 1000,
+           get_ms=read_secs * 1000, inline_mb=inline, db_mb=db.file_size() / 1_000_000)
+    before, after = db.vacuum()
+    report('history_vacuum', before_mb=before / 1_000_000, after_mb=after / 1_000_000)
+    db.close()
+
+BENCHMARKS = {'normalize': bench_normalize, 'subtitles': bench_subtitles, 'stats': bench_stats, 'db_stress': bench_db_stress, 'tm': bench_tm,
+              'history': bench_history}
+
+def main():
+    parser = argparse.ArgumentParser(description='Harfnegar benchmarks')
+    parser.add_argument('names', nargs='*', help='Benchmarks to run: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--size-mb', type=float, default=8, help='Synthetic input size')
+    args = parser.parse_args()
+    for name in args.names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark: {name}")
+        BENCHMARKS[name](args.size_mb)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Harfnegar Checks v1.4.2 - Deterministic equivalence checks on generated input
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0
+
+Each check compares a fast path with the straightforward one it replaces and returns the
+cases that differ. Timings live in benchmarks.py; this only says whether results agree.
+
+Usage: python checks.py [name ...]   (exit status 1 when any check fails)"""
+import io, os, csv, sys, json, random, argparse, tempfile, threading
+import yaml, polib
+from arabic_reshaper import reshape
+from bidi.algorithm import get_display
+from text_processor import TextProcessor, _encode_chunk
+from pipeline import Pipeline
+from csv_processor import CsvProcessor
+from glossary import Glossary
+from database_manager import DatabaseManager
+from text_stats import TextStats
+from stream_parsers import iter_json_rows, iter_yaml_rows, iter_po_rows, StreamFallback, YamlLoader
+
+BIDI_PARTS = ['سلام', 'دنیا 12', 'hi', 'a-b', '123', '۱۲۳', '(1)', '4.5', '$5', '%', '!', '-', '+', ' ', '']
+
+def sample_lines(rnd, parts, max_lines):
+    return [' '.join(rnd.choice(parts) for _ in range(rnd.randint(0, 4))) for _ in range(rnd.randint(1, max_lines))]
+
+def check_parallel_chunks(cases=2000):
+    """encode_parallel's chunks, rendered one by one and joined, == one serial reshape + bidi"""
+    rnd = random.Random(27)
+    failures = []
+    for _ in range(cases):
+        text = '\n'.join(sample_lines(rnd, BIDI_PARTS, 12))
+        jobs = TextProcessor.split_chunks(text, rnd.choice((1, 8, 40)))
+        if '\n'.join(map(_encode_chunk, jobs)) != get_display(reshape(text)):
+            failures.append(repr(text))
+    return failures
+
+def check_pipeline_shape(cases=2000):
+    """--pipeline shape, at any chunk size, == encode_text on the whole text"""
+    rnd = random.Random(31)
+    failures = []
+    for _ in range(cases):
+        text = '\n'.join(sample_lines(rnd, BIDI_PARTS, 12))
+        pipeline = Pipeline('shape')
+        pipeline.SHAPE_CHUNK = rnd.choice((1, 8, 40, 64_000))
+        if pipeline.apply(text) != TextProcessor.encode_text(text):
+            failures.append(repr(text))
+    return failures
+
+def check_csv_passthrough(cases=300):
+    """CsvProcessor output: the input's exact text for rows and cells it does not shape,
+    and the same cells as shaping the parsed rows one value at a time"""
+    rnd = random.Random(38)
+    values = ['id', 'name', 'سلام', 'a,b', 'say "hi"', 'دنیا\nدو', '', '12', 'x y']
+    quoting = (csv.QUOTE_MINIMAL, csv.QUOTE_ALL, csv.QUOTE_NONNUMERIC)
+    failures = []
+    for _ in range(cases):
+        rows = [[rnd.choice(values) for _ in range(rnd.randint(1, 4))] for _ in range(rnd.randint(1, 6))]
+        out = io.StringIO()
+        csv.writer(out, quoting=rnd.choice(quoting), lineterminator=rnd.choice(('\n', '\r\n'))).writerows(rows)
+        text = out.getvalue()
+        processor = CsvProcessor(header=False)
+        result = io.StringIO()
+        processor.process(io.StringIO(text, newline=''), result)
+        expected = [[processor.shape_text(v) if v and any(TextProcessor.is_persian_arabic(c) for c in v) else v for v in row] for row in rows]
+        if list(csv.reader(io.StringIO(result.getvalue(), newline=''))) != expected:
+            failures.append(f"cells differ: {text!r}")
+        plain = text.replace('سلام', 'salam').replace('دنیا', 'donya').replace('دو', 'do')
+        result = io.StringIO()
+        CsvProcessor(header=False).process(io.StringIO(plain, newline=''), result)
+        if result.getvalue() != plain:
+            failures.append(f"unshaped text changed: {plain!r}")
+    return failures
+
+def sample_doc(rnd, depth=0, int_keys=False):
+    scalars = ['سلام', 'a "quoted" \\ line\nnext', '', 'x' * 40, '\u200c', 0, -12, 3.25, 1e21, True, False, None]
+    if depth > 3 or rnd.random() < 0.3:
+        return rnd.choice(scalars)
+    if rnd.random() < 0.5:
+        return [sample_doc(rnd, depth + 1, int_keys) for _ in range(rnd.randint(0, 4))]
+    keys = ['a', 'b.c', 'کلید', 'x y'] + ([1, 2] if int_keys else [])
+    return {rnd.choice(keys): sample_doc(rnd, depth + 1, int_keys) for _ in range(rnd.randint(0, 4))}
+
+def check_stream_rows(cases=500):
+    """Rows streamed by the JSON/YAML/PO readers == the rows of a full parse (dict_rows for
+    JSON/YAML, polib entries for PO), JSON at any read chunk size"""
+    from gui import UniversalFileEditor
+    rnd = random.Random(30)
+    failures = []
+    for _ in range(cases):
+        doc = {'root': sample_doc(rnd)}
+        text = json.dumps(doc, ensure_ascii=rnd.random() < 0.5)
+        expected = list(UniversalFileEditor.dict_rows(json.loads(text)))
+        if list(iter_json_rows(io.StringIO(text), rnd.choice((1, 7, 64, 65536)))) != expected:
+            failures.append(f"json: {text!r}")
+        text = yaml.dump({'root': sample_doc(rnd, int_keys=True)}, allow_unicode=True, default_flow_style=rnd.random() < 0.3)
+        try:
+            rows = list(iter_yaml_rows(io.StringIO(text)))
+        except StreamFallback:  # the editor parses these in full
+            continue
+        if rows != list(UniversalFileEditor.dict_rows(yaml.load(text, Loader=YamlLoader))):
+            failures.append(f"yaml: {text!r}")
+    for _ in range(cases):
+        po = polib.POFile()
+        for i in range(rnd.randint(1, 5)):
+            entry = polib.POEntry(msgid=rnd.choice(['', 'id', 'سلام', 'two\nlines', 'say "hi"']) + str(i),
+                                  msgstr=rnd.choice(['', 'str', 'دنیا', 'a\tb\nc', 'x' * 90]),
+                                  comment=rnd.choice(['', 'note', 'one\ntwo']), obsolete=rnd.random() < 0.2)
+            if rnd.random() < 0.3:
+                entry.flags.append('fuzzy')
+            po.append(entry)
+        text = str(po)
+        expected = [(e.msgid, e.msgstr, e.comment or '', 'fuzzy' in e.flags) for e in polib.pofile(text)]
+        if list(iter_po_rows(io.StringIO(text))) != expected:
+            failures.append(f"po: {text!r}")
+    return failures
+
+def longest_match_replace(text, terms):
+    """Reference for Glossary.apply: scan left to right, replacing the longest term at each position"""
+    out, i = [], 0
+    while i < len(text):
+        term = max((t for t in terms if text.startswith(t, i)), key=len, default=None)
+        if term:
+            out.append(terms[term])
+            i += len(term)
+        else:
+            out.append(text[i])
+            i += 1
+    return ''.join(out)
+
+def check_glossary(cases=2000):
+    """Glossary.apply (one trie regex) == the brute-force longest match scan"""
+    rnd = random.Random(32)
+    alphabet = 'abس.*(\\'  # regex metacharacters must match literally
+    failures = []
+    for _ in range(cases):
+        terms = {''.join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 4))): str(i) for i in range(rnd.randint(1, 8))}
+        text = ''.join(rnd.choice(alphabet + ' ') for _ in range(rnd.randint(0, 30)))
+        if Glossary(terms).apply(text) != longest_match_replace(text, terms):
+            failures.append(f"{terms!r} on {text!r}")
+    return failures
+
+def check_stats(cases=2000):
+    """TextStats.update after random edits == TextStats of the edited text, and Persian and
+    Arabic-Indic digits counted as digits"""
+    rnd = random.Random(26)
+    parts = ['سلام', 'hi', '۱۲۳', '١٢٣', '45', ' ', '\n', '\t', '  ', 'ـ']
+    failures = []
+    digits = TextStats('۱۲۳ ١٢٣ 123').scripts()['digits']
+    if digits != 9:
+        failures.append(f"digits miscounted: {digits} of 9")
+    text = ''
+    stats = TextStats(text)
+    for _ in range(cases):
+        pos = rnd.randint(0, len(text))
+        removed = rnd.randint(0, min(5, len(text) - pos))
+        insert = ''.join(rnd.choice(parts) for _ in range(rnd.randint(0, 3)))
+        edited = text[:pos] + insert + text[pos + removed:]
+        stats.update(text, edited, pos, removed, len(insert))
+        full = TextStats(edited)
+        if (+stats.counts, stats.chars, stats.words, stats.lines, stats.scripts()) != (full.counts, full.chars, full.words, full.lines, full.scripts()):
+            failures.append(f"update differs: {text!r} -> {edited!r}")
+            stats = full
+        text = edited
+    return failures
+
+def check_db_threads(threads=8, ops=150):
+    """One DatabaseManager shared by threads mixing reads, single writes and bulk writes:
+    no call fails, each thread reads its own last write back, bulk writes land whole"""
+    db = DatabaseManager(os.path.join(tempfile.mkdtemp(), 'threads.db'))
+    failures, barrier = [], threading.Barrier(threads)
+    written = [0] * threads
+
+    def worker(n):
+        rnd = random.Random(n)
+        barrier.wait()
+        try:
+            for i in range(ops):
+                op = rnd.random()
+                if op < 0.4:
+                    db.get_history(10)
+                    db.get_exception_patterns()
+                elif op < 0.6:
+                    db.add_history(f"in {n}.{i}", f"out {n}.{i}")
+                elif op < 0.7:
+                    db.set(f"check_{n}", i)
+                    if db.get(f"check_{n}") != str(i):
+                        failures.append(f"thread {n}: lost setting write")
+                elif op < 0.8:
+                    if not db.add_exceptions([(f"x{n}_{i}_{k}", '') for k in range(10)]):
+                        failures.append(f"thread {n}: exceptions write failed")
+                elif db.add_favorites([f"fav {n}.{i}.{k}" for k in range(20)]):
+                    written[n] += 20
+                else:
+                    failures.append(f"thread {n}: favorites write failed")
+        except Exception as e:
+            failures.append(f"thread {n}: {e!r}")
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    exceptions = len(db.get_exceptions(False))
+    favorites = db.query_one('SELECT COUNT(*) FROM favorites')[0]
+    if exceptions % 10 or favorites != sum(written):
+        failures.append(f"partial bulk write: {favorites} of {sum(written)} favorites, {exceptions} exceptions")
+    db.close()
+    return failures
+
+CHECKS = {'parallel_chunks': check_parallel_chunks, 'stream_rows': check_stream_rows, 'glossary': check_glossary, 'pipeline_shape': check_pipeline_shape, 'csv_passthrough': check_csv_passthrough, 'stats': check_stats,
+          'db_threads': check_db_threads}
+
+def main():
+    parser = argparse.ArgumentParser(description='Harfnegar equivalence checks')
+    parser.add_argument('names', nargs='*', help='Checks to run: ' + ', '.join(CHECKS))
+    args = parser.parse_args()
+    failed = False
+    for name in args.names or CHECKS:
+        if name not in CHECKS:
+            parser.error(f"Unknown check: {name}")
+        failures = CHECKS[name]()
+        print(f"{name}: {'FAIL' if failures else 'ok'}" + (f" ({len(failures)} cases)" if failures else ''))
+        for failure in failures[:5]:
+            print('  ' + failure)
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
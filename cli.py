@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Harfnegar CLI v1.4.2"""
-import sys, argparse
+import sys, io, os, argparse
 from text_processor import TextProcessor
 from database_manager import DatabaseManager
+from pipeline import Pipeline
+from glossary import Glossary
+from normalizer import Normalizer
+from batch import BatchProcessor
+from watcher import Watcher
+from docx_processor import DocxProcessor
+from subtitle_processor import SubtitleProcessor, SUBTITLE_EXTS
+from csv_processor import CsvProcessor, CSV_EXTS
+from translation_memory import TranslationMemory
 
 def main():
     parser = argparse.ArgumentParser(description='Harfnegar - Text Processor')
@@ -13,9 +22,26 @@ def main():
     parser.add_argument('--no-exceptions', action='store_true', help='Disable exceptions')
     parser.add_argument('--add-exception', help='Add exception pattern')
     parser.add_argument('--list-exceptions', action='store_true', help='List exceptions')
+    parser.add_argument('--glossary', metavar='FILE', help='Apply term replacements from a .tsv/.csv/.json/.po glossary')
+    parser.add_argument('--use-glossary', action='store_true', help='Apply the glossary stored in the database')
+    parser.add_argument('--import-glossary', metavar='FILE', help='Import a glossary file into the database')
+    parser.add_argument('--normalize', metavar='PROFILE', choices=Normalizer.profiles(), help='Normalize before processing (off unless given; the GUI setting is not used): ' + ', '.join(Normalizer.profiles()))
+    parser.add_argument('--normalize-stats', action='store_true', help='Report how many distinct input lines normalization collapses')
+    parser.add_argument('--pipeline', help='Stages or preset name, e.g. spaces,replace:OLD=NEW,shape,number,reverse; --glossary/--use-glossary terms are replaced first')
+    parser.add_argument('--save-pipeline', metavar='NAME', help='Save --pipeline as a named preset')
+    parser.add_argument('--list-pipelines', action='store_true', help='List pipeline presets')
+    parser.add_argument('--vacuum', action='store_true', help='Compact the database: drop unused history/favorites texts, recompress, rebuild the file')
+    parser.add_argument('--columns', help='CSV/TSV columns to shape, by name or index (default: all)')
+    parser.add_argument('--no-header', action='store_true', help='CSV/TSV input has no header row')
+    parser.add_argument('--batch', nargs='+', metavar='PATH', help='Process files, directories and .zip/.tar.gz archives into the -o directory, skipping unchanged files')
+    parser.add_argument('--force', action='store_true', help='With --batch, reprocess every file')
+    parser.add_argument('--no-memory', action='store_true', help='With --batch, do not reuse or record translation-memory entries')
+    parser.add_argument('--watch', action='store_true', help='With --batch, keep running and reprocess files as they change')
     parser.add_argument('--version', action='version', version='1.4.2')
     
     args = parser.parse_args()
+    if args.watch and not args.batch:
+        parser.error('--watch requires --batch')
     db = DatabaseManager()
     
     if args.list_exceptions:
@@ -35,6 +61,65 @@ def main():
             print(f"Added: {args.add_exception}")
         return
     
+    if args.import_glossary:
+        pairs = Glossary.read_pairs(args.import_glossary)
+        if db.add_glossary_terms(pairs):
+            print(f"Imported {len(pairs)} terms")
+        return
+    
+    if args.vacuum:
+        before, after = db.vacuum()
+        print(f"Database: {before / 1_000_000:.2f} MB -> {after / 1_000_000:.2f} MB")
+        db.close()
+        return
+    
+    if args.list_pipelines:
+        pipelines = db.get_pipelines()
+        for name, stages in pipelines:
+            print(f"{name}: {stages}")
+        if not pipelines:
+            print("No pipelines")
+        return
+    
+    if args.batch:
+        if not args.output:
+            parser.error('--batch needs an output directory: -o DIR')
+        run_batch(args, db)
+        db.close()
+        return
+    
+    if args.pipeline:
+        spec = ','.join(db.get_pipeline(part.strip()) or part for part in args.pipeline.split(','))  # expand presets
+        try:
+            Pipeline.parse(spec)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.normalize and not any(name == 'normalize' for name, _ in Pipeline.parse(spec)):
+            spec = f"normalize,{spec}"
+        if args.save_pipeline:
+            db.save_pipeline(args.save_pipeline, spec)
+            print(f"Saved pipeline: {args.save_pipeline}", file=sys.stderr)  # stdout carries the pipeline output
+            if not args.input and sys.stdin.isatty():
+                return
+        run_pipeline(args, spec, db)
+        db.close()
+        return
+    
+    if args.file and args.input and os.path.splitext(args.input)[1].lower() in CSV_EXTS:
+        run_csv(args, db)
+        db.close()
+        return
+    
+    if args.file and args.input and os.path.splitext(args.input)[1].lower() in SUBTITLE_EXTS:
+        run_subtitles(args, db)
+        db.close()
+        return
+    
+    if args.file and args.input and args.output and args.input.lower().endswith('.docx') and args.output.lower().endswith('.docx'):
+        run_docx(args, db)
+        db.close()
+        return
+    
     if not args.input:
         if not sys.stdin.isatty():
             text = sys.stdin.read()
@@ -46,7 +131,18 @@ def main():
     else:
         text = args.input
     
+    profile = args.normalize or ''
+    if args.normalize_stats:
+        stats = Normalizer.collapse_stats(text.split('\n'), profile or 'persian')
+        print(f"Lines: {stats['total']}  Distinct: {stats['distinct']}  "
+              f"After normalization: {stats['distinct_normalized']}  Collapsed: {stats['collapsed']}")
+        db.close()
+        return
+    text = Normalizer.normalize(text, profile)  # before glossary and exception matching
     exceptions = [] if args.no_exceptions else db.get_exception_patterns()
+    glossary = load_glossary(args, db)  # one merged pass, as in every other path
+    if glossary:
+        text = glossary.apply(text)
     result = TextProcessor.encode_text(text, exceptions)
     
     if args.output:
@@ -58,5 +154,82 @@ def main():
     
     db.close()
 
+def load_glossary(args, db):
+    if not (args.glossary or args.use_glossary):
+        return None
+    pairs = list(db.get_glossary()) if args.use_glossary else []
+    if args.glossary:
+        pairs += Glossary.read_pairs(args.glossary)
+    return Glossary(pairs)
+
+def run_docx(args, db):
+    """Shape a .docx into a new .docx, keeping formatting"""
+    processor = DocxProcessor([] if args.no_exceptions else db.get_exception_patterns(),
+                              args.normalize or '', load_glossary(args, db))
+    stats = processor.process(args.input, args.output)
+    print(f"Saved to {args.output} ({stats['shaped']}/{stats['runs']} runs shaped)")
+
+def run_subtitles(args, db):
+    """Shape cue text only, writing output as cues are read"""
+    processor = SubtitleProcessor([] if args.no_exceptions else db.get_exception_patterns(),
+                                  args.normalize or '', load_glossary(args, db))
+    if args.output:
+        stats = processor.process_file(args.input, args.output)
+        print(f"Saved to {args.output} ({stats['cues']} cues)")
+    else:
+        with open(args.input, 'r', encoding='utf-8', newline='') as fp:
+            processor.process(fp, sys.stdout)
+
+def run_csv(args, db):
+    """Shape selected columns row by row, leaving delimiters, quoting and other columns alone"""
+    processor = CsvProcessor(CsvProcessor.parse_columns(args.columns),
+                             [] if args.no_exceptions else db.get_exception_patterns(),
+                             args.normalize or '', load_glossary(args, db), not args.no_header)
+    try:
+        if args.output:
+            stats = processor.process_file(args.input, args.output)
+            print(f"Saved to {args.output} ({stats['rows']} rows, {stats['shaped']} distinct values shaped)")
+        else:
+            fp, delimiter, terminator = processor.open_csv(args.input)
+            with fp:
+                processor.process(fp, sys.stdout, delimiter, terminator)
+    except ValueError as e:
+        print(f"Error: {e}")
+
+def run_batch(args, db):
+    glossary = load_glossary(args, db)
+    batch = BatchProcessor(db, [] if args.no_exceptions else db.get_exception_patterns(),
+                           args.normalize or '', glossary, args.force,
+                           None if args.no_memory else TranslationMemory(db))
+    stats = batch.run(args.batch, args.output, log=print)
+    print(f"Processed: {stats['processed']}  Skipped: {stats['skipped']}  Failed: {stats['failed']}")
+    print(f"Time: {stats['seconds']:.2f}s  Saved: ~{stats['saved']:.2f}s")
+    if args.watch:
+        Watcher(batch, args.batch, args.output).run()
+
+def run_pipeline(args, spec, db):
+    """Stream input line by line through the pipeline into a single output"""
+    exceptions = [] if args.no_exceptions else db.get_exception_patterns()
+    pipeline = Pipeline(spec, exceptions, args.normalize or 'persian', load_glossary(args, db))
+    text_exts = ('.txt', '.text', '.md', '.csv', '.po', '.json', '.yaml', '.yml', '.xml')
+    
+    if not args.input:
+        source = sys.stdin
+    elif args.file and os.path.splitext(args.input)[1].lower() in text_exts:
+        source = open(args.input, 'r', encoding='utf-8')
+    elif args.file:
+        source = io.StringIO(TextProcessor.read_file(args.input))
+    else:
+        source = io.StringIO(args.input)
+    
+    with source:
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                pipeline.run(source, f)
+            print(f"Saved to {args.output}")
+        else:
+            pipeline.run(source, sys.stdout)
+            sys.stdout.write('\n')
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar CSV Processor v1.4.2 - Column-selective streaming for CSV/TSV
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import csv, io, re, itertools
+from text_processor import TextProcessor
+from normalizer import Normalizer
+
+CSV_EXTS = ('.csv', '.tsv')
+RTL_CHARS = re.compile('[؀-ۿﭐ-﷿ﹰ-﻿]')
+
+def records(fp, delimiter):
+    """(row, raw text) per record; the raw text is what the record was read from,
+    line terminator included"""
+    raw = []
+    def lines():
+        for line in fp:
+            raw.append(line)
+            yield line
+    for row in csv.reader(lines(), delimiter=delimiter):
+        text = ''.join(raw)
+        raw.clear()
+        yield row, text
+
+def split_raw(text, delimiter, quote='"'):
+    """Raw fields of one record (quotes kept) and its line terminator"""
+    body = text.rstrip('\r\n')
+    terminator = text[len(body):]
+    if quote not in body:
+        return body.split(delimiter), terminator
+    fields, start, quoted = [], 0, False
+    for i, c in enumerate(body):
+        if c == quote:
+            quoted = not quoted
+        elif c == delimiter and not quoted:
+            fields.append(body[start:i])
+            start = i + 1
+    fields.append(body[start:])
+    return fields, terminator
+
+class CsvProcessor:
+    """Streams rows through the csv module and shapes only the chosen columns.
+    Rows are handled in batches; each distinct cell value is shaped once. Output keeps
+    the input's text for every row and cell that was not shaped, quoting included."""
+    BATCH_ROWS = 1000
+    CACHE_SIZE = 100_000
+
+    def __init__(self, columns=None, exceptions=None, profile='', glossary=None, header=True):
+        self.columns = columns  # names and/or indexes; None: every column
+        self.exceptions = exceptions or []
+        self.profile = profile
+        self.glossary = glossary
+        self.header = header
+        self.cache = {}
+        self.stats = {'rows': 0, 'cells': 0, 'shaped': 0, 'cache_hits': 0}
+
+    @staticmethod
+    def parse_columns(spec):
+        """'name,2,Title' -> ['name', '2', 'Title']; resolve() decides what '2' refers to"""
+        if not spec:
+            return None
+        return [c.strip() for c in spec.split(',') if c.strip()]
+
+    @staticmethod
+    def delimiter(path, sample=''):
+        if path.lower().endswith('.tsv'):
+            return '\t'
+        try:
+            return csv.Sniffer().sniff(sample, ',;\t|').delimiter
+        except:
+            return ','
+
+    @staticmethod
+    def encoding(path):
+        """'utf-8-sig' for files that start with a BOM, so writing keeps it (Excel needs it to
+        read UTF-8), else 'utf-8'"""
+        try:
+            with open(path, 'rb') as f:
+                return 'utf-8-sig' if f.read(3) == b'\xef\xbb\xbf' else 'utf-8'
+        except:
+            return 'utf-8'
+
+    @staticmethod
+    def open_csv(path):
+        """(file, delimiter, line terminator), sniffed from the first 8 KB"""
+        fp = open(path, 'r', encoding='utf-8-sig', newline='')
+        sample = fp.read(8192)
+        fp.seek(0)
+        terminator = '\r\n' if '\r\n' in sample else '\n'
+        return fp, CsvProcessor.delimiter(path, sample), terminator
+
+    @staticmethod
+    def read_header(path):
+        fp, delimiter, terminator = CsvProcessor.open_csv(path)
+        with fp:
+            return next(csv.reader(fp, delimiter=delimiter), []), delimiter, terminator
+
+    def resolve(self, header):
+        """Column indexes to shape; a header name wins over an index written the same way.
+        Unknown names raise ValueError."""
+        if self.columns is None:
+            return None
+        indexes = []
+        for col in self.columns:
+            if isinstance(col, int):
+                indexes.append(col)
+            elif header and col in header:
+                indexes.append(header.index(col))
+            elif col.isdigit():
+                indexes.append(int(col))
+            else:
+                raise ValueError(f"Unknown column: {col}")
+        return sorted(set(indexes))
+
+    def shape_text(self, value):
+        text = Normalizer.normalize(value, self.profile)
+        if self.glossary:
+            text = self.glossary.apply(text)
+        return TextProcessor.encode_text(text, self.exceptions)
+
+    def shape_batch(self, rows, indexes):
+        """Shape the selected cells of a batch in place, one call per distinct new value"""
+        cache = self.cache
+        cells = []
+        for row in rows:
+            for i in (range(len(row)) if indexes is None else indexes):
+                if i < len(row) and row[i] and RTL_CHARS.search(row[i]):
+                    cells.append((row, i))
+        if len(cache) + len(cells) > self.CACHE_SIZE:
+            cache.clear()
+        for row, i in cells:
+            value = row[i]
+            if value in cache:
+                self.stats['cache_hits'] += 1
+            else:
+                cache[value] = self.shape_text(value)
+                self.stats['shaped'] += 1
+            row[i] = cache[value]
+        self.stats['cells'] += len(cells)
+
+    def iter_rows(self, reader):
+        """Yield (row, original row or None when unchanged, raw text) for (row, raw) records
+        with the selected columns shaped; the header passes through"""
+        header = next(reader, None) if self.header else None
+        indexes = self.resolve(header[0] if header else None)
+        if header is not None:
+            yield header[0], None, header[1]
+        while True:
+            batch = list(itertools.islice(reader, self.BATCH_ROWS))
+            if not batch:
+                return
+            originals = [list(row) for row, raw in batch]
+            self.shape_batch([row for row, raw in batch], indexes)
+            self.stats['rows'] += len(batch)
+            for (row, raw), original in zip(batch, originals):
+                yield row, (original if row != original else None), raw
+
+    @staticmethod
+    def quote(value, delimiter, quoted):
+        if quoted or any(c in value for c in (delimiter, '"', '\r', '\n')):
+            return '"' + value.replace('"', '""') + '"'
+        return value
+
+    def process(self, fp, out, delimiter=',', terminator='\n'):
+        """Unchanged records are written as they were read; in changed ones only the shaped
+        cells are re-encoded, quoted if they were quoted before (or need it)"""
+        writer = csv.writer(out, delimiter=delimiter, lineterminator=terminator)
+        for row, original, raw in self.iter_rows(records(fp, delimiter)):
+            if original is None:
+                out.write(raw)
+                continue
+            fields, ending = split_raw(raw, delimiter)
+            if len(fields) != len(row):  # a dialect quirk split_raw does not model
+                writer.writerow(row)
+                continue
+            out.write(delimiter.join(field if value == old else self.quote(value, delimiter, field.startswith('"'))
+                                     for field, value, old in zip(fields, row, original)) + ending)
+        return self.stats
+
+    def process_file(self, src, dst=None):
+        """Stream src into dst, or return the result as a string when dst is None"""
+        fp, delimiter, terminator = self.open_csv(src)
+        with fp:
+            if dst is None:
+                out = io.StringIO()
+                self.process(fp, out, delimiter, terminator)
+                return out.getvalue()
+            with open(dst, 'w', encoding=self.encoding(src), newline='') as out:
+                return self.process(fp, out, delimiter, terminator)
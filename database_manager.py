@@ -1,43 +1,169 @@
 # -*- coding: utf-8 -*-
 """Harfnegar Database v1.4.2"""
-import sqlite3, json
+import sqlite3, json, threading, hashlib, zlib, os, time
+from collections import Counter
+from contextlib import contextmanager
 
 class DatabaseManager:
+    """One SQLite connection per thread (WAL, so readers never wait for the writer)
+    and a single lock that serializes writes across threads. Connections are keyed by
+    thread ident rather than kept in a threading.local: Qt pool threads lose their
+    Python thread state after every job, which would open a new connection each time."""
     DB_FILE = "harfnegar.dontdeleteme"
+    CACHED_STATEMENTS = 256  # per connection; all SQL below is constant, so each statement is prepared once
+    BUSY_TIMEOUT = 10.0
+    IDLE_CLOSE = 300  # seconds; connections unused this long (e.g. of expired threads) are closed
+    BLOB_MIN_COMPRESS = 512  # bytes; shorter texts are stored as is
+    BLOB_LEVEL = 1  # zlib level on write, fast enough for the UI thread
+    VACUUM_LEVEL = 9  # vacuum() recompresses at this level
+    BLOB_CACHE = 32_000_000  # characters of decoded texts kept for repeated get_history() calls
+    PDF_CACHE = 64_000_000  # characters of extracted PDF text; least recently opened files go first
     
-    def __init__(self):
-        self.conn = sqlite3.connect(self.DB_FILE)
-        self.cursor = self.conn.cursor()
+    def __init__(self, db_file=None):
+        self.db_file = db_file or self.DB_FILE
+        self.connections = {}  # thread ident -> [connection, last use]
+        self.connections_lock = threading.Lock()
+        self.write_lock = threading.RLock()
+        self.blob_cache = {}
+        self.blob_cache_size = 0
+        self.blob_lock = threading.Lock()  # blob_cache is filled from the UI and job threads alike
         self._create_tables()
         self._load_defaults()
     
+    def connect(self):
+        """This thread's connection, opened on first use. Opening one closes those left idle
+        for IDLE_CLOSE; an ident reused by a new thread simply takes over the old connection."""
+        entry = self.connections.get(threading.get_ident())
+        now = time.monotonic()
+        if entry is not None:
+            entry[1] = now
+            return entry[0]
+        conn = sqlite3.connect(self.db_file, timeout=self.BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=self.CACHED_STATEMENTS)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self.connections_lock:
+            for ident, (other, used) in list(self.connections.items()):
+                if now - used > self.IDLE_CLOSE:
+                    del self.connections[ident]
+                    try: other.close()
+                    except: pass
+            self.connections[threading.get_ident()] = [conn, now]
+        return conn
+    
+    @property
+    def conn(self):
+        return self.connect()
+    
+    def query(self, sql, params=()):
+        return self.connect().execute(sql, params).fetchall()
+    
+    def query_one(self, sql, params=()):
+        return self.connect().execute(sql, params).fetchone()
+    
+    @contextmanager
+    def writing(self):
+        """Serialized write transaction on this thread's connection; rolled back on error"""
+        with self.write_lock:
+            conn = self.connect()
+            try:
+                yield conn
+                conn.commit()
+            except:
+                conn.rollback()
+                raise
+    
+    def write(self, sql, params=()):
+        with self.writing() as conn:
+            conn.execute(sql, params)
+    
+    def write_many(self, sql, rows):
+        with self.writing() as conn:
+            conn.executemany(sql, rows)
+    
     def _create_tables(self):
-        self.cursor.execute('CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)')
-        self.cursor.execute('CREATE TABLE IF NOT EXISTS custom_languages (code TEXT PRIMARY KEY, name TEXT, translations TEXT)')
-        self.cursor.execute('CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, input TEXT, output TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)')
-        self.cursor.execute('CREATE TABLE IF NOT EXISTS favorites (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)')
-        self.cursor.execute('CREATE TABLE IF NOT EXISTS exceptions (id INTEGER PRIMARY KEY AUTOINCREMENT, pattern TEXT UNIQUE, description TEXT, enabled INTEGER DEFAULT 1)')
-        self.conn.commit()
+        with self.writing() as conn:
+            conn.execute('BEGIN')  # sqlite3 leaves DDL in autocommit; renames and copies must land together
+            conn.execute('CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS custom_languages (code TEXT PRIMARY KEY, name TEXT, translations TEXT, hash TEXT)')
+            self._add_language_hash(conn)
+            conn.execute('CREATE TABLE IF NOT EXISTS blobs (hash BLOB PRIMARY KEY, size INTEGER, level INTEGER, data BLOB)')
+            legacy = self._rename_inline_tables(conn)
+            conn.execute('CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, input_hash BLOB, output_hash BLOB, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)')
+            conn.execute('CREATE TABLE IF NOT EXISTS favorites (id INTEGER PRIMARY KEY AUTOINCREMENT, text_hash BLOB, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)')
+            conn.execute('CREATE INDEX IF NOT EXISTS favorites_text ON favorites (text_hash)')
+            self._migrate_inline_tables(conn, legacy)
+            conn.execute('CREATE TABLE IF NOT EXISTS exceptions (id INTEGER PRIMARY KEY AUTOINCREMENT, pattern TEXT UNIQUE, description TEXT, enabled INTEGER DEFAULT 1)')
+            conn.execute('CREATE TABLE IF NOT EXISTS pipelines (name TEXT PRIMARY KEY, stages TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS glossary (find TEXT PRIMARY KEY, replace TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS pdf_files (hash TEXT PRIMARY KEY, pages INTEGER, chars INTEGER DEFAULT 0, used REAL DEFAULT 0)')
+            conn.execute('CREATE TABLE IF NOT EXISTS pdf_pages (hash TEXT, page INTEGER, text TEXT, PRIMARY KEY (hash, page))')
+            self._add_pdf_usage(conn)
+            conn.execute('CREATE TABLE IF NOT EXISTS batch_manifest (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, hash TEXT, config TEXT, engine TEXT, output TEXT, seconds REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS tm_entries (id INTEGER PRIMARY KEY AUTOINCREMENT, digest TEXT UNIQUE, source TEXT, target TEXT, config TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)')
+            conn.execute('CREATE INDEX IF NOT EXISTS tm_entries_age ON tm_entries (timestamp, id)')
+            conn.execute('CREATE TABLE IF NOT EXISTS tm_bands (key INTEGER, entry INTEGER, PRIMARY KEY (key, entry)) WITHOUT ROWID')
+        if legacy:
+            self.vacuum()
+    
+    @staticmethod
+    def _rename_inline_tables(conn):
+        """Tables of older versions that keep history/favorites texts inline, renamed out of the
+        way; a *_inline table left by an interrupted migration is picked up as well"""
+        legacy = []
+        for table, column in (('history', 'input'), ('favorites', 'text')):
+            if column in [r[1] for r in conn.execute(f'PRAGMA table_info({table})')]:
+                conn.execute(f'ALTER TABLE {table} RENAME TO {table}_inline')
+                legacy.append(table)
+            elif conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f'{table}_inline',)).fetchone():
+                legacy.append(table)
+        return legacy
+    
+    def _migrate_inline_tables(self, conn, legacy):
+        """Move inline texts into blobs, keeping row ids and timestamps"""
+        if 'history' in legacy:
+            for row_id, input_text, output_text, timestamp in conn.execute('SELECT id, input, output, timestamp FROM history_inline').fetchall():
+                conn.execute('INSERT OR IGNORE INTO history (id, input_hash, output_hash, timestamp) VALUES (?, ?, ?, ?)',
+                             (row_id, *self.put_blobs(conn, [input_text, output_text]), timestamp))
+            conn.execute('DROP TABLE history_inline')
+        if 'favorites' in legacy:
+            for row_id, text, timestamp in conn.execute('SELECT id, text, timestamp FROM favorites_inline').fetchall():
+                conn.execute('INSERT OR IGNORE INTO favorites (id, text_hash, timestamp) VALUES (?, ?, ?)',
+                             (row_id, *self.put_blobs(conn, [text]), timestamp))
+            conn.execute('DROP TABLE favorites_inline')
+    
+    @staticmethod
+    def _add_language_hash(conn):
+        """Hash column for custom languages stored before the .mo cache compared it"""
+        if 'hash' not in [r[1] for r in conn.execute('PRAGMA table_info(custom_languages)')]:
+            conn.execute('ALTER TABLE custom_languages ADD COLUMN hash TEXT')
+            for code, translations in conn.execute('SELECT code, translations FROM custom_languages').fetchall():
+                conn.execute('UPDATE custom_languages SET hash = ? WHERE code = ?',
+                             (hashlib.sha1((translations or '').encode('utf-8')).hexdigest(), code))
+    
+    @staticmethod
+    def _add_pdf_usage(conn):
+        """Size and last use per cached PDF, for tables created before the cache was capped"""
+        if 'chars' not in [r[1] for r in conn.execute('PRAGMA table_info(pdf_files)')]:
+            conn.execute('ALTER TABLE pdf_files ADD COLUMN chars INTEGER DEFAULT 0')
+            conn.execute('ALTER TABLE pdf_files ADD COLUMN used REAL DEFAULT 0')
+            conn.execute('UPDATE pdf_files SET chars = (SELECT COALESCE(SUM(LENGTH(text)), 0) FROM pdf_pages WHERE pdf_pages.hash = pdf_files.hash)')
     
     def _load_defaults(self):
         defaults = {
             'language': 'en', 'auto_copy': 'true', 'always_on_top': 'false',
             'quick_mode': 'true', 'font_family': 'Segoe UI', 'font_size': '11',
             'window_width': '1200', 'window_height': '800', 'theme': 'light',
-            'auto_save': 'true'
+            'auto_save': 'true', 'normalize_profile': ''
         }
-        for k, v in defaults.items():
-            self.cursor.execute('INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)', (k, v))
-        self.conn.commit()
+        self.write_many('INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)', defaults.items())
     
     def get(self, key, default=''):
-        self.cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
-        r = self.cursor.fetchone()
+        r = self.query_one('SELECT value FROM settings WHERE key = ?', (key,))
         return r[0] if r else default
     
     def set(self, key, value):
-        self.cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, str(value)))
-        self.conn.commit()
+        self.write('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, str(value)))
     
     def get_bool(self, key, default=False):
         return self.get(key, str(default).lower()).lower() == 'true'
@@ -48,63 +174,195 @@ class DatabaseManager:
     
     def add_custom_language(self, code, name, translations):
         try:
-            self.cursor.execute('INSERT OR REPLACE INTO custom_languages (code, name, translations) VALUES (?, ?, ?)',
-                              (code, name, json.dumps(translations, ensure_ascii=False)))
-            self.conn.commit()
+            data = json.dumps(translations, ensure_ascii=False)
+            self.write('INSERT OR REPLACE INTO custom_languages (code, name, translations, hash) VALUES (?, ?, ?, ?)',
+                       (code, name, data, hashlib.sha1(data.encode('utf-8')).hexdigest()))
             return True
         except: return False
     
     def get_custom_languages(self):
-        self.cursor.execute('SELECT code, name, translations FROM custom_languages')
         results = []
-        for row in self.cursor.fetchall():
+        for row in self.query('SELECT code, name, translations FROM custom_languages'):
             try:
                 results.append({'code': row[0], 'name': row[1], 'translations': json.loads(row[2])})
             except: continue
         return results
     
+    def get_custom_language(self, code):
+        """Translations of one custom language, or None"""
+        try:
+            r = self.query_one('SELECT translations FROM custom_languages WHERE code = ?', (code,))
+            return json.loads(r[0]) if r else None
+        except:
+            return None
+    
+    def get_custom_language_hash(self, code):
+        """SHA-1 of the stored translations, kept up to date on write; None when there is no such row"""
+        try:
+            r = self.query_one('SELECT hash FROM custom_languages WHERE code = ?', (code,))
+            return (r[0] or '') if r else None
+        except:
+            return None
+    
+    def get_custom_language_codes(self):
+        try:
+            return [r[0] for r in self.query('SELECT code FROM custom_languages ORDER BY code')]
+        except:
+            return []
+    
+    HISTORY_LIMIT = 100
+    
     def add_history(self, input_text, output_text):
+        self.add_history_many([(input_text, output_text)])
+    
+    def add_history_many(self, pairs):
+        """Insert (input, output) pairs in one transaction, then trim to HISTORY_LIMIT"""
         try:
-            self.cursor.execute('INSERT INTO history (input, output) VALUES (?, ?)', (input_text, output_text))
-            self.conn.commit()
-            self.cursor.execute('DELETE FROM history WHERE id NOT IN (SELECT id FROM history ORDER BY id DESC LIMIT 100)')
-            self.conn.commit()
+            with self.writing() as conn:
+                conn.executemany('INSERT INTO history (input_hash, output_hash) VALUES (?, ?)',
+                                 [self.put_blobs(conn, pair) for pair in pairs])
+                dropped = conn.execute('SELECT input_hash, output_hash FROM history WHERE id NOT IN '
+                                       '(SELECT id FROM history ORDER BY id DESC LIMIT ?)', (self.HISTORY_LIMIT,)).fetchall()
+                if dropped:
+                    conn.execute('DELETE FROM history WHERE id NOT IN (SELECT id FROM history ORDER BY id DESC LIMIT ?)', (self.HISTORY_LIMIT,))
+                    self.drop_blobs(conn, {key for row in dropped for key in row})
         except: pass
     
     def get_history(self, limit=10):
         try:
-            self.cursor.execute('SELECT input, output, timestamp FROM history ORDER BY id DESC LIMIT ?', (limit,))
-            return self.cursor.fetchall()
+            rows = self.query('SELECT input_hash, output_hash, timestamp FROM history ORDER BY id DESC LIMIT ?', (limit,))
+            texts = self.get_blobs([key for row in rows for key in row[:2]])
+            return [(texts.get(i), texts.get(o), ts) for i, o, ts in rows]
         except:
             return []
     
     def add_favorite(self, text):
+        return self.add_favorites([text])
+    
+    def add_favorites(self, texts):
         try:
-            self.cursor.execute('INSERT INTO favorites (text) VALUES (?)', (text,))
-            self.conn.commit()
+            with self.writing() as conn:
+                conn.executemany('INSERT INTO favorites (text_hash) VALUES (?)', [self.put_blobs(conn, [text]) for text in texts])
             return True
         except:
             return False
     
     def get_favorites(self):
         try:
-            self.cursor.execute('SELECT id, text, timestamp FROM favorites ORDER BY id DESC')
-            return self.cursor.fetchall()
+            rows = self.query('SELECT id, text_hash, timestamp FROM favorites ORDER BY id DESC')
+            texts = self.get_blobs([row[1] for row in rows])
+            return [(fav_id, texts.get(key), ts) for fav_id, key, ts in rows]
         except:
             return []
     
     def delete_favorite(self, fav_id):
         try:
-            self.cursor.execute('DELETE FROM favorites WHERE id = ?', (fav_id,))
-            self.conn.commit()
+            with self.writing() as conn:
+                r = conn.execute('SELECT text_hash FROM favorites WHERE id = ?', (fav_id,)).fetchone()
+                conn.execute('DELETE FROM favorites WHERE id = ?', (fav_id,))
+                if r:
+                    self.drop_blobs(conn, {r[0]})
             return True
         except:
             return False
     
+    # History and favorites texts live in blobs, keyed by SHA-1 and stored once however often
+    # they recur; bodies of BLOB_MIN_COMPRESS bytes or more are zlib-compressed
+    def put_blobs(self, conn, texts):
+        """Keys of texts (None stays None), storing the ones not seen before"""
+        keys = []
+        for text in texts:
+            if text is None:
+                keys.append(None)
+                continue
+            data = text.encode('utf-8')
+            key = hashlib.sha1(data).digest()
+            if not conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (key,)).fetchone():
+                conn.execute('INSERT INTO blobs (hash, size, level, data) VALUES (?, ?, ?, ?)',
+                             (key, len(data), *self.pack_blob(data, self.BLOB_LEVEL)))
+            self.cache_blob(key, text)
+            keys.append(key)
+        return keys
+    
+    def get_blobs(self, keys):
+        """{key: text}, decoding only the blobs not in blob_cache"""
+        texts = {}
+        for key in keys:
+            if key is None or key in texts:
+                continue
+            text = self.blob_cache.get(key)
+            if text is None:
+                r = self.query_one('SELECT data, level FROM blobs WHERE hash = ?', (key,))
+                if r is None:
+                    continue
+                text = self.unpack_blob(*r)
+                self.cache_blob(key, text)
+            texts[key] = text
+        return texts
+    
+    def cache_blob(self, key, text):
+        with self.blob_lock:
+            if key in self.blob_cache:
+                return
+            if self.blob_cache_size + len(text) > self.BLOB_CACHE:
+                self.blob_cache.clear()
+                self.blob_cache_size = 0
+            if len(text) <= self.BLOB_CACHE:
+                self.blob_cache[key] = text
+                self.blob_cache_size += len(text)
+    
+    @classmethod
+    def pack_blob(cls, data, level):
+        """(level, data); level 0 means stored uncompressed"""
+        if len(data) >= cls.BLOB_MIN_COMPRESS:
+            packed = zlib.compress(data, level)
+            if len(packed) < len(data):
+                return level, packed
+        return 0, data
+    
+    @staticmethod
+    def unpack_blob(data, level):
+        return (zlib.decompress(data) if level else data).decode('utf-8')
+    
+    @staticmethod
+    def drop_blobs(conn, keys):
+        """Delete the given blobs unless a history or favorites row still uses them"""
+        conn.executemany('DELETE FROM blobs WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM history WHERE input_hash = blobs.hash OR output_hash = blobs.hash) '
+                         'AND NOT EXISTS (SELECT 1 FROM favorites WHERE text_hash = blobs.hash)', [(key,) for key in keys if key is not None])
+    
+    def file_size(self):
+        return sum(os.path.getsize(self.db_file + suffix) for suffix in ('', '-wal') if os.path.exists(self.db_file + suffix))
+    
+    def vacuum(self):
+        """Drop unreferenced blobs, recompress the rest at VACUUM_LEVEL and rebuild the file.
+        Returns (bytes before, bytes after), WAL included."""
+        before = self.file_size()
+        with self.writing() as conn:
+            conn.execute('DELETE FROM blobs WHERE hash NOT IN (SELECT input_hash FROM history WHERE input_hash IS NOT NULL '
+                         'UNION SELECT output_hash FROM history WHERE output_hash IS NOT NULL '
+                         'UNION SELECT text_hash FROM favorites WHERE text_hash IS NOT NULL)')
+            keys = [r[0] for r in conn.execute('SELECT hash FROM blobs WHERE size >= ? AND level < ?', (self.BLOB_MIN_COMPRESS, self.VACUUM_LEVEL))]
+            for key in keys:
+                data, level = conn.execute('SELECT data, level FROM blobs WHERE hash = ?', (key,)).fetchone()
+                level, packed = self.pack_blob(zlib.decompress(data) if level else data, self.VACUUM_LEVEL)
+                conn.execute('UPDATE blobs SET level = ?, data = ? WHERE hash = ?', (level, packed, key))
+        with self.write_lock:
+            conn = self.connect()
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return before, self.file_size()
+    
     def add_exception(self, pattern, description=''):
         try:
-            self.cursor.execute('INSERT INTO exceptions (pattern, description) VALUES (?, ?)', (pattern, description))
-            self.conn.commit()
+            self.write('INSERT INTO exceptions (pattern, description) VALUES (?, ?)', (pattern, description))
+            return True
+        except:
+            return False
+    
+    def add_exceptions(self, rows):
+        """Bulk insert of (pattern, description) rows; existing patterns are left as they are"""
+        try:
+            self.write_many('INSERT OR IGNORE INTO exceptions (pattern, description) VALUES (?, ?)', rows)
             return True
         except:
             return False
@@ -112,36 +370,220 @@ class DatabaseManager:
     def get_exceptions(self, enabled_only=True):
         try:
             if enabled_only:
-                self.cursor.execute('SELECT id, pattern, description, enabled FROM exceptions WHERE enabled = 1')
-            else:
-                self.cursor.execute('SELECT id, pattern, description, enabled FROM exceptions')
-            return self.cursor.fetchall()
+                return self.query('SELECT id, pattern, description, enabled FROM exceptions WHERE enabled = 1')
+            return self.query('SELECT id, pattern, description, enabled FROM exceptions')
         except:
             return []
     
     def get_exception_patterns(self):
         try:
-            self.cursor.execute('SELECT pattern FROM exceptions WHERE enabled = 1')
-            return [row[0] for row in self.cursor.fetchall()]
+            return [row[0] for row in self.query('SELECT pattern FROM exceptions WHERE enabled = 1')]
         except:
             return []
     
     def update_exception(self, exc_id, pattern, description, enabled):
         try:
-            self.cursor.execute('UPDATE exceptions SET pattern = ?, description = ?, enabled = ? WHERE id = ?',
-                              (pattern, description, enabled, exc_id))
-            self.conn.commit()
+            self.write('UPDATE exceptions SET pattern = ?, description = ?, enabled = ? WHERE id = ?',
+                       (pattern, description, enabled, exc_id))
             return True
         except:
             return False
     
     def delete_exception(self, exc_id):
         try:
-            self.cursor.execute('DELETE FROM exceptions WHERE id = ?', (exc_id,))
-            self.conn.commit()
+            self.write('DELETE FROM exceptions WHERE id = ?', (exc_id,))
+            return True
+        except:
+            return False
+    
+    def save_pipeline(self, name, stages):
+        try:
+            self.write('INSERT OR REPLACE INTO pipelines (name, stages) VALUES (?, ?)', (name, stages))
+            return True
+        except:
+            return False
+    
+    def get_pipeline(self, name):
+        try:
+            r = self.query_one('SELECT stages FROM pipelines WHERE name = ?', (name,))
+            return r[0] if r else None
+        except:
+            return None
+    
+    def get_pipelines(self):
+        try:
+            return self.query('SELECT name, stages FROM pipelines ORDER BY name')
+        except:
+            return []
+    
+    def delete_pipeline(self, name):
+        try:
+            self.write('DELETE FROM pipelines WHERE name = ?', (name,))
+            return True
+        except:
+            return False
+    
+    def add_glossary_terms(self, pairs):
+        try:
+            self.write_many('INSERT OR REPLACE INTO glossary (find, replace) VALUES (?, ?)', pairs)
+            return True
+        except:
+            return False
+    
+    def get_glossary(self):
+        try:
+            return self.query('SELECT find, replace FROM glossary')
+        except:
+            return []
+    
+    def clear_glossary(self):
+        try:
+            self.write('DELETE FROM glossary')
+            return True
+        except:
+            return False
+    
+    def get_manifest(self):
+        try:
+            rows = self.query('SELECT path, size, mtime, hash, config, engine, output, seconds FROM batch_manifest')
+            return {r[0]: r for r in rows}
+        except:
+            return {}
+    
+    def save_manifest(self, rows):
+        try:
+            self.write_many('INSERT OR REPLACE INTO batch_manifest (path, size, mtime, hash, config, engine, output, seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            return True
+        except:
+            return False
+    
+    def clear_manifest(self):
+        try:
+            self.write('DELETE FROM batch_manifest')
+            return True
+        except:
+            return False
+    
+    def get_pdf_pages(self, file_hash):
+        """(page count or None, {page: text}) cached for a PDF"""
+        try:
+            r = self.query_one('SELECT pages FROM pdf_files WHERE hash = ?', (file_hash,))
+            if not r:
+                return None, {}
+            self.write("UPDATE pdf_files SET used = julianday('now') WHERE hash = ?", (file_hash,))
+            return r[0], dict(self.query('SELECT page, text FROM pdf_pages WHERE hash = ?', (file_hash,)))
+        except:
+            return None, {}
+    
+    def set_pdf_page_count(self, file_hash, pages):
+        try:
+            self.write("INSERT OR REPLACE INTO pdf_files (hash, pages, chars, used) VALUES (?, ?, 0, julianday('now'))", (file_hash, pages))
+            return True
+        except:
+            return False
+    
+    def save_pdf_pages(self, file_hash, pages):
+        """Store extracted pages, then evict least recently used files while over PDF_CACHE"""
+        try:
+            with self.writing() as conn:
+                conn.executemany('INSERT OR REPLACE INTO pdf_pages (hash, page, text) VALUES (?, ?, ?)',
+                                 [(file_hash, page, text) for page, text in pages])
+                conn.execute('UPDATE pdf_files SET chars = (SELECT COALESCE(SUM(LENGTH(text)), 0) FROM pdf_pages WHERE hash = ?) WHERE hash = ?',
+                             (file_hash, file_hash))
+                total = conn.execute('SELECT COALESCE(SUM(chars), 0) FROM pdf_files').fetchone()[0]
+                for old, chars in conn.execute('SELECT hash, chars FROM pdf_files WHERE hash != ? ORDER BY used', (file_hash,)).fetchall():
+                    if total <= self.PDF_CACHE:
+                        break
+                    conn.execute('DELETE FROM pdf_pages WHERE hash = ?', (old,))
+                    conn.execute('DELETE FROM pdf_files WHERE hash = ?', (old,))
+                    total -= chars
+            return True
+        except:
+            return False
+    
+    def clear_pdf_cache(self):
+        try:
+            with self.writing() as conn:
+                conn.execute('DELETE FROM pdf_pages')
+                conn.execute('DELETE FROM pdf_files')
+            return True
+        except:
+            return False
+    
+    def add_tm_entries(self, rows):
+        """(digest, source, target, config, band keys) rows. A known digest is written again under a new
+        id, so ids stay in write order and get_tm_candidates' per-key cap keeps the recent ones."""
+        try:
+            with self.writing() as conn:
+                for digest, source, target, config, keys in rows:
+                    r = conn.execute('SELECT id FROM tm_entries WHERE digest = ?', (digest,)).fetchone()
+                    if r:  # same digest, same source, same band keys
+                        conn.executemany('DELETE FROM tm_bands WHERE key = ? AND entry = ?', [(key, r[0]) for key in keys])
+                        conn.execute('DELETE FROM tm_entries WHERE id = ?', (r[0],))
+                    entry = conn.execute('INSERT INTO tm_entries (digest, source, target, config) VALUES (?, ?, ?, ?)',
+                                         (digest, source, target, config)).lastrowid
+                    conn.executemany('INSERT OR IGNORE INTO tm_bands (key, entry) VALUES (?, ?)', [(key, entry) for key in keys])
+            return True
+        except:
+            return False
+    
+    def get_tm_entry(self, digest):
+        """(source, target) or None"""
+        try:
+            return self.query_one('SELECT source, target FROM tm_entries WHERE digest = ?', (digest,))
+        except:
+            return None
+    
+    def get_tm_candidates(self, keys, limit, per_key=1000):
+        """(id, source, target, config) of the entries sharing the most band keys. Only the
+        newest per_key entries of each key are counted, so very common bands stay cheap."""
+        try:
+            conn = self.connect()
+            counts = Counter()
+            for key in keys:
+                counts.update(r[0] for r in conn.execute('SELECT entry FROM tm_bands WHERE key = ? ORDER BY entry DESC LIMIT ?', (key, per_key)))
+            ids = [entry for entry, n in counts.most_common(limit)]
+            return self.query('SELECT id, source, target, config FROM tm_entries WHERE id IN (SELECT value FROM json_each(?))',
+                              (json.dumps(ids),)) if ids else []
+        except:
+            return []
+    
+    def get_tm_oldest(self, n):
+        """(id, source) of the n least recently written entries"""
+        try:
+            return self.query('SELECT id, source FROM tm_entries ORDER BY timestamp, id LIMIT ?', (n,))
+        except:
+            return []
+    
+    def delete_tm_entries(self, rows):
+        """(id, band keys) rows; the keys locate the band rows, which are not indexed by entry"""
+        try:
+            with self.writing() as conn:
+                for entry, keys in rows:
+                    conn.executemany('DELETE FROM tm_bands WHERE key = ? AND entry = ?', [(key, entry) for key in keys])
+                    conn.execute('DELETE FROM tm_entries WHERE id = ?', (entry,))
+            return True
+        except:
+            return False
+    
+    def get_tm_count(self):
+        try:
+            return self.query_one('SELECT COUNT(*) FROM tm_entries')[0]
+        except:
+            return 0
+    
+    def clear_tm(self):
+        try:
+            with self.writing() as conn:
+                conn.execute('DELETE FROM tm_bands')
+                conn.execute('DELETE FROM tm_entries')
             return True
         except:
             return False
     
     def close(self):
-        if self.conn: self.conn.close()
+        with self.connections_lock:
+            for conn, used in self.connections.values():
+                try: conn.close()
+                except: pass
+            self.connections = {}
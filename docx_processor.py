@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar DOCX Processor v1.4.2 - Shape text runs in place, streaming the package
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import re, shutil, zipfile
+from collections import deque
+from xml.parsers import expat
+from xml.sax.saxutils import escape
+from text_processor import TextProcessor
+from normalizer import Normalizer
+
+W_T = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main t'
+TEXT_PARTS = re.compile(r'word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml$')
+RTL_CHARS = re.compile('[؀-ۿﭐ-﷿ﹰ-﻿]')
+
+class DocxProcessor:
+    """Copies a .docx member by member. Text parts are fed through expat in chunks and
+    written back byte for byte, except the content of w:t runs that need shaping."""
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, exceptions=None, profile='', glossary=None):
+        self.exceptions = exceptions or []
+        self.profile = profile
+        self.glossary = glossary
+        self.stats = {'parts': 0, 'runs': 0, 'shaped': 0}
+        self.cache = {}  # repeated runs (headers, table labels) are shaped once
+
+    def shape(self, text):
+        if text in self.cache:
+            return self.cache[text]
+        result = self.cache[text] = self.shape_run(text)
+        return result
+
+    def shape_run(self, text):
+        text = Normalizer.normalize(text, self.profile)
+        if self.glossary:
+            text = self.glossary.apply(text)
+        if not RTL_CHARS.search(text):
+            return text
+        return TextProcessor.encode_text(text, self.exceptions)
+
+    def process(self, src, dst):
+        with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, 'w') as zout:
+            for info in zin.infolist():
+                out_info = zipfile.ZipInfo(info.filename, info.date_time)
+                out_info.compress_type = info.compress_type
+                out_info.external_attr = info.external_attr
+                with zin.open(info) as fin, zout.open(out_info, 'w') as fout:
+                    if TEXT_PARTS.match(info.filename):
+                        self.stats['parts'] += 1
+                        self.rewrite(fin, fout)
+                    else:
+                        shutil.copyfileobj(fin, fout, self.CHUNK_SIZE)
+        return self.stats
+
+    def rewrite(self, fin, fout):
+        """Stream one XML part. Only bytes before the last parser event (or before an
+        open w:t) are flushed, so an edit never touches bytes already written."""
+        parser = expat.ParserCreate(namespace_separator=' ')
+        buf, base = bytearray(), 0  # buf[0] is at absolute offset base
+        edits = deque()  # (start, end, bytes) in document order
+        state = {'tag': None, 'text': None, 'pieces': [], 'last': 0}
+
+        def start(name, attrs):
+            state['last'] = parser.CurrentByteIndex
+            if name == W_T:
+                state['tag'], state['text'], state['pieces'] = parser.CurrentByteIndex, None, []
+
+        def chars(data):
+            state['last'] = parser.CurrentByteIndex
+            if state['tag'] is not None:
+                if state['text'] is None:
+                    state['text'] = parser.CurrentByteIndex
+                state['pieces'].append(data)
+
+        def end(name):
+            state['last'] = parser.CurrentByteIndex
+            if name != W_T or state['tag'] is None:
+                return
+            tag, text_start = state['tag'], state['text']
+            state['tag'] = None
+            if text_start is None:
+                return
+            self.stats['runs'] += 1
+            text = ''.join(state['pieces'])
+            shaped = self.shape(text)
+            if shaped == text:
+                return
+            self.stats['shaped'] += 1
+            open_tag = bytes(buf[tag - base:text_start - base])
+            if b'xml:space' not in open_tag:  # bidi may move spaces to the run edges
+                edits.append((text_start - 1, text_start - 1, b' xml:space="preserve"'))
+            edits.append((text_start, parser.CurrentByteIndex, escape(shaped).encode('utf-8')))
+
+        parser.StartElementHandler = start
+        parser.CharacterDataHandler = chars
+        parser.EndElementHandler = end
+
+        def flush(upto):
+            nonlocal buf, base
+            pos = base
+            out = []
+            while edits and edits[0][1] <= upto:
+                a, b, data = edits.popleft()
+                out.append(buf[pos - base:a - base])
+                out.append(data)
+                pos = b
+            out.append(buf[pos - base:upto - base])
+            fout.write(b''.join(out))
+            del buf[:upto - base]
+            base = upto
+
+        while True:
+            chunk = fin.read(self.CHUNK_SIZE)
+            buf += chunk
+            parser.Parse(chunk, not chunk)
+            if not chunk:
+                flush(base + len(buf))
+                return
+            safe = state['tag'] if state['tag'] is not None else state['last']
+            if safe > base:
+                flush(safe)
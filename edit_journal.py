@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Edit Journal v1.4.2 - Delta-based undo/redo for the file editor
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import os, pickle, sqlite3, tempfile
+from collections import deque
+
+class JournalStack:
+    """Transactions (label, [(ref, column, old, new), ...]), newest last. The newest ones
+    stay in memory; older ones can be moved to the journal's spill database."""
+    def __init__(self, journal, name):
+        self.journal = journal
+        self.name = name
+        self.items = deque()
+        self.deltas = 0  # deltas held in memory
+        self.spilled = 0  # transactions in the spill database
+
+    def __len__(self):
+        return len(self.items) + self.spilled
+
+    def push(self, tx):
+        self.items.append(tx)
+        self.deltas += len(tx[1])
+
+    def pop(self):
+        if not self.items and self.spilled:
+            self.items.append(self.journal.unspill(self.name))
+            self.spilled -= 1
+        else:
+            self.deltas -= len(self.items[-1][1])
+        return self.items.pop()
+
+    def spill_oldest(self):
+        tx = self.items.popleft()
+        self.deltas -= len(tx[1])
+        self.journal.spill(self.name, tx)
+        self.spilled += 1
+
+    def clear(self):
+        self.items.clear()
+        self.deltas = 0
+        if self.spilled:
+            self.journal.drop(self.name)
+            self.spilled = 0
+
+class EditJournal:
+    """Undo/redo of cell edits recorded as (ref, column, old, new) deltas, where ref is a
+    table row or a tree path. A bulk edit is one transaction and is undone in one step.
+    Past MEMORY_DELTAS, the oldest transactions go to a temporary SQLite file."""
+    MEMORY_DELTAS = 500_000
+
+    def __init__(self, memory_deltas=None):
+        self.memory_deltas = memory_deltas or self.MEMORY_DELTAS
+        self.undo_stack = JournalStack(self, 'undo')
+        self.redo_stack = JournalStack(self, 'redo')
+        self.db = None
+        self.path = None
+
+    def can_undo(self):
+        return len(self.undo_stack) > 0
+
+    def can_redo(self):
+        return len(self.redo_stack) > 0
+
+    def record(self, deltas, label=''):
+        """Add one transaction; deltas that change nothing are dropped. Clears redo."""
+        deltas = [d for d in deltas if d[2] != d[3]]
+        if not deltas:
+            return False
+        self.undo_stack.push((label, deltas))
+        self.redo_stack.clear()
+        self.trim()
+        return True
+
+    def undo(self):
+        """(label, [(ref, column, text), ...]) to apply, newest change first; None if empty"""
+        if not self.can_undo():
+            return None
+        label, deltas = self.undo_stack.pop()
+        self.redo_stack.push((label, deltas))
+        self.trim()
+        return label, [(ref, col, old) for ref, col, old, new in reversed(deltas)]
+
+    def redo(self):
+        if not self.can_redo():
+            return None
+        label, deltas = self.redo_stack.pop()
+        self.undo_stack.push((label, deltas))
+        self.trim()
+        return label, [(ref, col, new) for ref, col, old, new in deltas]
+
+    def trim(self):
+        """Spill the oldest transactions until memory is under the cap; the newest of each stack stays"""
+        while self.undo_stack.deltas + self.redo_stack.deltas > self.memory_deltas:
+            stack = max(self.undo_stack, self.redo_stack, key=lambda s: s.deltas)
+            if len(stack.items) < 2:
+                stack = self.redo_stack if stack is self.undo_stack else self.undo_stack
+                if len(stack.items) < 2:
+                    return
+            stack.spill_oldest()
+
+    def connect(self):
+        if self.db is None:
+            fd, self.path = tempfile.mkstemp(prefix='harfnegar_journal_', suffix='.db')
+            os.close(fd)
+            self.db = sqlite3.connect(self.path)
+            self.db.execute('PRAGMA journal_mode=OFF')
+            self.db.execute('PRAGMA synchronous=OFF')
+            self.db.execute('CREATE TABLE tx (id INTEGER PRIMARY KEY AUTOINCREMENT, stack TEXT, label TEXT)')
+            self.db.execute('CREATE TABLE deltas (tx INTEGER, ref, col INTEGER, old TEXT, new TEXT)')
+            self.db.execute('CREATE INDEX deltas_tx ON deltas (tx)')
+        return self.db
+
+    @staticmethod
+    def pack_ref(ref):
+        return ref if isinstance(ref, int) else pickle.dumps(ref)
+
+    @staticmethod
+    def unpack_ref(ref):
+        return ref if isinstance(ref, int) else pickle.loads(ref)
+
+    def spill(self, stack, tx):
+        """Store a transaction; everything in memory is newer, so ids increase with age order"""
+        db = self.connect()
+        label, deltas = tx
+        with db:
+            tx_id = db.execute('INSERT INTO tx (stack, label) VALUES (?, ?)', (stack, label)).lastrowid
+            db.executemany('INSERT INTO deltas (tx, ref, col, old, new) VALUES (?, ?, ?, ?, ?)',
+                           [(tx_id, self.pack_ref(ref), col, old, new) for ref, col, old, new in deltas])
+
+    def unspill(self, stack):
+        """Remove and return the newest spilled transaction of a stack"""
+        db = self.connect()
+        tx_id, label = db.execute('SELECT id, label FROM tx WHERE stack = ? ORDER BY id DESC LIMIT 1', (stack,)).fetchone()
+        rows = db.execute('SELECT ref, col, old, new FROM deltas WHERE tx = ? ORDER BY rowid', (tx_id,)).fetchall()
+        with db:
+            db.execute('DELETE FROM deltas WHERE tx = ?', (tx_id,))
+            db.execute('DELETE FROM tx WHERE id = ?', (tx_id,))
+        return label, [(self.unpack_ref(ref), col, old, new) for ref, col, old, new in rows]
+
+    def drop(self, stack):
+        with self.connect() as db:
+            db.execute('DELETE FROM deltas WHERE tx IN (SELECT id FROM tx WHERE stack = ?)', (stack,))
+            db.execute('DELETE FROM tx WHERE stack = ?', (stack,))
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def close(self):
+        self.undo_stack = JournalStack(self, 'undo')
+        self.redo_stack = JournalStack(self, 'redo')
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+            try: os.remove(self.path)
+            except: pass
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Glossary v1.4.2 - Bulk find & replace in one scan
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+from collections import OrderedDict
+import re, os, csv, json, hashlib
+
+def _trie_regex(node):
+    """Regex for a trie (dict char -> child, '' marks a word end). Greedy optional
+    groups try the longer continuation first, so each match is the longest term."""
+    alts, chars = [], []
+    for ch in sorted(k for k in node if k):
+        child = node[ch]
+        if list(child) == ['']:
+            chars.append(re.escape(ch))
+        else:
+            alts.append(re.escape(ch) + _trie_regex(child))
+    if len(chars) == 1:
+        alts.append(chars[0])
+    elif chars:
+        alts.append('[' + ''.join(chars) + ']')
+    if not alts:
+        return ''
+    body = alts[0] if len(alts) == 1 else '(?:' + '|'.join(alts) + ')'
+    if '' in node:
+        return f'(?:{body})?'
+    return body
+
+class Glossary:
+    """Term substitutions applied left to right, longest match first, in a single pass.
+    The trie is compiled into one regex so the scan runs inside the re engine."""
+    CACHE_SIZE = 8
+    _compiled = OrderedDict()  # fingerprint -> compiled pattern
+
+    def __init__(self, pairs):
+        self.terms = {}
+        for find, replace in (pairs.items() if isinstance(pairs, dict) else pairs):
+            if find:
+                self.terms[find] = replace
+        self.fingerprint = hashlib.sha1(json.dumps(sorted(self.terms.items()), ensure_ascii=False).encode('utf-8')).hexdigest()
+        self.pattern = self.compile(self.terms, self.fingerprint)
+
+    @classmethod
+    def compile(cls, terms, fingerprint):
+        if not terms:
+            return None
+        if fingerprint in cls._compiled:
+            cls._compiled.move_to_end(fingerprint)
+            return cls._compiled[fingerprint]
+        trie = {}
+        for term in terms:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[''] = True
+        pattern = re.compile(_trie_regex(trie))
+        cls._compiled[fingerprint] = pattern
+        if len(cls._compiled) > cls.CACHE_SIZE:
+            cls._compiled.popitem(last=False)
+        return pattern
+
+    def __len__(self):
+        return len(self.terms)
+
+    def apply(self, text):
+        if not text or self.pattern is None:
+            return text
+        terms = self.terms
+        return self.pattern.sub(lambda m: terms[m.group(0)], text)
+
+    @classmethod
+    def from_file(cls, filepath):
+        return cls(cls.read_pairs(filepath))
+
+    @classmethod
+    def from_db(cls, db):
+        return cls(db.get_glossary())
+
+    @staticmethod
+    def read_pairs(filepath):
+        """(find, replace) pairs from .tsv/.txt (tab separated), .csv, .json (object) or .po (msgid -> msgstr)"""
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext == '.po':
+            import polib
+            return [(e.msgid, e.msgstr) for e in polib.pofile(filepath) if e.msgstr]
+        with open(filepath, 'r', encoding='utf-8') as f:
+            if ext == '.json':
+                return list(json.load(f).items())
+            if ext == '.csv':
+                return [(row[0], row[1]) for row in csv.reader(f) if len(row) >= 2]
+            pairs = []
+            for line in f:
+                find, sep, replace = line.rstrip('\r\n').partition('\t')
+                if sep:
+                    pairs.append((find, replace))
+            return pairs
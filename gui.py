@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """Harfnegar GUI v1.4.2 - Universal File Editor
 Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
-import sys, os, platform, json, yaml, polib
+import sys, os, re, platform, json, csv, yaml, polib, threading
+from collections import deque
 from xml.etree import ElementTree as ET
 from xml.dom import minidom
 from PySide6.QtWidgets import *
@@ -9,20 +10,71 @@ from PySide6.QtCore import *
 from PySide6.QtGui import *
 import pyperclip
 from text_processor import TextProcessor
+from text_stats import TextStats
 from database_manager import DatabaseManager
 from language_manager import LanguageManager
+from job_queue import JobManager, JobStatusButton
+from glossary import Glossary
+from normalizer import Normalizer
+from pdf_extractor import PdfExtractor
+from subtitle_processor import SubtitleProcessor
+from csv_processor import CsvProcessor, CSV_EXTS, RTL_CHARS
+from edit_journal import EditJournal
+from regex_search import RegexSearch, RegexTimeout
+from translation_memory import TranslationMemory
+from stream_parsers import iter_json_rows, iter_yaml_rows, iter_po_rows, StreamFallback, YamlLoader
+
+class JournalDelegate(QStyledItemDelegate):
+    """Records each committed cell edit in the editor's journal"""
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+    
+    def setModelData(self, widget, model, index):
+        old = index.data() or ''
+        super().setModelData(widget, model, index)
+        self.editor.record([(index.row(), index.column(), old, index.data() or '')], 'edit')
 
 class UniversalFileEditor(QDialog):
-    """Universal editor for PO/JSON/YAML/XML files"""
+    """Universal editor for PO/JSON/YAML/XML/CSV files"""
     def __init__(self, parent, lang, filepath, db):
         super().__init__(parent)
         self.lang = lang
         self.filepath = filepath
         self.db = db
         self.file_type = os.path.splitext(filepath)[1].lower()
+        self.has_tree = self.file_type in ('.json', '.yaml', '.yml', '.xml')
+        self.csv_format = None  # (delimiter, line terminator) for CSV/TSV
+        self.csv_header = []
+        self.csv_widths = []  # fields per CSV row as read; ragged rows keep their length
         self.data = None
+        self.jobs = getattr(parent, 'jobs', None) or JobManager(self)
+        self.own_jobs = []
+        self.pending_rows = deque()
+        self.loading = False
+        self.row_timer = QTimer(self)
+        self.row_timer.timeout.connect(self.insert_row_chunk)
+        self.batch_slots = threading.Semaphore(self.STREAM_WINDOW)
+        self.stream_batches = deque()
+        self.stream_consumed = 0
+        self.row_paths = []
+        self.tree_built = False
+        self.tree_dirty = False
+        self._tree_filling = False
+        self.node_paths = []  # tree items keep an index into this list
+        self.value_types = {}  # path -> type of the loaded value, for edits written back to self.data
+        self.load_job = None
+        self.journal = EditJournal()
+        self._replaying = False
+        self.busy = False
+        self.memory = getattr(parent, 'memory', None) or TranslationMemory(db)
+        self.suggest_col = None  # last column, except for CSV where every column is data
+        self.suggest_timer = QTimer(self)
+        self.suggest_timer.setSingleShot(True)
+        self.suggest_timer.timeout.connect(self.fill_suggestions)
         
-        title_map = {'.po': 'po_editor', '.json': 'json_editor', '.yaml': 'yaml_editor', '.yml': 'yaml_editor', '.xml': 'xml_editor'}
+        title_map = {'.po': 'po_editor', '.json': 'json_editor', '.yaml': 'yaml_editor', '.yml': 'yaml_editor', '.xml': 'xml_editor',
+                     '.csv': 'csv_editor', '.tsv': 'csv_editor'}
         self.setWindowTitle(lang.get(title_map.get(self.file_type, 'file')))
         self.resize(1400, 800)
         
@@ -54,17 +106,58 @@ class UniversalFileEditor(QDialog):
         self.process_all_btn.clicked.connect(self.process_all)
         toolbar.addWidget(self.process_all_btn)
         
-        save_btn = QPushButton(lang.get('save'))
-        save_btn.clicked.connect(self.save_file)
-        toolbar.addWidget(save_btn)
+        self.undo_btn = QPushButton(lang.get('undo'))
+        self.undo_btn.clicked.connect(self.undo)
+        toolbar.addWidget(self.undo_btn)
+        
+        self.redo_btn = QPushButton(lang.get('redo'))
+        self.redo_btn.clicked.connect(self.redo)
+        toolbar.addWidget(self.redo_btn)
+        
+        QShortcut(QKeySequence.Undo, self, self.undo)
+        QShortcut(QKeySequence.Redo, self, self.redo)
+        
+        self.save_btn = QPushButton(lang.get('save'))
+        self.save_btn.clicked.connect(self.save_file)
+        toolbar.addWidget(self.save_btn)
+        
+        # Tree view (JSON/YAML/XML): children are materialized on expand
+        if self.has_tree:
+            self.tree_btn = QPushButton(lang.get('tree_view'))
+            self.tree_btn.setCheckable(True)
+            self.tree_btn.toggled.connect(self.show_tree)
+            toolbar.addWidget(self.tree_btn)
+            
+            self.expand_btn = QPushButton(lang.get('expand_all'))
+            self.expand_btn.clicked.connect(self.expand_all)
+            self.expand_btn.hide()
+            toolbar.addWidget(self.expand_btn)
+            
+            self.collapse_btn = QPushButton(lang.get('collapse_all'))
+            self.collapse_btn.clicked.connect(lambda: self.tree.collapseAll())
+            self.collapse_btn.hide()
+            toolbar.addWidget(self.collapse_btn)
         
         layout.addLayout(toolbar)
         
         # Table
         self.table = QTableWidget()
+        self.table.setItemDelegate(JournalDelegate(self))
         self.setup_table()
+        self.table.verticalScrollBar().valueChanged.connect(self.schedule_suggestions)
+        self.table.cellDoubleClicked.connect(self.use_suggestion)
         layout.addWidget(self.table)
         
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels([lang.get('key'), lang.get('value'), lang.get('comment')])
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tree.header().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.tree.setSelectionMode(QTreeWidget.ExtendedSelection)
+        self.tree.itemExpanded.connect(self.expand_node)
+        self.tree.itemChanged.connect(self.on_tree_item_changed)
+        self.tree.hide()
+        layout.addWidget(self.tree)
+        
         # Bottom buttons
         btn_layout = QHBoxLayout()
         btn_layout.addStretch()
@@ -78,122 +171,453 @@ class UniversalFileEditor(QDialog):
     
     def setup_table(self):
         if self.file_type == '.po':
-            self.table.setColumnCount(4)
-            self.table.setHorizontalHeaderLabels([self.lang.get('msgid'), self.lang.get('msgstr'), self.lang.get('comment'), self.lang.get('fuzzy')])
+            self.table.setColumnCount(5)
+            self.table.setHorizontalHeaderLabels([self.lang.get('msgid'), self.lang.get('msgstr'), self.lang.get('comment'), self.lang.get('fuzzy'),
+                                                  self.lang.get('suggestion')])
+        elif self.file_type in CSV_EXTS:
+            header, delimiter, terminator = CsvProcessor.read_header(self.filepath)
+            self.csv_format = (delimiter, terminator)
+            self.csv_header = header
+            self.table.setColumnCount(len(header))
+            self.table.setHorizontalHeaderLabels(header)
         else:
-            self.table.setColumnCount(3)
-            self.table.setHorizontalHeaderLabels([self.lang.get('key'), self.lang.get('value'), self.lang.get('comment')])
+            self.table.setColumnCount(4)
+            self.table.setHorizontalHeaderLabels([self.lang.get('key'), self.lang.get('value'), self.lang.get('comment'), self.lang.get('suggestion')])
+        if not self.csv_format:
+            self.suggest_col = self.table.columnCount() - 1
         
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        if self.suggest_col is not None:
+            self.table.horizontalHeader().setSectionResizeMode(self.suggest_col, QHeaderView.Stretch)
         self.table.setSelectionBehavior(QTableWidget.SelectRows)
         self.table.setSelectionMode(QTableWidget.ExtendedSelection)
     
+    ROW_CHUNK = 2000
+    FIRST_BATCH = 100  # rows in the first streamed batch, enough for a screenful
+    STREAM_WINDOW = 8  # streamed batches allowed between the parser thread and the table
+    
+    def submit(self, kind, title, fn, on_done=None, on_error=None, on_partial=None):
+        """Run fn(job) in the background; jobs still pending are cancelled when the dialog closes"""
+        job = self.jobs.submit(kind, title, fn, on_done, on_error, on_partial)
+        self.own_jobs.append(job)
+        return job
+    
+    def done(self, result):
+        for job in self.own_jobs:
+            if not job.done:
+                self.jobs.cancel(job)
+        self.row_timer.stop()
+        self.suggest_timer.stop()
+        self.journal.close()
+        super().done(result)
+    
+    def set_busy(self, busy):
+        for btn in (self.process_sel_btn, self.process_all_btn, self.save_btn):
+            btn.setEnabled(not busy)
+        if self.has_tree:
+            self.tree_btn.setEnabled(not busy or self.loading)  # the tree need not wait for the table
+        self.busy = busy
+        self.update_undo_buttons()
+    
     def load_file(self):
-        try:
-            if self.file_type == '.po':
-                self.load_po()
-            elif self.file_type == '.json':
-                self.load_json()
-            elif self.file_type in ['.yaml', '.yml']:
-                self.load_yaml()
-            elif self.file_type == '.xml':
-                self.load_xml()
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to load: {str(e)}')
-    
-    def load_po(self):
-        self.data = polib.pofile(self.filepath)
+        loaders = {'.po': self.load_po, '.json': self.load_json, '.yaml': self.load_yaml, '.yml': self.load_yaml, '.xml': self.load_xml,
+                   '.csv': self.load_csv, '.tsv': self.load_csv}
+        loader = loaders.get(self.file_type)
+        if loader is None:
+            return
+        self.loading = True
+        self.set_busy(True)
+        self.load_job = self.submit('io', f"{self.lang.get('loading')} {os.path.basename(self.filepath)}", loader,
+                    on_done=self.on_loaded, on_partial=self.on_rows_streamed,
+                    on_error=lambda e: self.on_failed(f'Failed to load: {e}'))
+    
+    def on_loaded(self, result):
+        self.data, rows = result
+        self.loading = False
+        self.queue_rows(rows)
+    
+    def on_rows_streamed(self, batch):
+        if batch is None:  # parser fell back to a full load, start over
+            self.reset_rows()
+            return
+        self.stream_batches.append(len(batch))
+        self.queue_rows(batch)
+    
+    def reset_rows(self):
+        """Empty the table, including rows streamed but not inserted yet"""
+        self.row_timer.stop()
+        self.pending_rows.clear()
         self.table.setRowCount(0)
-        for entry in self.data:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            self.table.setItem(row, 0, QTableWidgetItem(entry.msgid))
-            self.table.item(row, 0).setFlags(self.table.item(row, 0).flags() & ~Qt.ItemIsEditable)
-            self.table.setItem(row, 1, QTableWidgetItem(entry.msgstr))
-            self.table.setItem(row, 2, QTableWidgetItem(entry.comment or ''))
-            
+        self.row_paths = []
+        self.journal.clear()
+        while self.stream_batches:
+            self.stream_batches.popleft()
+            self.batch_slots.release()
+        self.stream_consumed = 0
+        self.update_undo_buttons()
+    
+    def on_failed(self, message):
+        self.loading = False
+        self.set_busy(False)
+        QMessageBox.critical(self, 'Error', message)
+    
+    def queue_rows(self, rows):
+        self.pending_rows.extend(rows)
+        if not self.row_timer.isActive():
+            self.row_timer.start(0)
+    
+    def insert_row_chunk(self):
+        """Append queued rows a chunk at a time so big files never block the event loop"""
+        count = min(self.ROW_CHUNK, len(self.pending_rows))
+        start = self.table.rowCount()
+        self.table.setRowCount(start + count)
+        for row in range(start, start + count):
+            self.set_row(row, self.pending_rows.popleft())
+        self.stream_consumed += count
+        while self.stream_batches and self.stream_consumed >= self.stream_batches[0]:
+            self.stream_consumed -= self.stream_batches.popleft()
+            self.batch_slots.release()
+        self.schedule_suggestions()
+        if not self.pending_rows:
+            self.row_timer.stop()
+            if not self.loading:
+                self.set_busy(False)
+                if self.search_input.text():
+                    self.filter_entries()
+    
+    def set_row(self, row, values):
+        if self.csv_format:
+            if len(values) > self.table.columnCount():  # more fields than the header names
+                self.table.setColumnCount(len(values))
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+            self.csv_widths.append(len(values))
+            return
+        key_item = QTableWidgetItem(str(values[0]))
+        key_item.setFlags(key_item.flags() & ~Qt.ItemIsEditable)
+        self.table.setItem(row, 0, key_item)
+        self.table.setItem(row, 1, QTableWidgetItem(values[1]))
+        self.table.setItem(row, 2, QTableWidgetItem(values[2]))
+        if self.file_type == '.po':
             fuzzy_cb = QCheckBox()
-            fuzzy_cb.setChecked('fuzzy' in entry.flags)
+            fuzzy_cb.setChecked(values[3])
             self.table.setCellWidget(row, 3, fuzzy_cb)
+        else:
+            self.row_paths.append(values[3])
+    
+    def table_rows(self):
+        rows = []
+        if self.csv_format:
+            for row in range(self.table.rowCount()):
+                values = [self.table.item(row, col).text() if self.table.item(row, col) else '' for col in range(self.table.columnCount())]
+                width = self.csv_widths[row] if row < len(self.csv_widths) else len(values)
+                while len(values) > width and not values[-1]:  # padding; cells typed past the end are kept
+                    values.pop()
+                rows.append(values)
+            return rows
+        for row in range(self.table.rowCount()):
+            values = (self.table.item(row, 0).text(), self.table.item(row, 1).text(), self.table.item(row, 2).text())
+            if self.file_type == '.po':
+                values += (self.table.cellWidget(row, 3).isChecked(),)
+            rows.append(values)
+        return rows
     
-    def load_json(self):
+    # Loaders run in a worker thread: parse and flatten only, no widget access.
+    # PO/JSON/YAML stream rows as they are parsed; self.data is parsed in full only when needed.
+    def stream_rows(self, job, rows):
+        batch, size = [], self.FIRST_BATCH
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= size:
+                self.emit_batch(job, batch)
+                batch, size = [], self.ROW_CHUNK
+        if batch:
+            self.emit_batch(job, batch)
+    
+    def emit_batch(self, job, batch):
+        while not self.batch_slots.acquire(timeout=0.1):
+            job.check()
+        job.emit_partial(batch)
+    
+    def load_po(self, job):
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            self.stream_rows(job, iter_po_rows(f))
+        return None, []
+    
+    def load_json(self, job):
         with open(self.filepath, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
-        self.populate_dict(self.data)
+            self.stream_rows(job, iter_json_rows(f))
+        return None, []
+    
+    def load_yaml(self, job):
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                self.stream_rows(job, iter_yaml_rows(f))
+            return None, []
+        except StreamFallback:
+            job.emit_partial(None)
+            data = self.parse_data()
+            return data, list(self.dict_rows(data))
+    
+    def load_csv(self, job):
+        fp, delimiter, terminator = CsvProcessor.open_csv(self.filepath)
+        with fp:
+            reader = csv.reader(fp, delimiter=delimiter)
+            next(reader, None)  # header is shown as the column labels
+            self.stream_rows(job, reader)
+        return None, []
     
-    def load_yaml(self):
+    def parse_data(self):
+        """Full parse of the file, for the tree view and fallbacks"""
+        if self.file_type == '.xml':
+            return ET.parse(self.filepath).getroot()
         with open(self.filepath, 'r', encoding='utf-8') as f:
-            self.data = yaml.safe_load(f)
-        self.populate_dict(self.data)
+            if self.file_type == '.json':
+                return json.load(f)
+            return yaml.load(f, Loader=YamlLoader)
     
-    def load_xml(self):
-        tree = ET.parse(self.filepath)
-        self.data = tree.getroot()
-        self.populate_xml(self.data)
+    def load_xml(self, job):
+        data = self.parse_data()
+        return data, list(self.xml_rows(data))
     
-    def populate_dict(self, data, prefix=''):
-        """Populate table from dict (JSON/YAML)"""
+    @staticmethod
+    def dict_rows(data, prefix='', path=()):
+        """Flatten dict (JSON/YAML) into (key, value, comment, path) rows"""
         if isinstance(data, dict):
             for key, value in data.items():
                 full_key = f"{prefix}.{key}" if prefix else key
                 if isinstance(value, (dict, list)):
-                    self.populate_dict(value, full_key)
+                    yield from UniversalFileEditor.dict_rows(value, full_key, path + (key,))
                 else:
-                    row = self.table.rowCount()
-                    self.table.insertRow(row)
-                    self.table.setItem(row, 0, QTableWidgetItem(full_key))
-                    self.table.item(row, 0).setFlags(self.table.item(row, 0).flags() & ~Qt.ItemIsEditable)
-                    self.table.setItem(row, 1, QTableWidgetItem(str(value)))
-                    self.table.setItem(row, 2, QTableWidgetItem(''))
+                    yield (full_key, str(value), '', path + (key,))
         elif isinstance(data, list):
             for i, value in enumerate(data):
                 full_key = f"{prefix}[{i}]"
                 if isinstance(value, (dict, list)):
-                    self.populate_dict(value, full_key)
+                    yield from UniversalFileEditor.dict_rows(value, full_key, path + (i,))
                 else:
-                    row = self.table.rowCount()
-                    self.table.insertRow(row)
-                    self.table.setItem(row, 0, QTableWidgetItem(full_key))
-                    self.table.item(row, 0).setFlags(self.table.item(row, 0).flags() & ~Qt.ItemIsEditable)
-                    self.table.setItem(row, 1, QTableWidgetItem(str(value)))
-                    self.table.setItem(row, 2, QTableWidgetItem(''))
-    
-    def populate_xml(self, root, prefix=''):
-        """Populate table from XML"""
-        for child in root:
+                    yield (full_key, str(value), '', path + (i,))
+    
+    @staticmethod
+    def xml_rows(root, prefix='', path=()):
+        """Flatten XML into (key, value, comment, path) rows; paths are child indexes, attributes end in a str"""
+        for i, child in enumerate(root):
             tag = f"{prefix}.{child.tag}" if prefix else child.tag
             
             # Add element with text
             if child.text and child.text.strip():
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                self.table.setItem(row, 0, QTableWidgetItem(tag))
-                self.table.item(row, 0).setFlags(self.table.item(row, 0).flags() & ~Qt.ItemIsEditable)
-                self.table.setItem(row, 1, QTableWidgetItem(child.text.strip()))
-                self.table.setItem(row, 2, QTableWidgetItem(''))
+                yield (tag, child.text.strip(), '', path + (i,))
             
             # Add attributes
             for attr, value in child.attrib.items():
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                self.table.setItem(row, 0, QTableWidgetItem(f"{tag}[@{attr}]"))
-                self.table.item(row, 0).setFlags(self.table.item(row, 0).flags() & ~Qt.ItemIsEditable)
-                self.table.setItem(row, 1, QTableWidgetItem(value))
-                self.table.setItem(row, 2, QTableWidgetItem('attribute'))
+                yield (f"{tag}[@{attr}]", value, 'attribute', path + (i, attr))
             
             # Recurse
             if len(child) > 0:
-                self.populate_xml(child, tag)
+                yield from UniversalFileEditor.xml_rows(child, tag, path + (i,))
+    
+    def node_at(self, path):
+        node = self.data
+        for part in path:
+            node = node[part]
+        return node
+    
+    def value_at(self, path):
+        """Text the table shows for path"""
+        if self.file_type == '.xml':
+            if path and isinstance(path[-1], str):
+                return self.node_at(path[:-1]).get(path[-1], '')
+            text = self.node_at(path).text
+            return text.strip() if text else ''
+        return str(self.node_at(path))
+    
+    def set_at_path(self, path, value):
+        if self.file_type == '.xml':
+            if path and isinstance(path[-1], str):
+                self.node_at(path[:-1]).set(path[-1], value)
+            else:
+                self.node_at(path).text = value
+        else:
+            self.node_at(path[:-1])[path[-1]] = self.typed_value(path, value)
+    
+    def typed_value(self, path, text):
+        """Edited text as the type the value was loaded with, so numbers, bools and null stay what they were"""
+        kind = self.value_types.setdefault(path, type(self.node_at(path)))
+        if kind is str:
+            return text
+        literals = {'null': None, 'None': None, 'true': True, 'True': True, 'false': False, 'False': False}
+        if text in literals:
+            return literals[text]
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return text
+        return value if isinstance(value, (int, float)) else text
+    
+    def path_key(self, path):
+        """Dotted key for a path, in the same format the table uses"""
+        key = ''
+        node = self.data
+        for part in path:
+            if self.file_type == '.xml':
+                if isinstance(part, str):
+                    return f"{key}[@{part}]"
+                node = node[part]
+                key = f"{key}.{node.tag}" if key else node.tag
+            else:
+                key = f"{key}[{part}]" if isinstance(node, list) else (f"{key}.{part}" if key else str(part))
+                node = node[part]
+        return key
+    
+    def node_children(self, path):
+        """One level of (label, path, value, comment, has_children, editable) below path"""
+        node = self.node_at(path)
+        if self.file_type == '.xml':
+            for attr, value in node.attrib.items():
+                yield (f"@{attr}", path + (attr,), value, 'attribute', False, True)
+            for i, child in enumerate(node):
+                text = child.text.strip() if child.text else ''
+                yield (child.tag, path + (i,), text, '', len(child) > 0 or bool(child.attrib), True)
+        else:
+            pairs = node.items() if isinstance(node, dict) else enumerate(node)
+            for key, value in pairs:
+                label = f"[{key}]" if isinstance(node, list) else str(key)
+                if isinstance(value, dict):
+                    yield (label, path + (key,), f"{{{len(value)}}}", '', True, False)
+                elif isinstance(value, list):
+                    yield (label, path + (key,), f"[{len(value)}]", '', True, False)
+                else:
+                    yield (label, path + (key,), str(value), '', False, True)
+    
+    def add_tree_items(self, parent, path):
+        items = []
+        for label, child_path, value, comment, has_children, editable in self.node_children(path):
+            item = QTreeWidgetItem([label, value, comment])
+            item.setData(0, Qt.UserRole, len(self.node_paths))
+            self.node_paths.append(child_path)
+            item.setToolTip(0, self.path_key(child_path))
+            if has_children:
+                item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+            if editable:
+                item.setFlags(item.flags() | Qt.ItemIsEditable)
+            items.append(item)
+        self._tree_filling = True
+        if parent is None:
+            self.tree.addTopLevelItems(items)
+        else:
+            parent.addChildren(items)
+        self._tree_filling = False
+    
+    def expand_node(self, item):
+        if item.childCount() == 0 and item.childIndicatorPolicy() == QTreeWidgetItem.ShowIndicator:
+            self.add_tree_items(item, self.node_paths[item.data(0, Qt.UserRole)])
+    
+    def expand_all(self):
+        stack = [self.tree.topLevelItem(i) for i in range(self.tree.topLevelItemCount())]
+        while stack:
+            item = stack.pop()
+            if item.childIndicatorPolicy() != QTreeWidgetItem.ShowIndicator:
+                continue
+            item.setExpanded(True)
+            stack.extend(item.child(i) for i in range(item.childCount()))
+    
+    def on_tree_item_changed(self, item, column):
+        if self._tree_filling or column != 1:
+            return
+        path = self.node_paths[item.data(0, Qt.UserRole)]
+        if not self._replaying:
+            self.record([(path, 1, self.value_at(path), item.text(1))], 'edit')
+        self.set_at_path(path, item.text(1))
+        self.tree_dirty = True
+    
+    def show_tree(self, on):
+        """Switch between the flat table and the lazy tree, syncing edits into self.data"""
+        if on:
+            if self.data is None:
+                self.open_tree()
+                return
+            changed = False
+            for (key, value, comment), path in zip(self.table_rows(), self.row_paths):
+                if self.value_at(path) != value:
+                    self.set_at_path(path, value)
+                    changed = True
+            if changed and self.tree_built:
+                self.tree.clear()
+                self.node_paths = []
+                self.tree_built = False
+            if not self.tree_built:
+                self.add_tree_items(None, ())
+                self.tree_built = True
+        elif self.tree_dirty:
+            self.table.setRowCount(0)
+            self.row_paths = []
+            rows = self.xml_rows(self.data) if self.file_type == '.xml' else self.dict_rows(self.data)
+            self.set_busy(True)
+            self.queue_rows(list(rows))
+            self.tree_dirty = False
+        self.table.setVisible(not on)
+        self.tree.setVisible(on)
+        self.expand_btn.setVisible(on)
+        self.collapse_btn.setVisible(on)
+    
+    def open_tree(self):
+        """Parse the document for the tree in a worker. A table still loading is dropped rather
+        than finished first; it is rebuilt from self.data when the table is shown again."""
+        streaming = self.loading
+        if streaming:
+            self.jobs.cancel(self.load_job)
+            self.loading = False
+            self.row_timer.stop()
+        self.set_busy(True)
+        self.submit('io', f"{self.lang.get('loading')} {os.path.basename(self.filepath)}", lambda job: self.parse_data(),
+                    on_done=lambda data: self.on_tree_data(data, streaming),
+                    on_error=self.on_tree_failed)
+    
+    def on_tree_data(self, data, streaming):
+        self.data = data
+        if streaming:
+            for (key, value, comment), path in zip(self.table_rows(), self.row_paths):  # keep edits made while loading
+                if self.value_at(path) != value:
+                    self.set_at_path(path, value)
+            self.reset_rows()
+            self.tree_dirty = True
+        self.set_busy(False)
+        if self.tree_btn.isChecked():
+            self.show_tree(True)
+    
+    def on_tree_failed(self, error):
+        self.tree_btn.blockSignals(True)
+        self.tree_btn.setChecked(False)
+        self.tree_btn.blockSignals(False)
+        self.on_failed(f'Failed to load: {error}')
+    
+    def tree_mode(self):
+        return self.has_tree and self.tree_btn.isChecked()
+    
+    def tree_items(self):
+        """Materialized tree items, depth first"""
+        it = QTreeWidgetItemIterator(self.tree)
+        while it.value():
+            yield it.value()
+            it += 1
     
     def filter_entries(self):
         search = self.search_input.text().lower()
         
+        if self.tree_mode():
+            for item in self.tree_items():
+                if item.childIndicatorPolicy() != QTreeWidgetItem.ShowIndicator:
+                    item.setHidden(bool(search) and search not in item.text(0).lower() and search not in item.text(1).lower())
+            return
+        
         for row in range(self.table.rowCount()):
             show = True
             
-            if search:
+            if search and self.csv_format:
+                show = any(self.table.item(row, col) and search in self.table.item(row, col).text().lower()
+                           for col in range(self.table.columnCount()))
+            elif search:
                 col0 = self.table.item(row, 0).text().lower()
                 col1 = self.table.item(row, 1).text().lower()
                 show = search in col0 or search in col1
@@ -212,6 +636,7 @@ class UniversalFileEditor(QDialog):
                         show = fuzzy
             
             self.table.setRowHidden(row, not show)
+        self.schedule_suggestions()
     
     def select_current_text(self):
         """Select entire text in current cell"""
@@ -227,91 +652,255 @@ class UniversalFileEditor(QDialog):
     
     def process_selected(self):
         """Process selected rows or selected text"""
-        exceptions = self.db.get_exception_patterns()
-        
-        for item in self.table.selectedItems():
-            row = item.row()
-            if item.column() == 1:  # Value column
-                text = item.text()
-                if text:
-                    # Process with bidi + reshaper
-                    processed = TextProcessor.encode_text(text, exceptions)
-                    item.setText(processed)
+        if self.tree_mode():
+            self.process_tree_items([item for item in self.tree.selectedItems()
+                                     if item.flags() & Qt.ItemIsEditable and item.text(1)])
+            return
+        cells = [(item.row(), item.column()) for item in self.table.selectedItems()
+                 if (self.csv_format or item.column() == 1) and item.text()]  # Value column; any column for CSV
+        self.process_cells(cells)
     
     def process_all(self):
         """Process all visible rows"""
-        exceptions = self.db.get_exception_patterns()
-        
+        if self.tree_mode():
+            self.process_tree_items([item for item in self.tree_items()
+                                     if not item.isHidden() and item.flags() & Qt.ItemIsEditable and item.text(1)])
+            return
+        if self.csv_format:
+            # Columns of the current selection (all columns if none), cells with Persian/Arabic text
+            columns = sorted({item.column() for item in self.table.selectedItems()}) or range(self.table.columnCount())
+            cells = [(row, col) for row in range(self.table.rowCount()) if not self.table.isRowHidden(row)
+                     for col in columns if self.table.item(row, col) and RTL_CHARS.search(self.table.item(row, col).text())]
+            self.process_cells(cells)
+            return
+        cells = []
         for row in range(self.table.rowCount()):
             if not self.table.isRowHidden(row):
                 value_item = self.table.item(row, 1)
                 if value_item:
                     text = value_item.text()
                     if text and (self.file_type != '.po' or not text):  # For PO, only untranslated
-                        processed = TextProcessor.encode_text(text, exceptions)
-                        value_item.setText(processed)
+                        cells.append((row, 1))
+        self.process_cells(cells)
+    
+    def process_cells(self, cells):
+        texts = [self.table.item(row, col).text() for row, col in cells]
+        self.process_texts(texts, lambda results: self.apply_processed(cells, results))
+    
+    def process_tree_items(self, items):
+        texts = [item.text(1) for item in items]
+        self.process_texts(texts, lambda results: self.apply_tree_processed(items, results))
+    
+    def process_texts(self, texts, apply):
+        """Encode texts in a worker, then hand the results to apply() in one batch"""
+        if not texts:
+            return
+        exceptions = self.db.get_exception_patterns()
+        profile = self.db.get('normalize_profile', '')
+        config = self.memory.config_key(exceptions, profile)
+        
+        def work(job):
+            results, cache = [], {}  # repeated values (common in CSV columns) are encoded once
+            for i, text in enumerate(texts):
+                if i % 500 == 0:
+                    job.report(i * 100 // len(texts))
+                if text not in cache:
+                    cache[text] = TextProcessor.encode_text(text, exceptions, profile)  # bidi + reshaper
+                results.append(cache[text])
+            return results
+        
+        self.set_busy(True)
+        self.submit('bulk', self.lang.get('processing'), work, on_done=lambda results: (apply(results), self.remember(texts, results, config)),
+                    on_error=lambda e: self.on_failed(str(e)))
+    
+    # Translation memory: processed cells are remembered, visible rows get the closest earlier output
+    SUGGEST_DELAY = 150  # ms between a scroll/filter and the lookup
+    SUGGESTIONS = 5  # matches in the tooltip
+    
+    def remember(self, texts, results, config):
+        memory = self.memory  # not an own job: finishes even if the dialog closes
+        self.jobs.submit('memory', self.lang.get('suggestion'), lambda job: memory.add(zip(texts, results), config))
+    
+    def suggestion_source(self, row):
+        """The value, or for PO the msgid while the entry is untranslated"""
+        value = self.table.item(row, 1)
+        text = value.text() if value else ''
+        if not text and self.file_type == '.po' and self.table.item(row, 0):
+            text = self.table.item(row, 0).text()
+        return text
+    
+    def schedule_suggestions(self):
+        if self.suggest_col is not None and not self.suggest_timer.isActive():
+            self.suggest_timer.start(self.SUGGEST_DELAY)
+    
+    def fill_suggestions(self):
+        """Look up suggestions for the rows on screen that have not had one yet"""
+        if self.tree_mode() or not self.table.rowCount():
+            return
+        top = max(self.table.rowAt(0), 0)
+        bottom = self.table.rowAt(self.table.viewport().height() - 1)
+        bottom = self.table.rowCount() - 1 if bottom < 0 else bottom
+        rows = []
+        for row in range(top, bottom + 1):
+            if self.table.isRowHidden(row) or self.table.item(row, self.suggest_col) is not None:
+                continue
+            item = QTableWidgetItem('')
+            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            self.table.setItem(row, self.suggest_col, item)
+            text = self.suggestion_source(row)
+            if text:
+                rows.append((row, text))
+        if not rows:
+            return
+        memory, k = self.memory, self.SUGGESTIONS
+        
+        def work(job):
+            results = []
+            for row, text in rows:
+                job.check()
+                results.append((row, text, memory.suggest(text, k)))
+            return results
+        
+        self.submit('memory', self.lang.get('suggestion'), work, on_done=self.show_suggestions)
+    
+    def show_suggestions(self, results):
+        for row, text, matches in results:
+            item = self.table.item(row, self.suggest_col) if row < self.table.rowCount() else None
+            if item is None or not matches or self.suggestion_source(row) != text:
+                continue
+            item.setText(matches[0][2])
+            item.setToolTip('\n'.join(f"{score:.0%}  {source} \u2192 {target}" for score, source, target in matches))
+    
+    def use_suggestion(self, row, col):
+        """Double-clicking a suggestion copies it into the value column"""
+        item = self.table.item(row, col)
+        if col != self.suggest_col or self.busy or item is None or not item.text():
+            return
+        value = self.table.item(row, 1)
+        old = value.text()
+        value.setText(item.text())
+        self.record([(row, 1, old, item.text())], 'suggestion')
+    
+    def apply_processed(self, cells, results):
+        deltas = [(row, col, self.table.item(row, col).text(), text) for (row, col), text in zip(cells, results)]
+        self.table.setUpdatesEnabled(False)
+        for row, col, old, text in deltas:
+            self.table.item(row, col).setText(text)
+        self.table.setUpdatesEnabled(True)
+        self.record(deltas, 'process')
+        self.set_busy(False)
+    
+    def apply_tree_processed(self, items, results):
+        deltas = [(self.node_paths[item.data(0, Qt.UserRole)], 1, item.text(1), text) for item, text in zip(items, results)]
+        self._replaying = True  # recorded below as one transaction
+        for item, text in zip(items, results):
+            item.setText(1, text)
+        self._replaying = False
+        self.record(deltas, 'process')
+        self.set_busy(False)
+    
+    # Undo/redo: the journal holds (ref, column, old, new) deltas, ref being a table row or a tree path
+    def record(self, deltas, label):
+        if self.journal.record(deltas, label):
+            self.update_undo_buttons()
+    
+    def update_undo_buttons(self):
+        self.undo_btn.setEnabled(not self.busy and self.journal.can_undo())
+        self.redo_btn.setEnabled(not self.busy and self.journal.can_redo())
+    
+    def undo(self):
+        if not self.busy:
+            self.replay(self.journal.undo())
+    
+    def redo(self):
+        if not self.busy:
+            self.replay(self.journal.redo())
+    
+    def replay(self, entry):
+        """Write journal values back to the table, and to the data/tree once the tree exists"""
+        if entry is None:
+            return
+        label, changes = entry
+        rows = paths = items = None
+        self._replaying = True
+        self.table.setUpdatesEnabled(False)
+        for ref, col, text in changes:
+            if isinstance(ref, tuple):  # edited in the tree
+                if rows is None:
+                    rows = {path: row for row, path in enumerate(self.row_paths)}
+                row, path = rows.get(ref), ref
+            else:
+                row, path = ref, (self.row_paths[ref] if col == 1 and ref < len(self.row_paths) else None)
+            item = self.table.item(row, col) if row is not None else None
+            if item is not None:
+                item.setText(text)
+            if path is not None and self.tree_built:
+                if items is None:
+                    items = {self.node_paths[i.data(0, Qt.UserRole)]: i for i in self.tree_items()}
+                if path in items:
+                    items[path].setText(1, text)  # on_tree_item_changed updates self.data
+                else:
+                    self.set_at_path(path, text)
+                    self.tree_dirty = True
+        self.table.setUpdatesEnabled(True)
+        self._replaying = False
+        self.update_undo_buttons()
     
     def save_file(self):
-        try:
-            if self.file_type == '.po':
-                self.save_po()
-            elif self.file_type == '.json':
-                self.save_json()
-            elif self.file_type in ['.yaml', '.yml']:
-                self.save_yaml()
-            elif self.file_type == '.xml':
-                self.save_xml()
-            
-            QMessageBox.information(self, 'Success', 'File saved')
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to save: {str(e)}')
+        savers = {'.po': self.save_po, '.json': self.save_json, '.yaml': self.save_yaml, '.yml': self.save_yaml, '.xml': self.save_xml,
+                  '.csv': self.save_csv, '.tsv': self.save_csv}
+        saver = savers.get(self.file_type)
+        if saver is None:
+            return
+        rows = None if self.tree_mode() else self.table_rows()  # tree edits are already in self.data
+        self.set_busy(True)
+        self.submit('save', f"{self.lang.get('saving')} {os.path.basename(self.filepath)}", lambda job: saver(rows),
+                    on_done=self.on_saved,
+                    on_error=lambda e: self.on_failed(f'Failed to save: {e}'))
     
-    def save_po(self):
-        for row in range(self.table.rowCount()):
-            msgid = self.table.item(row, 0).text()
-            msgstr = self.table.item(row, 1).text()
-            comment = self.table.item(row, 2).text()
-            fuzzy = self.table.cellWidget(row, 3).isChecked()
-            
-            for entry in self.data:
-                if entry.msgid == msgid:
-                    entry.msgstr = msgstr
-                    entry.comment = comment
-                    if fuzzy and 'fuzzy' not in entry.flags:
-                        entry.flags.append('fuzzy')
-                    elif not fuzzy and 'fuzzy' in entry.flags:
-                        entry.flags.remove('fuzzy')
-                    break
+    def on_saved(self, result):
+        self.set_busy(False)
+        QMessageBox.information(self, 'Success', 'File saved')
+    
+    # Savers run in a worker thread on a snapshot of the table rows (None: save self.data as is)
+    def save_po(self, rows):
+        if self.data is None:
+            self.data = polib.pofile(self.filepath)
+        entries = {}
+        for entry in self.data:
+            entries.setdefault(entry.msgid, entry)
+        for msgid, msgstr, comment, fuzzy in rows:
+            entry = entries.get(msgid)
+            if entry is not None:
+                entry.msgstr = msgstr
+                entry.comment = comment
+                if fuzzy and 'fuzzy' not in entry.flags:
+                    entry.flags.append('fuzzy')
+                elif not fuzzy and 'fuzzy' in entry.flags:
+                    entry.flags.remove('fuzzy')
         
         self.data.save(self.filepath)
     
-    def save_json(self):
+    def save_json(self, rows):
         # Rebuild dict from table
-        new_data = {}
-        for row in range(self.table.rowCount()):
-            key = self.table.item(row, 0).text()
-            value = self.table.item(row, 1).text()
+        new_data = self.data if rows is None else {}
+        for key, value, comment in rows or ():
             self.set_nested(new_data, key, value)
         
         with open(self.filepath, 'w', encoding='utf-8') as f:
             json.dump(new_data, f, ensure_ascii=False, indent=2)
     
-    def save_yaml(self):
-        new_data = {}
-        for row in range(self.table.rowCount()):
-            key = self.table.item(row, 0).text()
-            value = self.table.item(row, 1).text()
+    def save_yaml(self, rows):
+        new_data = self.data if rows is None else {}
+        for key, value, comment in rows or ():
             self.set_nested(new_data, key, value)
         
         with open(self.filepath, 'w', encoding='utf-8') as f:
             yaml.dump(new_data, f, allow_unicode=True, default_flow_style=False)
     
-    def save_xml(self):
+    def save_xml(self, rows):
         # Update XML tree from table
-        for row in range(self.table.rowCount()):
-            key = self.table.item(row, 0).text()
-            value = self.table.item(row, 1).text()
-            
+        for key, value, comment in rows or ():
             if '@' in key:  # Attribute
                 tag, attr = key.rsplit('[@', 1)
                 attr = attr.rstrip(']')
@@ -326,6 +915,14 @@ class UniversalFileEditor(QDialog):
         tree = ET.ElementTree(self.data)
         tree.write(self.filepath, encoding='utf-8', xml_declaration=True)
     
+    def save_csv(self, rows):
+        header = self.csv_header
+        delimiter, terminator = self.csv_format
+        with open(self.filepath, 'w', encoding=CsvProcessor.encoding(self.filepath), newline='') as f:
+            writer = csv.writer(f, delimiter=delimiter, lineterminator=terminator)
+            writer.writerow(header)
+            writer.writerows(rows)
+    
     def set_nested(self, data, key, value):
         """Set nested dict value from dotted key"""
         parts = key.replace('[', '.').replace(']', '').split('.')
@@ -363,11 +960,269 @@ class UniversalFileEditor(QDialog):
                 return None
         return current
 
+class FindReplaceDialog(QDialog):
+    """Find & Replace on the input text: one literal pair, or a whole glossary in a single scan"""
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.main = parent
+        self.lang = lang = parent.lang
+        self.glossary = None
+        self.setWindowTitle(lang.get('find_replace'))
+        
+        layout = QVBoxLayout()
+        form = QFormLayout()
+        self.find_input = QLineEdit()
+        form.addRow(lang.get('find') + ':', self.find_input)
+        self.replace_input = QLineEdit()
+        form.addRow(lang.get('replace') + ':', self.replace_input)
+        layout.addLayout(form)
+        
+        replace_btn = QPushButton(lang.get('replace_all'))
+        replace_btn.clicked.connect(self.replace_all)
+        layout.addWidget(replace_btn)
+        
+        group = QGroupBox(lang.get('glossary'))
+        group_layout = QHBoxLayout(group)
+        self.glossary_label = QLabel(f"{len(parent.db.get_glossary())} {lang.get('terms')}")
+        group_layout.addWidget(self.glossary_label)
+        group_layout.addStretch()
+        load_btn = QPushButton(lang.get('load_glossary'))
+        load_btn.clicked.connect(self.load_glossary)
+        group_layout.addWidget(load_btn)
+        self.import_btn = QPushButton(lang.get('import_glossary'))
+        self.import_btn.clicked.connect(self.import_glossary)
+        self.import_btn.setEnabled(False)
+        group_layout.addWidget(self.import_btn)
+        apply_btn = QPushButton(lang.get('apply_glossary'))
+        apply_btn.clicked.connect(self.apply_glossary)
+        group_layout.addWidget(apply_btn)
+        layout.addWidget(group)
+        
+        close_btn = QPushButton(lang.get('close'))
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn)
+        self.setLayout(layout)
+    
+    def replace_all(self):
+        text = self.main.txt_input.toPlainText()
+        result = TextProcessor.find_replace(text, self.find_input.text(), self.replace_input.text())
+        if result != text:
+            self.main.txt_input.setPlainText(result)
+    
+    def load_glossary(self):
+        fn, _ = QFileDialog.getOpenFileName(self, self.lang.get('load_glossary'), '', 'Glossary (*.tsv *.txt *.csv *.json *.po)')
+        if fn:
+            try:
+                self.glossary = Glossary.from_file(fn)
+                self.glossary_label.setText(f"{os.path.basename(fn)}: {len(self.glossary)} {self.lang.get('terms')}")
+                self.import_btn.setEnabled(True)
+            except Exception as e:
+                QMessageBox.critical(self, 'Error', str(e))
+    
+    def import_glossary(self):
+        if self.glossary and self.main.db.add_glossary_terms(list(self.glossary.terms.items())):
+            self.glossary_label.setText(f"{len(self.main.db.get_glossary())} {self.lang.get('terms')}")
+            self.glossary = None
+            self.import_btn.setEnabled(False)
+    
+    def apply_glossary(self):
+        """Apply the loaded glossary (or the database one) to the input in a worker"""
+        glossary = self.glossary or Glossary.from_db(self.main.db)
+        text = self.main.txt_input.toPlainText()
+        self.main.jobs.submit('process', self.lang.get('glossary'), lambda job: glossary.apply(text),
+                              on_done=lambda result: result != text and self.main.txt_input.setPlainText(result))
+
+class RegexDialog(QDialog):
+    """Live regex highlighting on the input. The pattern runs in the RegexSearch worker
+    process over the visible text plus a margin, and matches are highlighted as they stream in."""
+    MARGIN = 20_000  # characters searched beyond each edge of the viewport
+    MAX_VIEW = 200_000  # cap on the viewport span while the layout is still incomplete
+    MAX_HIGHLIGHTS = 2_000
+    DEBOUNCE_MS = 150
+    
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.main = parent
+        self.lang = lang = parent.lang
+        self.editor = parent.txt_input
+        self.version = 0  # bumped on every input edit; the worker keeps one copy per version
+        self.window = None  # (start, end) searched for the current pattern, UTF-16 positions
+        self.selections = []
+        self.count = 0
+        self.setWindowTitle(lang.get('regex'))
+        
+        layout = QVBoxLayout()
+        form = QFormLayout()
+        self.pattern_input = QLineEdit()
+        self.pattern_input.textChanged.connect(self.schedule)
+        form.addRow(lang.get('pattern'), self.pattern_input)
+        layout.addLayout(form)
+        self.status_label = QLabel('')
+        layout.addWidget(self.status_label)
+        
+        btn_layout = QHBoxLayout()
+        self.apply_btn = QPushButton(lang.get('apply'))
+        self.apply_btn.clicked.connect(self.apply)
+        btn_layout.addWidget(self.apply_btn)
+        btn_layout.addStretch()
+        close_btn = QPushButton(lang.get('close'))
+        close_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+        
+        self.highlight = QTextCharFormat()
+        self.highlight.setBackground(QColor('#ffd54f'))
+        self.highlight.setForeground(QColor('#000000'))
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.evaluate)
+        self.editor.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        self.editor.document().contentsChanged.connect(self.on_text_changed)
+    
+    def schedule(self):
+        if self.isVisible():
+            self.timer.start(self.DEBOUNCE_MS)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.window = None
+        self.schedule()
+    
+    def hideEvent(self, event):
+        """The dialog is reused: stop searching and drop the highlights until it is shown again"""
+        self.timer.stop()
+        self.main.jobs.cancel_kind('search')
+        self.clear_highlights()
+        self.status_label.setText('')
+        self.apply_btn.setEnabled(True)
+        super().hideEvent(event)
+    
+    def on_text_changed(self):
+        self.version += 1
+        self.window = None
+        self.schedule()
+    
+    def on_scroll(self):
+        start, end = self.visible_range()
+        if self.window is None or start < self.window[0] or end > self.window[1]:
+            self.schedule()
+    
+    def visible_range(self):
+        """(start, end) of the blocks at the top and bottom of the viewport; whole blocks,
+        since hit-testing x is unreliable in right-to-left lines"""
+        viewport = self.editor.viewport()
+        top = self.editor.cursorForPosition(QPoint(viewport.width() // 2, 0)).block()
+        bottom = self.editor.cursorForPosition(QPoint(viewport.width() // 2, viewport.height() - 1)).block()
+        if top.blockNumber() > bottom.blockNumber():  # layout still in progress
+            top, bottom = bottom, top
+        return top.position(), bottom.position() + bottom.length() - 1
+    
+    def document(self):
+        """(id, text) of the input; main window keeps the text current for its stats"""
+        return (id(self), self.version), self.main.input_text()
+    
+    def clear_highlights(self):
+        self.selections = []
+        self.count = 0
+        self.editor.setExtraSelections([])
+    
+    def evaluate(self):
+        """Search the viewport window; a newer evaluation cancels the running one"""
+        self.clear_highlights()
+        pattern = self.pattern_input.text()
+        if not pattern:
+            self.main.jobs.cancel_kind('search')
+            self.window = None
+            self.status_label.setText('')
+            return
+        first, last = self.visible_range()
+        last = min(last, first + self.MAX_VIEW)
+        start, end = max(0, first - self.MARGIN), min(self.editor.document().characterCount() - 1, last + self.MARGIN)
+        self.window = (start, end)
+        text_id, text = self.document()
+        search = self.main.regex
+        
+        def work(job):
+            try:
+                for batch in search.search(text_id, lambda: text, pattern, start=start, end=end, check=job.check):
+                    job.emit_partial(batch)
+            except RegexTimeout:
+                return self.lang.get('regex_timeout')
+            except re.error as e:
+                return str(e)
+            return None
+        
+        self.status_label.setText('...')
+        self.main.jobs.submit('search', self.lang.get('regex'), work, on_partial=self.add_matches,
+                              on_done=self.on_searched, replace=True)
+    
+    def add_matches(self, spans):
+        self.count += len(spans)
+        room = self.MAX_HIGHLIGHTS - len(self.selections)
+        for start, end in spans[:max(room, 0)]:
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(self.editor.document())
+            selection.cursor.setPosition(start)
+            selection.cursor.setPosition(end, QTextCursor.KeepAnchor)
+            selection.format = self.highlight
+            self.selections.append(selection)
+        if room > 0:
+            self.editor.setExtraSelections(self.selections)
+        self.status_label.setText(f"{self.count} {self.lang.get('matches')} ...")
+    
+    def on_searched(self, error):
+        if error:
+            self.window = None
+            self.status_label.setText(error)
+        else:
+            self.status_label.setText(f"{self.count} {self.lang.get('matches')}")
+    
+    def apply(self):
+        """Encode every match in the whole input into the output pane"""
+        pattern = self.pattern_input.text()
+        if not pattern:
+            return
+        text_id, text = self.document()
+        search = self.main.regex
+        exceptions = self.main.db.get_exception_patterns()
+        profile = self.main.db.get('normalize_profile', '')
+        
+        def work(job):
+            matches = []
+            try:
+                for batch in search.search(text_id, lambda: text, pattern, spans=False, check=job.check,
+                                           timeout=search.TIMEOUT + len(text) / 5_000_000):
+                    matches.extend(batch)
+                    job.emit_partial(len(matches))
+            except RegexTimeout:
+                raise ValueError(self.lang.get('regex_timeout'))
+            return TextProcessor.encode_text('\n'.join(matches), exceptions, profile) if matches else ''
+        
+        self.apply_btn.setEnabled(False)
+        self.main.jobs.submit('search', self.lang.get('apply'), work,
+                              on_partial=lambda n: self.status_label.setText(f"{n} {self.lang.get('matches')} ..."),
+                              on_done=self.on_applied, on_error=self.on_apply_failed, replace=True)
+    
+    def on_applied(self, result):
+        self.apply_btn.setEnabled(True)
+        self.main.set_output(result)
+        self.schedule()
+    
+    def on_apply_failed(self, error):
+        self.apply_btn.setEnabled(True)
+        self.status_label.setText(error)
+
 class HarfnegarGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.db = DatabaseManager()
         self.lang = LanguageManager(self.db)
+        self.jobs = JobManager(self)
+        self.subtitles = None  # kept between runs so unchanged cue lines hit its cache
+        self.memory = TranslationMemory(self.db)
+        self.regex = RegexSearch()  # its worker process starts on the first search
+        self.regex_dialog = None
         self.zoom_level = 0
         self.history = []
         
@@ -380,10 +1235,25 @@ class HarfnegarGUI(QMainWindow):
         self.input_timer.setSingleShot(True)
         self.input_timer.timeout.connect(self.process_input)
         
+        self._updating = False
+        self._output_text = ''  # what set_output() last wrote; None once the user edits the output
+        self._output_blocks = 1
+        self._input_mirrors_output = False  # input == decode(output), so edits can sync block by block
+        self.output_chunks = deque()
+        self.output_cursor = None
+        self.output_total = 0
+        self.output_timer = QTimer()
+        self.output_timer.timeout.connect(self.insert_output_chunk)
+        
         self.copy_timer = QTimer()
         self.copy_timer.setSingleShot(True)
         self.copy_timer.timeout.connect(self.delayed_copy)
         
+        self.pending_memory = None  # (text, result, config) of the latest result, not yet remembered
+        self.memory_timer = QTimer()
+        self.memory_timer.setSingleShot(True)
+        self.memory_timer.timeout.connect(self.remember_result)
+        
         self.clipboard_timer = QTimer()
         self.clipboard_timer.timeout.connect(self.monitor_clipboard)
         self.clipboard_timer.start(1000)
@@ -407,13 +1277,16 @@ class HarfnegarGUI(QMainWindow):
         main_layout = QVBoxLayout(central)
         
         main_layout.addWidget(QLabel(self.lang.get('input')))
-        self.txt_input = QTextEdit()
+        self.txt_input = QPlainTextEdit()
         self.txt_input.textChanged.connect(self.on_input_change)
+        self.input_stats = TextStats()
+        self._stats_text = ''
+        self.txt_input.document().contentsChange.connect(self.on_input_contents_change)
         main_layout.addWidget(self.txt_input, 1)
         
         main_layout.addWidget(QLabel(self.lang.get('output')))
-        self.txt_output = QTextEdit()
-        self.txt_output.textChanged.connect(self.on_output_change)
+        self.txt_output = QPlainTextEdit()
+        self.txt_output.document().contentsChange.connect(self.on_output_contents_change)
         main_layout.addWidget(self.txt_output, 1)
         
         ctrl_layout = QHBoxLayout()
@@ -436,10 +1309,16 @@ class HarfnegarGUI(QMainWindow):
         main_layout.addLayout(ctrl_layout)
         
         self.status = self.statusBar()
+        self.output_progress = QProgressBar()
+        self.output_progress.setMaximumWidth(150)
+        self.output_progress.hide()
+        self.status.addPermanentWidget(self.output_progress)
         self.char_label = QLabel(f"0 {self.lang.get('chars')}")
         self.status.addPermanentWidget(self.char_label)
         self.word_label = QLabel(f"0 {self.lang.get('words')}")
         self.status.addPermanentWidget(self.word_label)
+        self.job_button = JobStatusButton(self.jobs, self.lang)
+        self.status.addPermanentWidget(self.job_button)
         
         self.create_menu()
     
@@ -479,6 +1358,11 @@ class HarfnegarGUI(QMainWindow):
         tools_menu.addAction(self.lang.get('json_editor'), lambda: self.open_file_editor('.json'))
         tools_menu.addAction(self.lang.get('yaml_editor'), lambda: self.open_file_editor('.yaml'))
         tools_menu.addAction(self.lang.get('xml_editor'), lambda: self.open_file_editor('.xml'))
+        tools_menu.addAction(self.lang.get('csv_editor'), lambda: self.open_file_editor('.csv'))
+        tools_menu.addSeparator()
+        utilities_menu = tools_menu.addMenu(self.lang.get('utilities'))
+        utilities_menu.addAction(self.lang.get('find_replace'), lambda: FindReplaceDialog(self).exec())
+        utilities_menu.addAction(self.lang.get('regex'), self.show_regex)
         tools_menu.addSeparator()
         tools_menu.addAction(self.lang.get('font'), self.font_settings)
         tools_menu.addSeparator()
@@ -504,6 +1388,17 @@ class HarfnegarGUI(QMainWindow):
             if current_theme == theme:
                 action.setChecked(True)
         
+        normalize_menu = tools_menu.addMenu(self.lang.get('normalize'))
+        self.normalize_group = QActionGroup(self)
+        current_profile = self.db.get('normalize_profile', '')
+        for profile in [''] + Normalizer.profiles():
+            action = QAction(self.lang.get(f'normalize_{profile}' if profile else 'off'), self, checkable=True)
+            action.triggered.connect(lambda checked, p=profile: self.set_normalize_profile(p))
+            self.normalize_group.addAction(action)
+            normalize_menu.addAction(action)
+            if current_profile == profile:
+                action.setChecked(True)
+        
         help_menu = menubar.addMenu(self.lang.get('help'))
         help_menu.addAction(self.lang.get('about'), self.show_about)
     
@@ -544,49 +1439,184 @@ class HarfnegarGUI(QMainWindow):
         
         # Apply to text edits
         if theme == 'dark':
-            self.txt_input.setStyleSheet("QTextEdit { background-color: #2b2b2b; color: white; }")
-            self.txt_output.setStyleSheet("QTextEdit { background-color: #2b2b2b; color: white; }")
+            self.txt_input.setStyleSheet("QPlainTextEdit { background-color: #2b2b2b; color: white; }")
+            self.txt_output.setStyleSheet("QPlainTextEdit { background-color: #2b2b2b; color: white; }")
         else:
-            self.txt_input.setStyleSheet("QTextEdit { background-color: white; color: black; }")
-            self.txt_output.setStyleSheet("QTextEdit { background-color: #f5fff5; color: black; }")
+            self.txt_input.setStyleSheet("QPlainTextEdit { background-color: white; color: black; }")
+            self.txt_output.setStyleSheet("QPlainTextEdit { background-color: #f5fff5; color: black; }")
     
     def set_theme(self, theme):
         self.db.set('theme', theme)
         self.apply_theme()
     
+    def set_normalize_profile(self, profile):
+        self.db.set('normalize_profile', profile)
+        self.process_input()
+    
+    def show_regex(self):
+        if self.regex_dialog is None:
+            self.regex_dialog = RegexDialog(self)
+        self.regex_dialog.show()
+        self.regex_dialog.raise_()
+        self.regex_dialog.activateWindow()
+    
+    def input_text(self):
+        """The input as of the last edit, without copying it out of the editor again"""
+        return self._stats_text
+    
+    def on_input_contents_change(self, pos, removed, added):
+        """Keep status bar counts live from the edit delta instead of rescanning"""
+        text = self.txt_input.toPlainText()
+        if self.txt_input.document().characterCount() - 1 != len(text):
+            self.input_stats.reset(text)  # Qt positions are UTF-16, off for non-BMP chars
+        else:
+            self.input_stats.update(self._stats_text, text, pos, removed, added)
+        self._stats_text = text
+        self.char_label.setText(f"{self.input_stats.chars} {self.lang.get('chars')}")
+        self.word_label.setText(f"{self.input_stats.words} {self.lang.get('words')}")
+    
     def on_input_change(self):
-        if hasattr(self, '_updating') and self._updating:
+        if self._updating:
             return
-        text = self.txt_input.toPlainText()
-        self.char_label.setText(f"{len(text)} {self.lang.get('chars')}")
-        words = len(text.split()) if text.strip() else 0
-        self.word_label.setText(f"{words} {self.lang.get('words')}")
+        self._input_mirrors_output = False
         self.input_timer.stop()
         self.input_timer.start(100)
     
     def process_input(self):
-        self._updating = True
         text = self.txt_input.toPlainText()
         if text:
             exceptions = self.db.get_exception_patterns()
-            result = TextProcessor.encode_text(text, exceptions)
-            self.txt_output.setPlainText(result)
-            
-            if self.auto_copy_cb.isChecked():
-                self.pending_copy = result
-                self.copy_timer.stop()
-                self.copy_timer.start(500)
-            
-            if self.db.get_bool('auto_save', True):
-                try:
-                    self.db.add_history(text, result)
-                    self.history = self.db.get_history(10)
-                    self.update_recent_menu()
-                except:
-                    pass
+            profile = self.db.get('normalize_profile', '')
+            if SubtitleProcessor.detect(text):
+                if not self.subtitles or (self.subtitles.exceptions, self.subtitles.profile) != (exceptions, profile):
+                    self.subtitles = SubtitleProcessor(exceptions, profile)
+                encode = lambda job, subtitles=self.subtitles: subtitles.apply(text)
+                config = None  # cue by cue, not the same as shaping the text: fuzzy suggestions only
+            else:
+                encode = lambda job: TextProcessor.encode_text(text, exceptions, profile)
+                config = self.memory.config_key(exceptions, profile)
+            self.jobs.submit('process', self.lang.get('processing'), encode,
+                             on_done=lambda result: self.show_result(text, result, config), replace=True)
         else:
-            self.txt_output.clear()
+            self.jobs.cancel_kind('process')
+            self.set_output('')
+    
+    def show_result(self, text, result, config=None):
+        self._input_mirrors_output = False
+        self.set_output(result)
+        
+        if self.auto_copy_cb.isChecked():
+            self.pending_copy = result
+            self.copy_timer.stop()
+            self.copy_timer.start(500)
+        
+        if self.db.get_bool('auto_save', True):
+            try:
+                self.db.add_history(text, result)
+                self.history = self.db.get_history(10)
+                self.update_recent_menu()
+            except:
+                pass
+            self.pending_memory = (text, result, config)
+            self.memory_timer.start(self.MEMORY_DELAY)
+    
+    MEMORY_DELAY = 3000  # ms a result must stay unchanged before it goes into the translation memory
+    
+    def remember_result(self):
+        """Remember the settled result in the background, so the prefixes typed on the way
+        to it never reach the memory"""
+        if self.pending_memory is None:
+            return
+        text, result, config = self.pending_memory
+        self.pending_memory = None
+        memory = self.memory
+        self.jobs.submit('memory', self.lang.get('suggestion'), lambda job: memory.add([(text, result)], config))
+    
+    OUTPUT_CHUNK = 256 * 1024  # characters inserted per event loop turn
+    
+    def set_output(self, result):
+        """Rewrite only the lines that differ from the current output. Large replacements
+        are inserted a chunk at a time behind a progress bar."""
+        if self.output_chunks:  # previous result only partly inserted
+            self._output_text = None
+        self.output_timer.stop()
+        self.output_chunks.clear()
+        old = self._output_text if self._output_text is not None else self.txt_output.toPlainText()
+        self._output_text = result
+        if old == result:
+            return self.finish_output()
+        old_lines, new_lines = old.split('\n'), result.split('\n')
+        limit = min(len(old_lines), len(new_lines))
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+        old_end, new_end = len(old_lines) - suffix, len(new_lines) - suffix
+        middle = '\n'.join(new_lines[prefix:new_end])
+        del old_lines, new_lines
+        
+        # Replace lines [prefix, old_end) of the document, newline separators included
+        doc = self.txt_output.document()
+        cursor = QTextCursor(doc)
+        if prefix == old_end:  # pure insertion
+            if prefix < doc.blockCount():
+                cursor.setPosition(doc.findBlockByNumber(prefix).position())
+                middle += '\n'
+            else:
+                cursor.movePosition(QTextCursor.End)
+                middle = '\n' + middle
+        elif prefix == new_end:  # pure deletion
+            if old_end < doc.blockCount():
+                cursor.setPosition(doc.findBlockByNumber(prefix).position())
+                cursor.setPosition(doc.findBlockByNumber(old_end).position(), QTextCursor.KeepAnchor)
+            else:
+                block = doc.findBlockByNumber(prefix - 1)
+                cursor.setPosition(block.position() + block.length() - 1)
+                cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        else:
+            last = doc.findBlockByNumber(old_end - 1)
+            cursor.setPosition(doc.findBlockByNumber(prefix).position())
+            cursor.setPosition(last.position() + last.length() - 1, QTextCursor.KeepAnchor)
+        
+        self._updating = True
+        doc.setUndoRedoEnabled(False)  # like setPlainText: programmatic output has no undo history
+        cursor.removeSelectedText()
         self._updating = False
+        pos = 0
+        while pos < len(middle):
+            cut = middle.find('\n', pos + self.OUTPUT_CHUNK)
+            cut = len(middle) if cut < 0 else cut
+            self.output_chunks.append(middle[pos:cut])
+            pos = cut
+        self.output_cursor = cursor
+        self.output_total = len(self.output_chunks)
+        if self.output_total > 1:
+            self.txt_output.setReadOnly(True)
+            self.output_progress.setRange(0, self.output_total)
+            self.output_progress.setValue(0)
+            self.output_progress.show()
+        self.insert_output_chunk()
+        if self.output_chunks:
+            self.output_timer.start(0)
+    
+    def insert_output_chunk(self):
+        if self.output_chunks:
+            self._updating = True
+            self.output_cursor.insertText(self.output_chunks.popleft())
+            self._updating = False
+            self.output_progress.setValue(self.output_total - len(self.output_chunks))
+        if not self.output_chunks:
+            self.output_timer.stop()
+            self.finish_output()
+    
+    def finish_output(self):
+        self.output_cursor = None
+        self.output_progress.hide()
+        self.txt_output.setReadOnly(False)
+        self.txt_output.document().setUndoRedoEnabled(True)
+        self._output_blocks = self.txt_output.document().blockCount()
     
     def delayed_copy(self):
         if self.pending_copy and self.auto_copy_cb.isChecked():
@@ -594,14 +1624,38 @@ class HarfnegarGUI(QMainWindow):
                 pyperclip.copy(self.pending_copy)
             except: pass
     
-    def on_output_change(self):
-        if hasattr(self, '_updating') and self._updating:
+    def on_output_contents_change(self, pos, removed, added):
+        """Mirror a manual output edit into the input. decode_text reverses the whole text,
+        line order included, so output block i is input block (count - 1 - i); once the
+        input mirrors the output only the edited blocks are rewritten."""
+        doc = self.txt_output.document()
+        old_count, self._output_blocks = self._output_blocks, doc.blockCount()
+        if self._updating:
             return
+        self._output_text = None
+        if doc.isEmpty():
+            self._input_mirrors_output = False
+            return
+        input_doc = self.txt_input.document()
         self._updating = True
-        text = self.txt_output.toPlainText()
-        if text:
-            result = TextProcessor.decode_text(text)
-            self.txt_input.setPlainText(result)
+        if not self._input_mirrors_output or input_doc.blockCount() != old_count:
+            self.txt_input.setPlainText(TextProcessor.decode_text(self.txt_output.toPlainText()))
+            self._input_mirrors_output = True
+            self._updating = False
+            return
+        count = doc.blockCount()
+        first = doc.findBlock(pos).blockNumber()
+        last = doc.findBlock(pos + added).blockNumber()
+        if last < 0:
+            last = count - 1
+        old_last = last - (count - old_count)
+        lines = [doc.findBlockByNumber(i).text() for i in range(first, last + 1)]
+        start = input_doc.findBlockByNumber(old_count - 1 - old_last)
+        end = input_doc.findBlockByNumber(old_count - 1 - first)
+        cursor = QTextCursor(input_doc)
+        cursor.setPosition(start.position())
+        cursor.setPosition(end.position() + end.length() - 1, QTextCursor.KeepAnchor)
+        cursor.insertText(TextProcessor.decode_text('\n'.join(lines)))
         self._updating = False
     
     def force_process(self):
@@ -609,27 +1663,54 @@ class HarfnegarGUI(QMainWindow):
     
     def clear_all(self):
         self.txt_input.clear()
-        self.txt_output.clear()
+        self.set_output('')
     
     def new_file(self):
         if QMessageBox.question(self, 'New', 'Create new?') == QMessageBox.Yes:
             self.clear_all()
     
     def open_file(self):
-        fn, _ = QFileDialog.getOpenFileName(self, 'Open', '', 'All Files (*.*);;PO (*.po);;JSON (*.json);;YAML (*.yaml *.yml);;XML (*.xml)')
+        fn, _ = QFileDialog.getOpenFileName(self, 'Open', '', 'All Files (*.*);;PO (*.po);;JSON (*.json);;YAML (*.yaml *.yml);;XML (*.xml);;Subtitles (*.srt *.vtt)')
         if fn:
             try:
                 ext = os.path.splitext(fn)[1].lower()
-                if ext in ['.po', '.json', '.yaml', '.yml', '.xml']:
+                if ext in ['.po', '.json', '.yaml', '.yml', '.xml', '.csv', '.tsv']:
                     UniversalFileEditor(self, self.lang, fn, self.db).exec()
+                elif ext == '.pdf':
+                    self.open_pdf(fn)
                 else:
-                    text = TextProcessor.read_file(fn)
-                    self.txt_input.setPlainText(text)
+                    self.jobs.submit('io', f"{self.lang.get('loading')} {os.path.basename(fn)}", lambda job: TextProcessor.read_file(fn),
+                                     on_done=self.txt_input.setPlainText,
+                                     on_error=lambda e: QMessageBox.critical(self, 'Error', e))
             except Exception as e:
                 QMessageBox.critical(self, 'Error', str(e))
     
+    def open_pdf(self, fn):
+        """Stream pages into the input in order as they are extracted"""
+        def work(job):
+            batch, first = [], True
+            for text in PdfExtractor.iter_pages(fn, progress=lambda done, total: job.report(done * 100 // total), db=self.db):
+                batch.append(text)
+                if len(batch) >= 8:
+                    job.emit_partial((first, '\n'.join(batch)))
+                    batch, first = [], False
+            if batch or first:
+                job.emit_partial((first, '\n'.join(batch)))
+        
+        def on_pages(data):
+            first, text = data
+            if first:
+                self.txt_input.setPlainText(text)
+            else:
+                cursor = self.txt_input.textCursor()
+                cursor.movePosition(QTextCursor.End)
+                cursor.insertText('\n' + text)
+        
+        self.jobs.submit('io', f"{self.lang.get('loading')} {os.path.basename(fn)}", work, on_partial=on_pages,
+                         on_error=lambda e: QMessageBox.critical(self, 'Error', e))
+    
     def open_file_editor(self, ext):
-        filters = {'.po': 'PO (*.po)', '.json': 'JSON (*.json)', '.yaml': 'YAML (*.yaml *.yml)', '.xml': 'XML (*.xml)'}
+        filters = {'.po': 'PO (*.po)', '.json': 'JSON (*.json)', '.yaml': 'YAML (*.yaml *.yml)', '.xml': 'XML (*.xml)', '.csv': 'CSV (*.csv *.tsv)'}
         fn, _ = QFileDialog.getOpenFileName(self, 'Open', '', filters.get(ext, 'All (*.*)'))
         if fn:
             UniversalFileEditor(self, self.lang, fn, self.db).exec()
@@ -637,11 +1718,14 @@ class HarfnegarGUI(QMainWindow):
     def save_file(self):
         fn, _ = QFileDialog.getSaveFileName(self, 'Save', '', 'Text (*.txt);;HTML (*.html)')
         if fn:
-            try:
-                with open(fn, 'w', encoding='utf-8') as f:
-                    f.write(self.txt_output.toPlainText())
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', str(e))
+            text = self.txt_output.toPlainText()
+            self.jobs.submit('save', f"{self.lang.get('saving')} {os.path.basename(fn)}", lambda job: self.write_text(fn, text),
+                             on_error=lambda e: QMessageBox.critical(self, 'Error', e))
+    
+    @staticmethod
+    def write_text(fn, text):
+        with open(fn, 'w', encoding='utf-8') as f:
+            f.write(text)
     
     def undo(self):
         (self.txt_input if self.txt_input.hasFocus() else self.txt_output).undo()
@@ -714,14 +1798,13 @@ class HarfnegarGUI(QMainWindow):
             action.triggered.connect(lambda checked, t=inp: self.txt_input.setPlainText(t))
     
     def show_statistics(self):
-        text = self.txt_input.toPlainText()
-        lines = text.count('\n') + 1 if text else 0
-        chars = len(text)
-        words = len(text.split()) if text.strip() else 0
-        persian = sum(1 for c in text if TextProcessor.is_persian_arabic(c))
+        stats = self.input_stats
+        scripts = stats.scripts()
+        top = ' '.join(f"{c}:{n}" for c, n in stats.top(10))
         
         QMessageBox.information(self, self.lang.get('stats'),
-            f"Lines: {lines}\nWords: {words}\nChars: {chars}\nPersian/Arabic: {persian}"
+            f"Lines: {stats.lines}\nWords: {stats.words}\nChars: {stats.chars}\nPersian/Arabic: {scripts['persian_arabic']}\n"
+            f"Latin: {scripts['latin']}\nDigits: {scripts['digits']}\n\nTop: {top}"
         )
     
     def monitor_clipboard(self):
@@ -732,7 +1815,7 @@ class HarfnegarGUI(QMainWindow):
                     self.last_clipboard = text
                     if any(TextProcessor.is_persian_arabic(c) for c in text):
                         exceptions = self.db.get_exception_patterns()
-                        result = TextProcessor.encode_text(text, exceptions)
+                        result = TextProcessor.encode_text(text, exceptions, self.db.get('normalize_profile', ''))
                         pyperclip.copy(result)
             except: pass
     
@@ -750,6 +1833,14 @@ class HarfnegarGUI(QMainWindow):
         self.db.set('window_height', self.height())
         self.db.set('auto_copy', self.auto_copy_cb.isChecked())
         self.db.set('quick_mode', self.quick_action.isChecked())
+        self.memory_timer.stop()
+        if self.pending_memory is not None:
+            text, result, config = self.pending_memory
+            try: self.memory.add([(text, result)], config)
+            except: pass
+        self.jobs.cancel_all()
+        self.jobs.wait()
+        self.regex.close()
         self.db.close()
         event.accept()
 
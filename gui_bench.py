@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Harfnegar GUI Benchmarks v1.4.2 - Headless editor timings on generated fixtures
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0
+
+Drives UniversalFileEditor and HarfnegarGUI on the offscreen Qt platform and records wall
+time and tracemalloc peak (Python allocations only) for load, filter keystrokes, bulk
+process and save. Results whose time or peak exceed gui_bench_thresholds.json are reported
+as regressions and make the run exit with status 1.
+
+Usage: python gui_bench.py [--sizes 1000,10000,50000,200000] [--formats po,json] [--out results.json]
+                           [--no-trace] [--update-thresholds]"""
+import os, sys, json, time, random, argparse, platform, tempfile, tracemalloc
+from xml.etree import ElementTree as ET
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+THRESHOLDS = os.path.join(HERE, 'gui_bench_thresholds.json')
+SIZES = (1000, 10000)  # full sweep: --sizes 1000,10000,50000,200000 (tens of minutes with tracing)
+FORMATS = ('po', 'json', 'yaml', 'xml')
+HEADROOM = 2.0  # --update-thresholds writes measured values times this,
+FLOORS = {'secs': 0.1, 'peak_mb': 1.0}  # but never less than these, so tiny steps do not flap
+KEYSTROKES = 'key12'
+WORDS = ['سلام', 'دنیا', 'کتاب', 'می‌روم', 'خانه', 'Harfnegar', 'مدرسه', 'دوست']
+
+def sample_value(rnd, i):
+    return ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6))) + f" {i}"
+
+def make_po(path, n, rnd):
+    import polib
+    po = polib.POFile()
+    po.metadata = {'Content-Type': 'text/plain; charset=utf-8'}
+    for i in range(n):
+        po.append(polib.POEntry(msgid=f"key{i}", msgstr=sample_value(rnd, i) if i % 4 else '',
+                                flags=['fuzzy'] if i % 10 == 0 else []))
+    po.save(path)
+
+def nested(n, rnd):
+    """n leaves in sections of 50, every tenth section holding a list"""
+    data = {}
+    for i in range(n):
+        section = data.setdefault(f"section{i // 50}", [] if (i // 50) % 10 == 9 else {})
+        if isinstance(section, list):
+            section.append(sample_value(rnd, i))
+        else:
+            section[f"key{i}"] = sample_value(rnd, i)
+    return data
+
+def make_json(path, n, rnd):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(nested(n, rnd), f, ensure_ascii=False, indent=2)
+
+def make_yaml(path, n, rnd):
+    import yaml
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.dump(nested(n, rnd), f, allow_unicode=True, default_flow_style=False)
+
+def make_xml(path, n, rnd):
+    root = ET.Element('resources')
+    for i in range(n):
+        group = root[-1] if i % 50 else ET.SubElement(root, 'group', name=f"section{i // 50}")
+        item = ET.SubElement(group, f"key{i}")
+        item.text = sample_value(rnd, i)
+    ET.ElementTree(root).write(path, encoding='utf-8', xml_declaration=True)
+
+MAKERS = {'po': make_po, 'json': make_json, 'yaml': make_yaml, 'xml': make_xml}
+
+class Bench:
+    def __init__(self, trace=True, timeout=600):
+        from PySide6.QtWidgets import QApplication, QMessageBox
+        self.app = QApplication.instance() or QApplication([])
+        for name in ('information', 'warning', 'critical'):
+            setattr(QMessageBox, name, staticmethod(lambda *a, **k: None))
+        self.trace = trace
+        self.timeout = timeout
+        self.results = {}
+
+    def pump(self, cond):
+        end = time.perf_counter() + self.timeout
+        while not cond():
+            if time.perf_counter() > end:
+                raise TimeoutError('condition not reached')
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def measure(self, key, fn, cond=None, **extra):
+        """Run fn(), pump events until cond() holds, record seconds and Python peak MB"""
+        if self.trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            fn()
+            if cond is not None:
+                self.pump(cond)
+            secs = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] / 1e6 if self.trace else None
+        finally:
+            if self.trace:
+                tracemalloc.stop()
+        self.results[key] = dict(secs=round(secs, 4), peak_mb=None if peak is None else round(peak, 2), **extra)
+        print(f"{key:28s} secs={secs:8.3f}" + ('' if peak is None else f"  peak_mb={peak:8.2f}"))
+        sys.stdout.flush()
+
+    def run_editor(self, window, fmt, n, path):
+        from gui import UniversalFileEditor
+        prefix = f"{fmt}-{n}"
+        holder = {}
+        idle = lambda: holder['editor'].save_btn.isEnabled()
+        self.measure(f"{prefix}.load", lambda: holder.setdefault('editor', UniversalFileEditor(window, window.lang, path, window.db)),
+                     idle, rows=n)
+        editor = holder['editor']
+        start = time.perf_counter()
+        for i in range(1, len(KEYSTROKES) + 1):  # each keystroke filters synchronously
+            self.measure(f"{prefix}.filter.{i}", lambda i=i: editor.search_input.setText(KEYSTROKES[:i]))
+        self.results[f"{prefix}.filter"] = {'secs': round(time.perf_counter() - start, 4), 'peak_mb': None, 'keystrokes': len(KEYSTROKES)}
+        editor.search_input.setText('')
+        if fmt == 'po':  # Process All leaves translated PO entries alone; select everything instead
+            process = lambda: (editor.table.selectAll(), editor.process_selected())
+        else:
+            process = editor.process_all
+        self.measure(f"{prefix}.process", process, idle)
+        self.pump(lambda: not window.jobs.active())  # translation-memory writes run on after the results are shown
+        saved = []
+        editor.on_saved = lambda result: (editor.set_busy(False), saved.append(True))
+        self.measure(f"{prefix}.save", editor.save_file, lambda: saved)
+        editor.done(0)
+        editor.deleteLater()
+        self.app.processEvents()
+
+    def run_main(self, window, n, rnd):
+        """Input pane -> processed output, then a one-line edit of the same document"""
+        text = '\n'.join(sample_value(rnd, i) for i in range(n))
+        window.quick_action.setChecked(False)
+        done = lambda: not window.jobs.active() and not window.output_chunks and window.txt_output.document().characterCount() > 1
+        self.measure(f"main-{n}.process", lambda: (window.txt_input.setPlainText(text), window.input_timer.stop(), window.process_input()), done)
+        line = lambda: window.txt_output.document().findBlockByNumber(n // 2).text()
+        first = line()
+        edited = text.replace(f" {n // 2}\n", f" {n // 2} x\n", 1)
+        self.measure(f"main-{n}.edit", lambda: (window.txt_input.setPlainText(edited), window.input_timer.stop(), window.process_input()),
+                     lambda: done() and line() != first)
+
+    def run(self, sizes, formats):
+        workdir = tempfile.mkdtemp(prefix='harfnegar_gui_bench_')
+        cwd = os.getcwd()
+        os.chdir(workdir)  # the GUI opens its database in the working directory
+        try:
+            from gui import HarfnegarGUI
+            window = HarfnegarGUI()
+            window.clipboard_timer.stop()
+            for n in sizes:
+                for fmt in formats:
+                    path = os.path.join(workdir, f"bench_{n}.{fmt}")
+                    MAKERS[fmt](path, n, random.Random(n))
+                    self.run_editor(window, fmt, n, path)
+                self.run_main(window, n, random.Random(n))
+            window.close()
+        finally:
+            os.chdir(cwd)
+        return self.results
+
+def check(results, thresholds):
+    """Keys whose secs or peak_mb exceed their threshold"""
+    regressions = []
+    for key, limits in thresholds.items():
+        result = results.get(key)
+        if result is None:
+            continue
+        for metric in FLOORS:
+            if limits.get(metric) is not None and result.get(metric) is not None and result[metric] > limits[metric]:
+                regressions.append(f"{key}: {metric}={result[metric]} > {limits[metric]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Harfnegar GUI benchmarks (offscreen)')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help='Entries per fixture, comma separated')
+    parser.add_argument('--formats', default=','.join(FORMATS), help='Fixture formats: ' + ', '.join(FORMATS))
+    parser.add_argument('--out', default='gui_bench_results.json', help='Results file')
+    parser.add_argument('--no-trace', action='store_true', help='Skip tracemalloc (faster, no peak_mb)')
+    parser.add_argument('--update-thresholds', action='store_true', help=f'Write measured values x{HEADROOM} as the new thresholds')
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    formats = [f for f in args.formats.split(',') if f]
+    for fmt in formats:
+        if fmt not in MAKERS:
+            parser.error(f"Unknown format: {fmt}")
+
+    results = Bench(trace=not args.no_trace).run(sizes, formats)
+    thresholds = {}
+    if os.path.exists(THRESHOLDS):
+        with open(THRESHOLDS, encoding='utf-8') as f:
+            thresholds = json.load(f)
+    if args.update_thresholds:
+        for key, result in results.items():
+            thresholds[key] = {metric: round(max(result[metric] * HEADROOM, FLOORS[metric]), 3)
+                               if result.get(metric) is not None else None for metric in FLOORS}
+        with open(THRESHOLDS, 'w', encoding='utf-8') as f:
+            json.dump(thresholds, f, indent=1, sort_keys=True)
+    regressions = check(results, thresholds)
+
+    from PySide6 import __version__ as qt_version
+    meta = {'python': platform.python_version(), 'pyside6': qt_version, 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'trace': not args.no_trace, 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results, 'regressions': regressions}, f, indent=1)
+    for line in regressions:
+        print('REGRESSION ' + line)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Job Queue v1.4.2 - Background jobs for the GUI
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+from PySide6.QtWidgets import QToolButton, QMenu
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+class JobCancelled(Exception):
+    pass
+
+class Job(QObject):
+    """Handle for a submitted job. fn(job) runs in a worker thread and may call
+    job.report(percent) / job.check() to publish progress and honour cancellation."""
+    progress = Signal(int)
+    partial = Signal(object)
+    finished = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, kind, title, fn):
+        super().__init__()
+        self.kind = kind
+        self.title = title
+        self.fn = fn
+        self.percent = 0
+        self.cancelled = False
+        self.done = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def report(self, percent):
+        self.check()
+        self.percent = percent
+        self.progress.emit(percent)
+
+    def emit_partial(self, data):
+        self.check()
+        self.partial.emit(data)
+
+class _JobRunner(QRunnable):
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+    def run(self):
+        job = self.job
+        try:
+            job.check()
+            result = job.fn(job)
+            job.check()
+            job.finished.emit(result)
+        except JobCancelled:
+            job.failed.emit('')
+        except Exception as e:
+            job.failed.emit(str(e))
+
+class JobManager(QObject):
+    """Runs jobs on per-kind thread pools and delivers results on the UI thread"""
+    LIMITS = {'io': 2, 'process': 1, 'bulk': 1, 'search': 1, 'memory': 1, 'save': 1}
+    changed = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pools = {}
+        self.jobs = []
+        self.callbacks = {}
+
+    def pool(self, kind):
+        if kind not in self.pools:
+            pool = QThreadPool(self)
+            pool.setMaxThreadCount(self.LIMITS.get(kind, 1))
+            self.pools[kind] = pool
+        return self.pools[kind]
+
+    def submit(self, kind, title, fn, on_done=None, on_error=None, on_partial=None, replace=False):
+        """Queue fn(job) on the pool for kind. replace=True cancels older jobs of that kind."""
+        if replace:
+            self.cancel_kind(kind)
+        job = Job(kind, title, fn)
+        job.progress.connect(self._on_progress)
+        job.partial.connect(self._on_partial)
+        job.finished.connect(self._on_finished)
+        job.failed.connect(self._on_failed)
+        runner = _JobRunner(job)
+        self.callbacks[job] = (on_done, on_error, on_partial, runner)
+        self.jobs.append(job)
+        self.pool(kind).start(runner)
+        self.changed.emit()
+        return job
+
+    def cancel(self, job):
+        job.cancel()
+        runner = self.callbacks.get(job, (None, None, None, None))[3]
+        if runner is not None and self.pool(job.kind).tryTake(runner):
+            self._remove(job)
+
+    def cancel_kind(self, kind):
+        for job in [j for j in self.jobs if j.kind == kind]:
+            self.cancel(job)
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            self.cancel(job)
+
+    def active(self):
+        return list(self.jobs)
+
+    def wait(self, msecs=-1):
+        for pool in self.pools.values():
+            pool.waitForDone(msecs)
+
+    def _remove(self, job):
+        job.done = True
+        if job in self.jobs:
+            self.jobs.remove(job)
+        self.callbacks.pop(job, None)
+        self.changed.emit()
+
+    @Slot(int)
+    def _on_progress(self, percent):
+        self.changed.emit()
+
+    @Slot(object)
+    def _on_partial(self, data):
+        job = self.sender()
+        on_partial = self.callbacks.get(job, (None, None, None, None))[2]
+        if on_partial and not job.cancelled:
+            on_partial(data)
+
+    @Slot(object)
+    def _on_finished(self, result):
+        job = self.sender()
+        on_done = self.callbacks.get(job, (None, None, None, None))[0]
+        self._remove(job)
+        if on_done and not job.cancelled:
+            on_done(result)
+
+    @Slot(str)
+    def _on_failed(self, error):
+        job = self.sender()
+        on_error = self.callbacks.get(job, (None, None, None, None))[1]
+        self._remove(job)
+        if on_error and not job.cancelled:
+            on_error(error)
+
+class JobStatusButton(QToolButton):
+    """Status bar entry listing running jobs, each with a cancel action"""
+    def __init__(self, manager, lang, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.lang = lang
+        self.setPopupMode(QToolButton.InstantPopup)
+        self.menu_ = QMenu(self)
+        self.menu_.aboutToShow.connect(self.rebuild_menu)
+        self.setMenu(self.menu_)
+        manager.changed.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        jobs = self.manager.active()
+        self.setVisible(bool(jobs))
+        if jobs:
+            self.setText(f"{self.lang.get('jobs')}: {len(jobs)}")
+
+    def rebuild_menu(self):
+        self.menu_.clear()
+        for job in self.manager.active():
+            action = self.menu_.addAction(f"{self.lang.get('cancel')} - {job.title} ({job.percent}%)")
+            action.triggered.connect(lambda checked, j=job: self.manager.cancel(j))
+        if not self.manager.active():
+            self.menu_.addAction('(Empty)').setEnabled(False)
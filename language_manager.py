@@ -1,6 +1,48 @@
 # -*- coding: utf-8 -*-
 """Harfnegar Language Manager v1.4.2"""
-import polib
+import os, struct, polib
+
+MO_MAGIC = 0x950412de
+
+def write_mo(path, catalog, source=''):
+    """Write {msgid: msgstr} as a GNU .mo file (sorted, no hash table), readable by gettext;
+    source goes into the metadata entry as X-Source"""
+    header = 'Content-Type: text/plain; charset=UTF-8\n' + (f"X-Source: {source}\n" if source else '')
+    catalog = dict(catalog, **{'': header})
+    keys = sorted(catalog)
+    ids = [k.encode('utf-8') for k in keys]
+    strs = [catalog[k].encode('utf-8') for k in keys]
+    n = len(keys)
+    offset = 28 + 16 * n
+    table, data, size = [], [], 0
+    for group in (ids, strs):
+        for s in group:
+            table.append((len(s), offset + size))
+            data.append(s + b'\0')
+            size += len(s) + 1
+    header = struct.pack('<7I', MO_MAGIC, 0, n, 28, 28 + 8 * n, 0, 28 + 16 * n)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header + b''.join(struct.pack('<2I', *t) for t in table) + b''.join(data))
+    os.replace(tmp, path)
+
+def read_mo(path, source=None):
+    """{msgid: msgstr} from a .mo file; the empty metadata entry is skipped. With source,
+    raises ValueError unless the metadata carries that X-Source."""
+    with open(path, 'rb') as f:
+        buf = f.read()
+    magic, = struct.unpack('<I', buf[:4])
+    order = '<' if magic == MO_MAGIC else '>'
+    _, _, n, ids_at, strs_at = struct.unpack(order + '5I', buf[:20])
+    catalog = {}
+    for i in range(n):
+        klen, koff = struct.unpack_from(order + '2I', buf, ids_at + 8 * i)
+        vlen, voff = struct.unpack_from(order + '2I', buf, strs_at + 8 * i)
+        if klen:
+            catalog[buf[koff:koff + klen].decode('utf-8')] = buf[voff:voff + vlen].decode('utf-8')
+        elif source is not None and f"X-Source: {source}\n" not in buf[voff:voff + vlen].decode('utf-8'):
+            raise ValueError('stale catalog')
+    return catalog
 
 class LanguageManager:
     LANGS = {
@@ -18,7 +60,7 @@ class LanguageManager:
             'utilities': 'Utilities', 'reverse': 'Reverse Text', 'remove_spaces': 'Remove Extra Spaces',
             'line_numbers': 'Add Line Numbers', 'frequency': 'Character Frequency', 'find_replace': 'Find & Replace',
             'favorites': 'Favorites', 'add_favorite': 'Add to Favorites', 'manage_favorites': 'Manage Favorites',
-            'po_editor': 'PO Editor', 'json_editor': 'JSON Editor', 'yaml_editor': 'YAML Editor', 'xml_editor': 'XML Editor',
+            'po_editor': 'PO Editor', 'json_editor': 'JSON Editor', 'yaml_editor': 'YAML Editor', 'xml_editor': 'XML Editor', 'csv_editor': 'CSV Editor',
             'msgid': 'Source', 'msgstr': 'Translation', 'comment': 'Comment', 'key': 'Key', 'value': 'Value',
             'process_all': 'Process All', 'process_selected': 'Process Selected', 'select_text': 'Select',
             'search': 'Search', 'filter': 'Filter', 'exceptions': 'Exceptions', 'add_exception': 'Add Exception',
@@ -29,6 +71,12 @@ class LanguageManager:
             'duplicate': 'Duplicate', 'validate': 'Validate', 'format': 'Format', 'minify': 'Minify',
             'prettify': 'Prettify', 'sort_keys': 'Sort Keys', 'node': 'Node', 'attribute': 'Attribute',
             'text_content': 'Text', 'add_node': 'Add Node', 'add_attribute': 'Add Attribute',
+            'find': 'Find', 'replace': 'Replace', 'replace_all': 'Replace All', 'glossary': 'Glossary',
+            'load_glossary': 'Load Glossary', 'apply_glossary': 'Apply Glossary', 'import_glossary': 'Save to Database', 'terms': 'terms',
+            'normalize': 'Normalization', 'off': 'Off', 'normalize_persian': 'Persian', 'normalize_persian_latin_digits': 'Persian (Latin Digits)',
+            'normalize_arabic': 'Arabic', 'normalize_minimal': 'Minimal (Tatweel/ZWNJ)',
+            'tree_view': 'Tree View', 'jobs': 'Jobs', 'cancel': 'Cancel', 'loading': 'Loading', 'saving': 'Saving', 'processing': 'Processing',
+            'regex_timeout': 'Pattern timed out', 'suggestion': 'Suggestion',
         },
         'fa': {
             'app_name': 'حرف‌نگار', 'file': 'پرونده', 'new': 'جدید', 'open': 'باز کردن', 'save': 'ذخیره', 'save_as': 'ذخیره در', 'exit': 'خروج',
@@ -42,7 +90,7 @@ class LanguageManager:
             'history': 'تاریخچه', 'recent': 'اخیر', 'utilities': 'ابزارها',
             'reverse': 'معکوس کردن', 'remove_spaces': 'حذف فضای اضافی', 'line_numbers': 'شماره خط',
             'frequency': 'فراوانی حروف', 'find_replace': 'جست‌وجو و جایگزین', 'favorites': 'علاقه‌مندی‌ها',
-            'po_editor': 'ویرایشگر PO', 'json_editor': 'ویرایشگر JSON', 'yaml_editor': 'ویرایشگر YAML', 'xml_editor': 'ویرایشگر XML',
+            'po_editor': 'ویرایشگر PO', 'json_editor': 'ویرایشگر JSON', 'yaml_editor': 'ویرایشگر YAML', 'xml_editor': 'ویرایشگر XML', 'csv_editor': 'ویرایشگر CSV',
             'msgid': 'منبع', 'msgstr': 'ترجمه', 'comment': 'توضیح', 'key': 'کلید', 'value': 'مقدار',
             'process_all': 'پردازش همه', 'process_selected': 'پردازش انتخاب‌شده', 'select_text': 'انتخاب',
             'search': 'جستجو', 'filter': 'فیلتر', 'exceptions': 'استثنائات', 'add_exception': 'افزودن استثنا',
@@ -51,33 +99,71 @@ class LanguageManager:
             'row': 'ردیف', 'expand': 'باز کردن', 'collapse': 'بستن', 'expand_all': 'باز کردن همه', 'collapse_all': 'بستن همه',
             'insert': 'درج', 'remove': 'حذف', 'move_up': 'بالا', 'move_down': 'پایین',
             'duplicate': 'تکثیر', 'validate': 'اعتبارسنجی', 'format': 'قالب‌بندی', 'minify': 'فشرده', 'prettify': 'زیباسازی',
+            'find': 'یافتن', 'replace': 'جایگزین', 'replace_all': 'جایگزینی همه', 'glossary': 'واژه‌نامه',
+            'load_glossary': 'بارگذاری واژه‌نامه', 'apply_glossary': 'اعمال واژه‌نامه', 'import_glossary': 'ذخیره در پایگاه داده', 'terms': 'واژه',
+            'normalize': 'یکسان‌سازی', 'off': 'خاموش', 'normalize_persian': 'فارسی', 'normalize_persian_latin_digits': 'فارسی (ارقام لاتین)',
+            'normalize_arabic': 'عربی', 'normalize_minimal': 'حداقلی (کشیده/نیم‌فاصله)',
+            'tree_view': 'نمای درختی', 'jobs': 'کارها', 'cancel': 'لغو', 'loading': 'در حال بارگذاری', 'saving': 'در حال ذخیره', 'processing': 'در حال پردازش',
+            'regex_timeout': 'زمان اجرای الگو تمام شد', 'suggestion': 'پیشنهاد',
         },
         'ar': {'app_name': 'Harfnegar', 'theme': 'المظهر', 'light': 'فاتح', 'dark': 'داكن'},
     }
     
-    # Add other 48 languages with minimal translations
-    for lang_code in ['es', 'fr', 'de', 'ru', 'zh', 'ja', 'tr', 'pt', 'it', 'nl', 'pl', 'ko', 'vi', 'th', 'id', 'ms', 'hi', 'bn', 'ur', 'sw', 'ro', 'uk', 'cs', 'sv', 'da', 'no', 'fi', 'el', 'he', 'hu', 'sk', 'bg', 'hr', 'sr', 'ca', 'af', 'az', 'ka', 'lt', 'lv', 'et', 'sl', 'sq', 'mk', 'is', 'mt', 'cy', 'ga']:
-        if lang_code not in LANGS:
-            LANGS[lang_code] = {'app_name': 'Harfnegar'}
+    # Other 48 languages: listed, but with no strings of their own they compile to English
+    STUB_LANGS = ('es', 'fr', 'de', 'ru', 'zh', 'ja', 'tr', 'pt', 'it', 'nl', 'pl', 'ko', 'vi', 'th', 'id', 'ms', 'hi', 'bn', 'ur', 'sw', 'ro', 'uk', 'cs', 'sv', 'da', 'no', 'fi', 'el', 'he', 'hu', 'sk', 'bg', 'hr', 'sr', 'ca', 'af', 'az', 'ka', 'lt', 'lv', 'et', 'sl', 'sq', 'mk', 'is', 'mt', 'cy', 'ga')
+    CACHE_DIR = 'harfnegar_lang'
     
     def __init__(self, db):
         self.db = db
         self.lang = db.get('language', 'en')
-        self.custom = {}
-        for cl in db.get_custom_languages():
-            self.custom[cl['code']] = cl['translations']
+        self.catalog = None  # flattened strings of self.lang, compiled on first get()
+        self.cache_dir = os.path.join(os.path.dirname(os.path.abspath(db.db_file)), self.CACHE_DIR)
     
     def get(self, key, default=''):
-        if self.lang in self.custom and key in self.custom[self.lang]:
-            return self.custom[self.lang][key]
-        return self.LANGS.get(self.lang, {}).get(key, self.LANGS['en'].get(key, default))
+        return (self.catalog or self.load()).get(key, default)
+    
+    def load(self):
+        self.catalog = self.compile(self.lang)
+        return self.catalog
+    
+    def compile(self, code):
+        """One dict per language: English, then the built-in strings, then imported ones"""
+        catalog = dict(self.LANGS['en'])
+        catalog.update(self.LANGS.get(code, {}))
+        catalog.update(self.custom_strings(code))
+        return catalog
+    
+    def cache_path(self, code):
+        return os.path.join(self.cache_dir, os.path.basename(code) + '.mo')
+    
+    def custom_strings(self, code):
+        """Imported translations for one language: the .mo cache while it matches the
+        database row, else the row itself (then cached). A cache without a row is removed."""
+        source = self.db.get_custom_language_hash(code)
+        if source is None:
+            try: os.remove(self.cache_path(code))
+            except: pass
+            return {}
+        try: return read_mo(self.cache_path(code), source)
+        except: pass
+        trans = self.db.get_custom_language(code)
+        if trans:
+            self.write_cache(code, trans, source)
+        return trans or {}
+    
+    def write_cache(self, code, trans, source):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            write_mo(self.cache_path(code), trans, source)
+        except: pass
     
     def set_language(self, lang):
-        self.lang = lang
+        if lang != self.lang:
+            self.lang, self.catalog = lang, None
         self.db.set('language', lang)
     
     def get_languages(self):
-        return {'builtin': list(self.LANGS.keys()), 'custom': list(self.custom.keys())}
+        return {'builtin': list(self.LANGS) + list(self.STUB_LANGS), 'custom': self.db.get_custom_language_codes()}
     
     def export_pot(self, filename):
         try:
@@ -93,7 +179,10 @@ class LanguageManager:
         try:
             po = polib.pofile(filename)
             trans = {e.msgid: e.msgstr for e in po if e.msgstr}
-            self.db.add_custom_language(code, name, trans)
-            self.custom[code] = trans
+            if not self.db.add_custom_language(code, name, trans):
+                return False
+            self.write_cache(code, trans, self.db.get_custom_language_hash(code))
+            if code == self.lang:
+                self.catalog = None
             return True
         except: return False
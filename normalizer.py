@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Normalizer v1.4.2 - Table-driven Persian/Arabic normalization
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import re
+
+ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+PERSIAN_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+LATIN_DIGITS = '0123456789'
+TATWEEL = 'ـ'
+ZWNJ = '‌'
+
+# Applied in order with constant replacements, so each pass stays inside the re engine:
+# ZWNJ touching a space -> one space, ZWNJ at a word edge -> dropped, repeated ZWNJ -> one
+ZWNJ_RULES = (
+    (re.compile('[ ‌]*(?: ‌|‌ )[ ‌]*'), ' '),
+    (re.compile(r'(?<!\S)‌+|‌+(?!\S)'), ''),
+    (re.compile('‌{2,}'), ZWNJ),
+)
+
+def _table(mapping, delete=TATWEEL):
+    table = str.maketrans(mapping)
+    table.update({ord(c): None for c in delete})
+    return table
+
+class Normalizer:
+    """str.translate tables per profile, plus compiled regex passes for ZWNJ/space cleanup"""
+    PERSIAN = {'ي': 'ی', 'ى': 'ی', 'ك': 'ک', '​': ZWNJ, **dict(zip(ARABIC_DIGITS, PERSIAN_DIGITS))}
+    TABLES = {
+        'persian': _table(PERSIAN),
+        'persian_latin_digits': _table({**PERSIAN, **dict(zip(ARABIC_DIGITS + PERSIAN_DIGITS, LATIN_DIGITS * 2))}),
+        'arabic': _table({'ی': 'ي', 'ک': 'ك', **dict(zip(PERSIAN_DIGITS, ARABIC_DIGITS))}),
+        'minimal': _table({}),
+    }
+    ZWNJ_CLEANUP = {'persian', 'persian_latin_digits', 'minimal'}
+
+    @staticmethod
+    def profiles():
+        return list(Normalizer.TABLES)
+
+    @staticmethod
+    def normalize(text, profile='persian'):
+        if not text or not profile:
+            return text
+        text = text.translate(Normalizer.TABLES[profile])
+        if profile in Normalizer.ZWNJ_CLEANUP and ZWNJ in text:
+            for pattern, repl in ZWNJ_RULES:
+                text = pattern.sub(repl, text)
+        return text
+
+    @staticmethod
+    def collapse_stats(strings, profile='persian'):
+        """How many distinct strings remain once variants are normalized"""
+        before, after, total = set(), set(), 0
+        for s in strings:
+            total += 1
+            before.add(s)
+        for s in before:
+            after.add(Normalizer.normalize(s, profile))
+        return {'total': total, 'distinct': len(before), 'distinct_normalized': len(after),
+                'collapsed': len(before) - len(after)}
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar PDF Extractor v1.4.2 - Parallel page extraction with a text cache
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import os, hashlib
+
+def _extract_range(job):
+    """Worker: text of pages [start, stop) of the file at path"""
+    path, start, stop = job
+    from PyPDF2 import PdfReader
+    return _extract_pages(PdfReader(path), start, stop)
+
+def _extract_pages(reader, start, stop):
+    """Pages without a text layer (or that fail to parse) give ''"""
+    texts = []
+    for i in range(start, stop):
+        try:
+            texts.append(reader.pages[i].extract_text() or '')
+        except:
+            texts.append('')
+    return texts
+
+class PdfExtractor:
+    """Page texts in order. Uncached page ranges go to the shared process pool;
+    extracted pages are stored in the database keyed by file hash and page."""
+    PAGES_PER_JOB = 16
+    PARALLEL_MIN_PAGES = 32  # below this, process start-up costs more than it saves
+    _db = None
+
+    @staticmethod
+    def file_hash(path):
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    @staticmethod
+    def page_count(path):
+        from PyPDF2 import PdfReader
+        return len(PdfReader(path).pages)
+
+    @staticmethod
+    def cache_db():
+        """One DatabaseManager per process for callers without their own; it opens a
+        connection per thread, so worker threads can share it"""
+        if PdfExtractor._db is None:
+            from database_manager import DatabaseManager
+            PdfExtractor._db = DatabaseManager()
+        return PdfExtractor._db
+
+    @staticmethod
+    def iter_pages(path, cache=True, progress=None, db=None):
+        """Yield each page's text in page order; progress(done, total) after each page"""
+        digest = None
+        if cache:
+            db = db or PdfExtractor.cache_db()
+            digest = PdfExtractor.file_hash(path)
+        else:
+            db = None
+        total, cached = db.get_pdf_pages(digest) if db else (None, {})
+        if total is None:
+            total = PdfExtractor.page_count(path)
+            if db:
+                db.set_pdf_page_count(digest, total)
+        missing = [i for i in range(total) if i not in cached]
+        ranges = PdfExtractor.ranges(missing)
+        results = PdfExtractor.submit(path, ranges, total)
+        pending = {}
+        for i in range(total):
+            if i not in cached:
+                while i not in pending:
+                    (start, stop), texts = next(results)
+                    pending.update(zip(range(start, stop), texts))
+                    if db:
+                        db.save_pdf_pages(digest, list(zip(range(start, stop), texts)))
+                text = pending.pop(i)
+            else:
+                text = cached[i]
+            if progress:
+                progress(i + 1, total)
+            yield text
+
+    @staticmethod
+    def ranges(pages):
+        """Group sorted page numbers into contiguous ranges of at most PAGES_PER_JOB"""
+        ranges = []
+        for p in pages:
+            if ranges and ranges[-1][1] == p and ranges[-1][1] - ranges[-1][0] < PdfExtractor.PAGES_PER_JOB:
+                ranges[-1][1] = p + 1
+            else:
+                ranges.append([p, p + 1])
+        return [tuple(r) for r in ranges]
+
+    @staticmethod
+    def submit(path, ranges, total):
+        """Yield (range, texts) in range order; parallel when there are enough pages and cores"""
+        if len(ranges) > 1 and total >= PdfExtractor.PARALLEL_MIN_PAGES and (os.cpu_count() or 1) > 1:
+            from text_processor import TextProcessor
+            pool = TextProcessor.get_pool()
+            futures = [(r, pool.submit(_extract_range, (path,) + r)) for r in ranges]
+            try:
+                for r, future in futures:
+                    yield r, future.result()
+            finally:
+                for _, future in futures:
+                    future.cancel()
+            return
+        if ranges:
+            from PyPDF2 import PdfReader
+            reader = PdfReader(path)
+            for r in ranges:
+                yield r, _extract_pages(reader, *r)
+
+    @staticmethod
+    def extract(path, cache=True, progress=None, db=None):
+        return '\n'.join(PdfExtractor.iter_pages(path, cache, progress, db))
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Pipeline v1.4.2 - Fused line-streaming transforms
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import io, itertools
+from text_processor import TextProcessor, _has_strong, _encode_chunk
+from glossary import Glossary
+from normalizer import Normalizer
+
+def iter_lines(fp):
+    """Lines of a text stream without their '\\n', matching text.split('\\n') (nothing for empty input)"""
+    ended = None
+    for line in fp:
+        ended = line.endswith('\n')
+        yield line[:-1] if ended else line
+    if ended:
+        yield ''
+
+def _reverse(lines):
+    # reverse_text on the whole text == reversed line order with each line reversed
+    return (line[::-1] for line in reversed(list(lines)))
+
+def _context(lines):
+    """Trailing lines back to (and including) the last one with a strong character"""
+    for i in range(len(lines) - 1, -1, -1):
+        if _has_strong(lines[i]):
+            return lines[i:]
+    return lines
+
+def _shape(lines, exceptions, size):
+    """reshape + bidi in chunks of about size characters, each rendered with the document's
+    base direction and the neighbouring lines up to the nearest strong character, as
+    split_chunks does, so the output equals encode_text on the whole text. Lines matching
+    an exception are passed through as they are."""
+    lines = iter(lines)
+    head = []  # up to the first strong character, which sets the base direction
+    for line in lines:
+        head.append(line)
+        if _has_strong(line):
+            break
+    base = TextProcessor.base_dir(head[-1]) if head else 'L'
+    lines = itertools.chain(head, lines)
+    before, chunk, length = [], [], 0
+
+    def emit(after):
+        try:
+            shaped = _encode_chunk(('\n'.join(before + chunk + after), len(before), len(chunk), base)).split('\n')
+        except:
+            shaped = chunk
+        for line, out in zip(chunk, shaped):
+            yield line if exceptions and TextProcessor.matches_exception(line, exceptions) else out
+
+    for line in lines:
+        chunk.append(line)
+        length += len(line) + 1
+        if length < size:
+            continue
+        after = []
+        for line in lines:
+            after.append(line)
+            if _has_strong(line):
+                break
+        yield from emit(after)
+        before = _context(before + chunk)
+        chunk, length = after, sum(len(line) + 1 for line in after)
+    if chunk:
+        yield from emit([])
+
+class Pipeline:
+    """Transforms declared as stages, e.g. 'normalize,spaces,glossary:terms.tsv,shape,number'.
+    Line stages next to each other are fused into one call per line; 'shape' works on
+    chunks of lines (bidi context crosses lines) and 'reverse' needs every line and acts
+    as a barrier."""
+    STAGES = ('normalize', 'spaces', 'replace', 'glossary', 'shape', 'number', 'reverse')
+    SHAPE_CHUNK = 64_000  # characters per shape call
+
+    def __init__(self, spec, exceptions=None, profile='persian', glossary=None):
+        self.spec = spec
+        self.exceptions = exceptions or []
+        self.profile = profile  # for a bare 'normalize' stage
+        self.stages = self.parse(spec)
+        if glossary:  # after a leading normalize stage, the order every other path uses
+            at = 1 if self.stages and self.stages[0][0] == 'normalize' else 0
+            self.stages.insert(at, ('glossary', glossary))
+
+    @staticmethod
+    def parse(spec):
+        stages = []
+        for part in spec.split(','):
+            name, _, arg = part.strip().partition(':')
+            if not name:
+                continue
+            if name not in Pipeline.STAGES:
+                raise ValueError(f"Unknown stage: {name}")
+            if name == 'replace' and '=' not in arg:
+                raise ValueError("replace stage needs an argument: replace:OLD=NEW")
+            if name == 'glossary' and not arg:
+                raise ValueError("glossary stage needs a file: glossary:FILE")
+            if name == 'normalize' and arg and arg not in Normalizer.TABLES:
+                raise ValueError(f"Unknown normalize profile: {arg}")
+            stages.append((name, arg))
+        return stages
+
+    def line_stage(self, name, arg):
+        if name == 'normalize':
+            profile = arg or self.profile
+            return lambda line: Normalizer.normalize(line, profile)
+        if name == 'spaces':
+            return lambda line: ' '.join(line.split())
+        if name == 'replace':
+            find, _, replace = arg.partition('=')
+            return lambda line: TextProcessor.find_replace(line, find, replace)
+        if name == 'glossary':
+            return (arg if isinstance(arg, Glossary) else Glossary.from_file(arg)).apply
+        if name == 'number':
+            counter = itertools.count(1)
+            return lambda line: f"{next(counter)}. {line}"
+        return None
+
+    @staticmethod
+    def fuse(fns):
+        if len(fns) == 1:
+            return fns[0]
+        def fused(line):
+            for fn in fns:
+                line = fn(line)
+            return line
+        return fused
+
+    def iter(self, lines):
+        """Lazily apply all stages to an iterable of lines"""
+        pending = []
+        for name, arg in self.stages:
+            fn = self.line_stage(name, arg)
+            if fn:
+                pending.append(fn)
+                continue
+            if pending:
+                lines = map(self.fuse(pending), lines)
+                pending = []
+            lines = _shape(lines, self.exceptions, self.SHAPE_CHUNK) if name == 'shape' else _reverse(lines)
+        if pending:
+            lines = map(self.fuse(pending), lines)
+        return lines
+
+    def run(self, fp, out):
+        """Stream fp through the pipeline into out, one write per line"""
+        sep = ''
+        for line in self.iter(iter_lines(fp)):
+            out.write(sep)
+            out.write(line)
+            sep = '\n'
+
+    def apply(self, text):
+        out = io.StringIO()
+        self.run(io.StringIO(text), out)
+        return out.getvalue()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Regex Search v1.4.2 - Regex evaluation in a killable worker process
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import re, time, bisect, threading, multiprocessing
+
+ASTRAL = re.compile('[\U00010000-\U0010ffff]')
+BATCH = 500  # matches per message
+FLUSH_SECS = 0.05
+
+def _serve(conn):
+    """Worker loop. Keeps the current document; ('search', gen, pattern, flags, start, end, spans)
+    is answered with ('matches', gen, batch) messages and a final ('done', gen, count).
+    Positions on the wire are UTF-16 offsets, as QTextDocument counts them."""
+    text, astral, astral16 = '', [], []
+    while True:
+        msg = conn.recv()
+        if msg[0] == 'text':
+            text = msg[1]
+            astral = [m.start() for m in ASTRAL.finditer(text)]
+            astral16 = [p + i for i, p in enumerate(astral)]
+            continue
+        if msg[0] == 'stop':
+            return
+        if msg[0] != 'search':
+            continue  # 'cancel' for a search that already finished
+        _, gen, pattern, flags, start, end, spans = msg
+        try:
+            rx = re.compile(pattern, flags)
+        except re.error as e:
+            conn.send(('error', gen, str(e)))
+            continue
+        to16 = (lambda p: p + bisect.bisect_left(astral, p)) if astral else (lambda p: p)
+        end = len(text) + len(astral) if end is None else end
+        if astral:  # UTF-16 window -> code points
+            start -= bisect.bisect_left(astral16, start)
+            end -= bisect.bisect_left(astral16, end)
+        batch, count, flushed = [], 0, time.perf_counter()
+        for m in rx.finditer(text, start, end):
+            batch.append((to16(m.start()), to16(m.end())) if spans else m.group(0))
+            count += 1
+            if len(batch) >= BATCH or time.perf_counter() - flushed > FLUSH_SECS:
+                conn.send(('matches', gen, batch))
+                batch, flushed = [], time.perf_counter()
+                if conn.poll():  # cancellation point: a newer request is waiting
+                    break
+        else:
+            if batch:
+                conn.send(('matches', gen, batch))
+        conn.send(('done', gen, count))
+
+class RegexTimeout(Exception):
+    pass
+
+class RegexSearch:
+    """Runs patterns in a separate process, so a catastrophic-backtracking pattern
+    can be killed on timeout instead of holding the GIL of the UI process"""
+    TIMEOUT = 2.0  # seconds without a message from the worker
+    CANCEL_GRACE = 0.25  # seconds a cancelled scan gets to stop before the worker is replaced
+
+    def __init__(self):
+        self.process = None
+        self.conn = None
+        self.text_id = None
+        self.gen = 0
+        self.cancelled = None  # gen of a cancelled search whose 'done' has not arrived yet
+        self.lock = threading.Lock()  # one search on the pipe at a time
+
+    def start(self):
+        ctx = multiprocessing.get_context('spawn')
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.text_id = self.cancelled = None
+
+    def settle(self):
+        """Wait briefly for a cancelled scan to finish. The worker only sees 'cancel' between
+        match batches, so a backtracking scan that finds nothing would otherwise hold up the
+        next search until it timed out for a pattern the user never ran; kill it instead."""
+        end = time.perf_counter() + self.CANCEL_GRACE
+        try:
+            while time.perf_counter() < end:
+                if self.conn.poll(FLUSH_SECS):
+                    kind, msg_gen, data = self.conn.recv()
+                    if kind in ('done', 'error') and msg_gen == self.cancelled:
+                        self.cancelled = None
+                        return
+        except (EOFError, OSError):
+            pass
+        self.kill()
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.join()
+            self.conn.close()
+        self.process = self.conn = self.text_id = self.cancelled = None
+
+    def close(self):
+        if self.process is not None:
+            try: self.conn.send(('stop',))
+            except: pass
+            self.process.join(1)
+        self.kill()
+
+    def search(self, text_id, get_text, pattern, flags=re.MULTILINE, start=0, end=None, spans=True,
+               timeout=None, check=None):
+        """Yield batches of (start, end) UTF-16 spans, or match strings when spans=False.
+        get_text() is only called when text_id differs from the worker's document.
+        check() is called while waiting and may raise to cancel. Raises re.error for bad
+        patterns and RegexTimeout when the worker goes quiet for longer than timeout."""
+        timeout = timeout or self.TIMEOUT
+        with self.lock:
+            if self.cancelled is not None and self.process is not None:
+                self.settle()
+            if self.process is None or not self.process.is_alive():
+                self.start()
+            if self.text_id != text_id:
+                self.conn.send(('text', get_text()))
+                self.text_id = text_id
+            self.gen += 1
+            gen = self.gen
+            self.conn.send(('search', gen, pattern, flags, start, end, spans))
+            last = time.perf_counter()
+            try:
+                while True:
+                    if check:
+                        check()
+                    if not self.conn.poll(FLUSH_SECS):
+                        if time.perf_counter() - last > timeout:
+                            self.kill()
+                            raise RegexTimeout(pattern)
+                        continue
+                    kind, msg_gen, data = self.conn.recv()
+                    last = time.perf_counter()
+                    if msg_gen != gen:
+                        continue  # left over from a cancelled search
+                    if kind == 'error':
+                        gen = None  # the worker is already idle
+                        raise re.error(data)
+                    if kind == 'done':
+                        gen = None
+                        return
+                    yield data
+            except RegexTimeout:
+                raise
+            except:  # bad pattern, cancelled job or abandoned generator: stop the worker's scan
+                if gen is not None and self.process is not None:
+                    try:
+                        self.conn.send(('cancel',))
+                        self.cancelled = gen  # the next search waits for it or replaces the worker
+                    except:
+                        self.kill()  # worker died; the next search starts a new one
+                raise
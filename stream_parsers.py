@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Stream Parsers v1.4.2 - Incremental JSON/YAML/PO row readers
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+from json.decoder import scanstring, JSONDecodeError
+import re, yaml, polib
+
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+class StreamFallback(Exception):
+    """Raised when a document needs a full parse (YAML merge keys, aliased collections)"""
+
+WS = re.compile(r'[ \t\n\r]*')
+NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+LITERALS = {'true': True, 'false': False, 'null': None}
+
+def _refill(fp, buf, pos, chunk_size):
+    chunk = fp.read(chunk_size)
+    return buf[pos:] + chunk, 0, not chunk
+
+def json_tokens(fp, chunk_size=65536):
+    """Yield (token, value): one of '{', '}', '[', ']', ':', ',' or ('v', scalar).
+    A token that reaches the end of the buffer is retried after reading the next chunk."""
+    buf, pos, eof = '', 0, False
+    while True:
+        pos = WS.match(buf, pos).end()
+        if pos >= len(buf):
+            if eof:
+                return
+            buf, pos, eof = _refill(fp, buf, pos, chunk_size)
+            continue
+        c = buf[pos]
+        if c in '{}[]:,':
+            pos += 1
+            yield c, None
+        elif c == '"':
+            try:
+                value, pos = scanstring(buf, pos + 1, True)
+            except JSONDecodeError:
+                if eof:
+                    raise
+                buf, pos, eof = _refill(fp, buf, pos, chunk_size)
+                continue
+            yield 'v', value
+        else:
+            m = NUMBER.match(buf, pos)
+            word = None if m else next((w for w in LITERALS if buf.startswith(w, pos)), None)
+            end = m.end() if m else (pos + len(word) if word else None)
+            # a number within 3 chars of the end may continue as '.5', 'e-5' in the next chunk
+            if (end is None or end + (3 if m else 0) >= len(buf)) and not eof:
+                buf, pos, eof = _refill(fp, buf, pos, chunk_size)
+                continue
+            if m:
+                pos = end
+                yield 'v', float(m.group()) if m.group(1) or m.group(2) else int(m.group())
+            elif word:
+                pos = end
+                yield 'v', LITERALS[word]
+            else:
+                raise ValueError(f"Invalid JSON near: {buf[pos:pos + 20]!r}")
+
+def iter_json_rows(fp, chunk_size=65536):
+    """Same (key, value, comment, path) rows as UniversalFileEditor.dict_rows, without json.load"""
+    stack = []  # frames: [is_map, prefix, path, key_or_index, expect_key]
+    for tok, value in json_tokens(fp, chunk_size):
+        frame = stack[-1] if stack else None
+        if tok == ',':
+            if frame[0]:
+                frame[4] = True
+            else:
+                frame[3] += 1
+            continue
+        if tok == ':':
+            continue
+        if tok in '}]':
+            stack.pop()
+            continue
+        if frame and frame[0] and frame[4]:
+            frame[3], frame[4] = value, False
+            continue
+        if frame is None:
+            key, path = '', ()
+        elif frame[0]:
+            key = f"{frame[1]}.{frame[3]}" if frame[1] else frame[3]
+            path = frame[2] + (frame[3],)
+        else:
+            key = f"{frame[1]}[{frame[3]}]"
+            path = frame[2] + (frame[3],)
+        if tok == '{':
+            stack.append([True, key, path, None, True])
+        elif tok == '[':
+            stack.append([False, key, path, 0, False])
+        elif frame is not None:
+            yield (key, str(value), '', path)
+
+def iter_yaml_rows(fp):
+    """Rows for the first YAML document from parser events (C-accelerated when libyaml is present)"""
+    loader = YamlLoader(fp)
+    stack = []  # frames: [is_map, prefix, path, key_or_index, expect_key]
+    anchors = {}
+    try:
+        while loader.check_event():
+            event = loader.get_event()
+            if isinstance(event, yaml.DocumentEndEvent):
+                break
+            if isinstance(event, (yaml.StreamStartEvent, yaml.StreamEndEvent, yaml.DocumentStartEvent)):
+                continue
+            frame = stack[-1] if stack else None
+            if isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                stack.pop()
+                if stack and not stack[-1][0]:
+                    stack[-1][3] += 1
+                elif stack:
+                    stack[-1][4] = True
+                continue
+            if isinstance(event, yaml.AliasEvent):
+                if event.anchor not in anchors:
+                    raise StreamFallback()
+                value = anchors[event.anchor]
+            elif isinstance(event, yaml.ScalarEvent):
+                tag = event.tag
+                if tag is None or tag == '!':
+                    tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+                constructor = loader.yaml_constructors.get(tag)
+                node = yaml.ScalarNode(tag, event.value, style=event.style)
+                value = constructor(loader, node) if constructor else event.value
+                if tag == 'tag:yaml.org,2002:merge':
+                    raise StreamFallback()
+                if event.anchor:
+                    anchors[event.anchor] = value
+            else:
+                value = None
+                if getattr(event, 'anchor', None):
+                    raise StreamFallback()  # aliased collections would need replaying
+            if frame and frame[0] and frame[4]:
+                if not isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)):
+                    raise StreamFallback()
+                frame[3], frame[4] = value, False
+                continue
+            if frame is None:
+                key, path = '', ()
+            elif frame[0]:
+                key = f"{frame[1]}.{frame[3]}" if frame[1] else frame[3]
+                path = frame[2] + (frame[3],)
+            else:
+                key = f"{frame[1]}[{frame[3]}]"
+                path = frame[2] + (frame[3],)
+            if isinstance(event, yaml.MappingStartEvent):
+                stack.append([True, key, path, None, True])
+                continue
+            if isinstance(event, yaml.SequenceStartEvent):
+                stack.append([False, key, path, 0, False])
+                continue
+            if frame is not None:
+                yield (key, str(value), '', path)
+                if frame[0]:
+                    frame[4] = True
+                else:
+                    frame[3] += 1
+    finally:
+        loader.dispose()
+
+def iter_po_rows(fp):
+    """(msgid, msgstr, comment, fuzzy) per entry, read line by line; header entry skipped like polib"""
+    entry, field = None, None
+
+    def flush(entry):
+        if entry and 'msgid' in entry and (entry['msgid'] or 'msgctxt' in entry):
+            return (entry['msgid'], entry.get('msgstr', ''), '\n'.join(entry['comment']), 'fuzzy' in entry['flags'])
+        return None
+
+    def new_entry():
+        return {'comment': [], 'flags': []}
+
+    for line in fp:
+        line = line.strip()
+        if line.startswith('#~'):
+            line = line[2:].lstrip()
+        if not line:
+            row = flush(entry)
+            if row:
+                yield row
+            entry, field = None, None
+            continue
+        if line.startswith('#'):
+            if entry and 'msgid' in entry:  # comment after msgstr starts a new entry
+                row = flush(entry)
+                if row:
+                    yield row
+                entry = None
+            entry = entry or new_entry()
+            if line.startswith('#,'):
+                entry['flags'].extend(f.strip() for f in line[2:].split(','))
+            elif line.startswith('#.'):
+                entry['comment'].append(line[2:].strip())
+            field = None
+            continue
+        if line.startswith('"'):
+            if entry is not None and field:
+                entry[field] = entry.get(field, '') + polib.unescape(line[1:-1])
+            continue
+        keyword, _, rest = line.partition(' ')
+        if keyword in ('msgctxt', 'msgid') and entry and 'msgid' in entry:
+            row = flush(entry)
+            if row:
+                yield row
+            entry = None
+        entry = entry or new_entry()
+        # plural entries expose an empty msgstr, as polib does
+        field = keyword if keyword in ('msgctxt', 'msgid', 'msgstr') else None
+        if field:
+            entry[field] = polib.unescape(rest.strip()[1:-1])
+    row = flush(entry)
+    if row:
+        yield row
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Subtitle Processor v1.4.2 - Cue-aware SRT/VTT shaping
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import io, re
+from text_processor import TextProcessor
+from normalizer import Normalizer
+
+TIMING = re.compile(r'\s*(?:\d+:)?\d{1,2}:\d{2}[,.]\d{1,3}\s+-->\s+')
+VTT_BLOCKS = ('WEBVTT', 'NOTE', 'STYLE', 'REGION')
+SUBTITLE_EXTS = ('.srt', '.vtt')
+
+class SubtitleProcessor:
+    """Streams cues line by line: numbers, identifiers, timing lines and VTT header/NOTE/STYLE
+    blocks are copied unchanged; only cue text lines are shaped, each distinct line once."""
+    CACHE_SIZE = 100_000
+
+    def __init__(self, exceptions=None, profile='', glossary=None):
+        self.exceptions = exceptions or []
+        self.profile = profile
+        self.glossary = glossary
+        self.cache = {}
+        self.stats = {'cues': 0, 'lines': 0, 'cache_hits': 0}
+
+    @staticmethod
+    def detect(text):
+        """True when the start of text looks like SRT/VTT"""
+        head = text[:2048].lstrip('﻿')
+        return head.startswith('WEBVTT') or any(TIMING.match(line) for line in head.split('\n')[:8])
+
+    def shape(self, line):
+        if line in self.cache:
+            self.stats['cache_hits'] += 1
+            return self.cache[line]
+        text = Normalizer.normalize(line, self.profile)
+        if self.glossary:
+            text = self.glossary.apply(text)
+        result = TextProcessor.encode_text(text, self.exceptions)
+        if len(self.cache) >= self.CACHE_SIZE:
+            self.cache.clear()
+        self.cache[line] = result
+        return result
+
+    def iter(self, lines):
+        """Transform lines that keep their line endings ('\\r\\n' included)"""
+        in_text = skip_block = False
+        block_start = True
+        for raw in lines:
+            body = raw.rstrip('\r\n')
+            if not body.strip():
+                in_text = skip_block = False
+                block_start = True
+                yield raw
+                continue
+            if block_start and body.lstrip('﻿').startswith(VTT_BLOCKS):
+                skip_block = True
+            block_start = False
+            if skip_block:
+                yield raw
+            elif in_text:
+                self.stats['lines'] += 1
+                yield self.shape(body) + raw[len(body):]
+            else:
+                if TIMING.match(body):
+                    self.stats['cues'] += 1
+                    in_text = True
+                yield raw
+
+    def process(self, fp, out):
+        for line in self.iter(fp):
+            out.write(line)
+        return self.stats
+
+    def apply(self, text):
+        out = io.StringIO()
+        self.process(io.StringIO(text, newline=''), out)
+        return out.getvalue()
+
+    def process_file(self, src, dst=None):
+        """Stream src into dst (or return the result when dst is None)"""
+        with open(src, 'r', encoding='utf-8', newline='') as fp:
+            if dst is None:
+                out = io.StringIO()
+                self.process(fp, out)
+                return out.getvalue()
+            with open(dst, 'w', encoding='utf-8', newline='') as out:
+                return self.process(fp, out)
@@ -3,26 +3,124 @@
 Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
 from arabic_reshaper import reshape
 from bidi.algorithm import get_display
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing, unicodedata, atexit
 import re, os
+from text_stats import TextStats
+from normalizer import Normalizer
+
+VERSION = '1.4.2'
+BIDI_CONTROLS = re.compile('[\u202a-\u202e\u2066-\u2069]')
+
+def _has_strong(line):
+    return any(unicodedata.bidirectional(c) in ('L', 'R', 'AL') for c in line)
+
+def _encode_chunk(job):
+    """Worker: shape a chunk with its context lines, return only the chunk's own lines"""
+    text, skip, keep, base_dir = job
+    return '\n'.join(get_display(reshape(text), base_dir=base_dir).split('\n')[skip:skip + keep])
 
 class TextProcessor:
+    PARALLEL_THRESHOLD = 1_000_000  # chars; below this a single reshape + bidi call is faster
+    CHUNK_SIZE = 200_000
+    _pool = None
+    _engine = None
+    
+    @staticmethod
+    def engine_version():
+        """Harfnegar plus shaping library versions; an upgrade of either invalidates outputs"""
+        if TextProcessor._engine is None:
+            try:
+                from importlib.metadata import version
+                TextProcessor._engine = f"{VERSION}/{version('arabic-reshaper')}/{version('python-bidi')}"
+            except:
+                TextProcessor._engine = VERSION
+        return TextProcessor._engine
+    
     @staticmethod
     def is_persian_arabic(char):
         code = ord(char)
         return (0x0600 <= code <= 0x06FF) or (0xFB50 <= code <= 0xFDFF) or (0xFE70 <= code <= 0xFEFF)
     
     @staticmethod
-    def encode_text(text, exceptions=None):
-        """Process: reshape + bidi"""
+    def encode_text(text, exceptions=None, profile=None):
+        """Process: normalize (optional) + reshape + bidi"""
         if not text:
             return ""
+        if profile:
+            text = Normalizer.normalize(text, profile)
         if exceptions and TextProcessor.matches_exception(text, exceptions):
             return text
+        if len(text) >= TextProcessor.PARALLEL_THRESHOLD:
+            try:
+                return TextProcessor.encode_parallel(text)
+            except:
+                pass
         try:
             return get_display(reshape(text))
         except:
             return text
     
+    @staticmethod
+    def base_dir(text):
+        """Paragraph direction the bidi algorithm picks for the whole text (rules P2/P3)"""
+        for c in text:
+            t = unicodedata.bidirectional(c)
+            if t == 'L':
+                return 'L'
+            if t in ('R', 'AL'):
+                return 'R'
+        return 'L'
+    
+    @staticmethod
+    def split_chunks(text, size=None):
+        """Split at line boundaries into (text, skip, keep, base_dir) jobs.
+        Each chunk carries the neighbouring lines up to the nearest strong character
+        so weak/neutral resolution sees the same context as a serial run."""
+        size = size or TextProcessor.CHUNK_SIZE
+        base = TextProcessor.base_dir(text)
+        lines = text.split('\n')
+        bounds, start, length = [], 0, 0
+        for i, line in enumerate(lines):
+            length += len(line) + 1
+            if length >= size:
+                bounds.append((start, i + 1))
+                start, length = i + 1, 0
+        if start < len(lines):
+            bounds.append((start, len(lines)))
+        jobs = []
+        for a, b in bounds:
+            before = a
+            while before > 0:
+                before -= 1
+                if _has_strong(lines[before]):
+                    break
+            after = b
+            while after < len(lines):
+                after += 1
+                if _has_strong(lines[after - 1]):
+                    break
+            jobs.append(('\n'.join(lines[before:after]), a - before, b - a, base))
+        return jobs
+    
+    @staticmethod
+    def get_pool():
+        if TextProcessor._pool is None:
+            TextProcessor._pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(TextProcessor._pool.shutdown, cancel_futures=True)
+        return TextProcessor._pool
+    
+    @staticmethod
+    def encode_parallel(text):
+        """reshape + bidi over paragraph chunks in a process pool; output matches encode_text"""
+        # Explicit embeddings/isolates can span lines; a single core gains nothing
+        if BIDI_CONTROLS.search(text) or (os.cpu_count() or 1) < 2:
+            return get_display(reshape(text))
+        jobs = TextProcessor.split_chunks(text)
+        if len(jobs) < 2:
+            return get_display(reshape(text))
+        return '\n'.join(TextProcessor.get_pool().map(_encode_chunk, jobs))
+    
     @staticmethod
     def matches_exception(text, exceptions):
         if not exceptions:
@@ -85,11 +183,7 @@ class TextProcessor:
     def char_frequency(text):
         if not text:
             return {}
-        freq = {}
-        for char in text:
-            if char.strip():
-                freq[char] = freq.get(char, 0) + 1
-        return dict(sorted(freq.items(), key=lambda x: x[1], reverse=True))
+        return TextStats(text).frequency()
     
     @staticmethod
     def find_replace(text, find, replace):
@@ -113,9 +207,8 @@ class TextProcessor:
                 doc = Document(filepath)
                 return '\n'.join([p.text for p in doc.paragraphs])
             elif ext == '.pdf':
-                from PyPDF2 import PdfReader
-                reader = PdfReader(filepath)
-                return '\n'.join([p.extract_text() for p in reader.pages])
+                from pdf_extractor import PdfExtractor
+                return PdfExtractor.extract(filepath)
             else:
                 with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
                     return f.read()
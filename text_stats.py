@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Text Statistics v1.4.2 - Single-pass counters
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+from collections import Counter
+import heapq
+
+class TextStats:
+    """Character/word/line counters built from one Counter pass, updatable from text deltas"""
+    SCRIPTS = {  # first match wins: digits before persian_arabic, whose block contains them
+        'digits': ((0x0030, 0x0039), (0x0660, 0x0669), (0x06F0, 0x06F9)),
+        'persian_arabic': ((0x0600, 0x06FF), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)),
+        'latin': ((0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)),
+        'hebrew': ((0x0590, 0x05FF),),
+        'cyrillic': ((0x0400, 0x04FF),),
+    }
+
+    def __init__(self, text=''):
+        self.reset(text)
+
+    def reset(self, text):
+        self.counts = Counter(text)
+        self.chars = len(text)
+        self.words = len(text.split())
+
+    def update(self, old_text, new_text, pos, removed, added):
+        """Apply an edit (pos, removed, added) that turned old_text into new_text.
+        Only the edited region, widened to whitespace boundaries, is recounted."""
+        if pos < 0 or pos + removed > len(old_text) or len(old_text) - removed + added != len(new_text):
+            self.reset(new_text)
+            return
+        start = pos
+        while start > 0 and not old_text[start - 1].isspace():
+            start -= 1
+        old_end = pos + removed
+        while old_end < len(old_text) and not old_text[old_end].isspace():
+            old_end += 1
+        new_end = old_end - removed + added
+        old_seg, new_seg = old_text[start:old_end], new_text[start:new_end]
+        self.counts.subtract(old_seg)
+        self.counts.update(new_seg)
+        self.chars = len(new_text)
+        self.words += len(new_seg.split()) - len(old_seg.split())
+
+    @property
+    def lines(self):
+        return self.counts['\n'] + 1 if self.chars else 0
+
+    def scripts(self):
+        result = dict.fromkeys(self.SCRIPTS, 0)
+        for char, n in self.counts.items():
+            if n <= 0:
+                continue
+            code = ord(char)
+            for name, ranges in self.SCRIPTS.items():
+                if any(lo <= code <= hi for lo, hi in ranges):
+                    result[name] += n
+                    break
+        return result
+
+    def top(self, k=10):
+        """k most frequent non-whitespace chars, without sorting the full table"""
+        return heapq.nlargest(k, ((c, n) for c, n in self.counts.items() if n > 0 and not c.isspace()),
+                              key=lambda x: x[1])
+
+    def frequency(self):
+        return dict(sorted(((c, n) for c, n in self.counts.items() if n > 0 and not c.isspace()),
+                           key=lambda x: x[1], reverse=True))
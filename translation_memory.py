@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Translation Memory v1.4.2 - Exact and fuzzy reuse of earlier outputs
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import re, json, zlib, hashlib
+from text_processor import TextProcessor
+
+SPACES = re.compile(r'\s+')
+MASK = (1 << 27) - 1  # bin values
+KEY_MASK = (1 << 58) - 1
+FNV_PRIME = 0x100000001B3
+
+class TranslationMemory:
+    """Input -> output pairs kept in SQLite. Exact hits are looked up by digest of source and
+    config; fuzzy ones through a MinHash of the source's character n-grams (one hash per
+    n-gram, split into BINS bins), banded for LSH so a lookup reads a few index pages
+    instead of scanning. Candidates sharing a band are ranked by n-gram Jaccard similarity."""
+    NGRAM = 3
+    BINS = 48
+    ROWS = 3  # bins per band -> 16 bands
+    CANDIDATES = 100  # entries sharing the most bands, re-ranked exactly
+    MIN_SCORE = 0.5
+    MAX_LENGTH = 4000  # longer texts (whole documents) are not remembered
+    WRITE_BATCH = 1000  # entries per transaction, so other writers are not held up by a bulk add
+    MAX_ENTRIES = 200_000  # beyond this the least recently written entries are evicted,
+    TRIM_TO = 180_000  # down to this many, so trimming is not repeated on every add
+
+    def __init__(self, db):
+        self.db = db
+        self.engine = TextProcessor.engine_version()
+        if not db.get_bool('tm_history_imported'):
+            self.import_history()
+
+    def config_key(self, exceptions, profile='', glossary=None):
+        """Exact hits are only reused under the same exceptions, normalization, glossary and engine"""
+        config = {'exceptions': sorted(exceptions or []), 'normalize': profile or '',
+                  'glossary': glossary.fingerprint if glossary else '', 'engine': self.engine}
+        return hashlib.sha1(json.dumps(config, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def digest(source, config):
+        return hashlib.sha1(f"{config or ''}\0{source}".encode('utf-8')).hexdigest()
+
+    @classmethod
+    def grams(cls, text):
+        text = ' ' + SPACES.sub(' ', text.lower()).strip() + ' '
+        return {text[i:i + cls.NGRAM] for i in range(max(len(text) - cls.NGRAM + 1, 1))}
+
+    @classmethod
+    def signature(cls, grams):
+        """Minimum per bin of the n-gram hashes; empty bins borrow from the next filled one"""
+        sig = [None] * cls.BINS
+        for gram in grams:
+            h = (zlib.crc32(gram.encode('utf-8')) * 0x9E3779B1) & 0xffffffff
+            b, value = h % cls.BINS, (h // cls.BINS) & MASK
+            if sig[b] is None or value < sig[b]:
+                sig[b] = value
+        if None in sig:
+            filled = [sig[i] for i in range(cls.BINS)]
+            for i in range(cls.BINS):
+                d = 1
+                while filled[i] is None:
+                    value = sig[(i + d) % cls.BINS]
+                    if value is not None:
+                        filled[i] = (value + d * 0x9E3779B) & MASK
+                    d += 1
+            sig = filled
+        return sig
+
+    @classmethod
+    def band_keys(cls, sig):
+        keys = []
+        for band in range(cls.BINS // cls.ROWS):
+            h = band + 1
+            for value in sig[band * cls.ROWS:(band + 1) * cls.ROWS]:
+                h = ((h * FNV_PRIME) ^ value) & KEY_MASK
+            keys.append(h)
+        return keys
+
+    def add(self, pairs, config=''):
+        """Remember (source, target) pairs; unchanged and overlong texts are skipped"""
+        rows, seen = [], set()
+        for source, target in pairs:
+            if not source or source == target or len(source) > self.MAX_LENGTH or source in seen:
+                continue
+            seen.add(source)
+            rows.append((self.digest(source, config), source, target, config or '',
+                         self.band_keys(self.signature(self.grams(source)))))
+        for i in range(0, len(rows), self.WRITE_BATCH):
+            self.db.add_tm_entries(rows[i:i + self.WRITE_BATCH])
+        if rows and self.db.get_tm_count() > self.MAX_ENTRIES:
+            self.trim(self.TRIM_TO)
+        return len(rows)
+
+    def trim(self, keep):
+        """Evict the least recently written entries until keep are left"""
+        excess = self.db.get_tm_count() - keep
+        while excess > 0:
+            old = self.db.get_tm_oldest(min(excess, self.WRITE_BATCH))
+            if not old:
+                break
+            self.db.delete_tm_entries([(entry, self.band_keys(self.signature(self.grams(source)))) for entry, source in old])
+            excess -= len(old)
+
+    def exact(self, source, config):
+        """Stored output for source under config, or None"""
+        if not source or len(source) > self.MAX_LENGTH:
+            return None
+        row = self.db.get_tm_entry(self.digest(source, config))
+        return row[1] if row and row[0] == source else None
+
+    def suggest(self, text, k=5, config=None, min_score=None):
+        """Up to k (score, source, target) for sources similar to text, best first;
+        entries with the given config win ties with otherwise equal pairs"""
+        if not text or len(text) > self.MAX_LENGTH:
+            return []
+        min_score = self.MIN_SCORE if min_score is None else min_score
+        grams = self.grams(text)
+        best = {}
+        for entry, source, target, entry_config in self.db.get_tm_candidates(self.band_keys(self.signature(grams)), self.CANDIDATES):
+            other = self.grams(source)
+            score = len(grams & other) / len(grams | other)
+            if score < min_score:
+                continue
+            rank = (score, entry_config == config, entry)
+            if (source, target) not in best or rank > best[source, target]:
+                best[source, target] = rank
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(rank[0], source, target) for (source, target), rank in ranked]
+
+    def import_history(self):
+        """History rows carry no config, so they only ever show up as fuzzy suggestions"""
+        self.add([(row[0], row[1]) for row in self.db.get_history(self.db.HISTORY_LIMIT)])
+        self.db.set('tm_history_imported', 'true')
+
+class MemoryCache(dict):
+    """Drop-in for a processor's shaping cache: misses are looked up as exact memory hits
+    before the processor shapes them, and newly shaped values are written back to memory"""
+    FLUSH = 10_000
+
+    def __init__(self, memory, config):
+        super().__init__()
+        self.memory = memory
+        self.config = config
+        self.added = []
+        self.hits = 0
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        target = self.memory.exact(key, self.config)
+        if target is None:
+            return False
+        dict.__setitem__(self, key, target)
+        self.hits += 1
+        return True
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.added.append((key, value))
+        if len(self.added) >= self.FLUSH:
+            self.flush()
+
+    def flush(self):
+        if self.added:
+            self.memory.add(self.added, self.config)
+            self.added = []
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Harfnegar Watcher v1.4.2 - Reprocess files as they change on disk
+Copyright (c) 2026 Sobhan Mohammadi - GPL-2.0"""
+import os, time
+from batch import BATCH_EXTS
+from archive_processor import is_archive
+
+class Watcher:
+    """Polls with one stat() per watched file and directory each round; a directory is only
+    listed again when its own mtime changes (a file was added, removed or renamed into it).
+    A changed file is processed once it has been quiet for DEBOUNCE seconds, so a burst of
+    saves costs one run, and files that settle in the same round share one manifest write.
+    The BatchProcessor stays alive between rounds: exceptions are read once, processor caches
+    and the shaping pool stay warm."""
+    INTERVAL = 0.25  # seconds between polls
+    DEBOUNCE = 0.3  # quiet time before a changed file is processed
+
+    def __init__(self, batch, paths, out_dir, log=print):
+        self.batch = batch
+        self.paths = paths
+        self.out_dir = os.path.abspath(out_dir)
+        self.log = log
+        self.manifest = {}
+        self.dirs = {}  # dir -> (mtime_ns, root)
+        self.files = {}  # path -> (signature, root); signature None while an explicit file is missing
+        self.explicit = set()  # files named on the command line, kept even while missing
+        self.pending = {}  # path -> [first change, last change, changes seen]
+
+    @staticmethod
+    def signature(st):
+        return st.st_size, st.st_mtime_ns, st.st_ino
+
+    @staticmethod
+    def watchable(name):
+        return os.path.splitext(name)[1].lower() in BATCH_EXTS or is_archive(name)
+
+    def scan(self):
+        for path in self.paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                self.scan_dir(path, path, initial=True)
+            else:
+                self.explicit.add(path)
+                try: self.files[path] = (self.signature(os.stat(path)), os.path.dirname(path))
+                except OSError: self.files[path] = (None, os.path.dirname(path))
+
+    def scan_dir(self, path, root, initial=False):
+        """(Re)list a directory; files that appear after the initial scan count as changed"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+        self.dirs[path] = (mtime, root)
+        now = time.time()
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if entry.path != self.out_dir and entry.path not in self.dirs:
+                        self.scan_dir(entry.path, root, initial)
+                elif entry.is_file() and self.watchable(entry.name) and entry.path not in self.files:
+                    self.files[entry.path] = (self.signature(entry.stat()), root)
+                    if not initial:
+                        self.changed(entry.path, now)
+            except OSError:
+                continue
+
+    def forget(self, path):
+        """Drop a vanished directory with everything under it"""
+        prefix = path + os.sep
+        for d in [d for d in self.dirs if d == path or d.startswith(prefix)]:
+            del self.dirs[d]
+        for f in [f for f in self.files if f.startswith(prefix) and f not in self.explicit]:
+            del self.files[f]
+            self.pending.pop(f, None)
+
+    def changed(self, path, now):
+        entry = self.pending.setdefault(path, [now, now, 0])
+        entry[1] = now
+        entry[2] += 1
+
+    def poll(self):
+        """One round: stat everything, then process the files that have settled"""
+        now = time.time()
+        for path, (mtime, root) in list(self.dirs.items()):
+            if path not in self.dirs:  # forgotten with its parent this round
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                self.forget(path)
+                continue
+            if st.st_mtime_ns != mtime:
+                self.scan_dir(path, root)
+        for path, (sig, root) in list(self.files.items()):
+            try:
+                new = self.signature(os.stat(path))
+            except OSError:
+                if path in self.explicit:
+                    self.files[path] = (None, root)  # e.g. mid atomic save; processed when it is back
+                else:
+                    del self.files[path]
+                self.pending.pop(path, None)
+                continue
+            if new != sig:
+                self.files[path] = (new, root)
+                self.changed(path, now)
+        ready = [path for path, (first, last, count) in self.pending.items() if now - last >= self.DEBOUNCE]
+        if ready:
+            self.process(ready)
+
+    def process(self, paths):
+        stats = {'processed': 0, 'skipped': 0, 'failed': 0, 'seconds': 0.0, 'saved': 0.0}
+        updates = []
+        for path in paths:
+            first, last, count = self.pending.pop(path)
+            start = time.perf_counter()
+            result = self.batch.run_file(path, self.files[path][1], self.out_dir, self.manifest, stats, updates, self.log)
+            secs = time.perf_counter() - start
+            if result == 'skipped':
+                self.log(f"Unchanged: {path}")
+            elif result == 'processed':
+                try: saved = os.stat(path).st_mtime
+                except OSError: saved = last
+                self.log(f"  Latency: {time.time() - saved:.3f}s after save, {secs:.3f}s processing, "
+                         f"{count} change{'s' if count != 1 else ''} coalesced over {last - first:.3f}s")
+        if updates:
+            self.batch.db.save_manifest(updates)
+
+    def run(self, stop=None):
+        """Poll until Ctrl+C (or until stop() returns True); out_dir is expected to be
+        up to date already, i.e. batch.run() has been called for the same paths"""
+        self.manifest = self.batch.db.get_manifest()
+        self.scan()
+        self.log(f"Watching {len(self.files)} files in {len(self.dirs)} directories (Ctrl+C to stop)")
+        try:
+            while not (stop and stop()):
+                time.sleep(self.INTERVAL)
+                self.poll()
+        except KeyboardInterrupt:
+            pass